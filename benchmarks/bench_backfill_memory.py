@@ -0,0 +1,89 @@
+"""긴 구간 백필의 최대 메모리(RSS) 벤치마크: 구간 전체를 한 번에 vs 메모리 예산 타일(plan_tiles)
+
+구간 길이를 늘려 가며 fetch_stock_data 의 수집 → reshape → 저장을 실행하고, 실행마다 새 프로세스의
+최대 RSS 를 잰다. 타일로 나누면 구간이 길어져도 최대 RSS 가 거의 그대로여야 한다.
+
+    python benchmarks/bench_backfill_memory.py --tickers 2000 --sessions 60 250 500 --budget-mb 64 \
+        --dsn "dbname=bench user=hwet"
+
+--dsn 은 stock_data_log 기록용 (stock_data 는 건드리지 않음)
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from synthetic import SyntheticSource, make_tickers  # noqa: E402
+
+
+def run_case(args):
+    """새 프로세스에서 한 경우를 실행하고 결과를 JSON 한 줄로 출력"""
+    import fetch_stock_data as fetch
+    from backfill_planner import plan_tiles
+    from checkpoints import window_bounds
+    from downloader import ChunkedDownloader
+    from trading_calendar import get_trading_calendar
+
+    fetch.DB_CONFIG = {"dsn": args.dsn}
+    fetch.OUTPUT_FORMAT = args.format
+
+    calendar = get_trading_calendar()
+    windows = calendar.split_range("2015-01-02", "2035-01-01", args.case_sessions)
+    from_date, to_date = windows[0]
+    tickers = make_tickers(args.tickers)
+    ranges = {(from_date, to_date): tickers}
+    runs = plan_tiles(ranges, args.budget_mb * 1024 ** 2, calendar) if args.case_mode == "tiles" else [ranges]
+
+    downloader = ChunkedDownloader(SyntheticSource(), chunk_size=args.chunk_size, max_workers=4, rate=1000)
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for run_ranges in runs:
+            run_from, run_to = window_bounds(run_ranges)
+            fetch.fetch_stock_data(tickers, run_from, run_to, downloader, run_ranges)
+    seconds = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    fetch.close_resources()
+    print(json.dumps({"tiles": len(runs), "seconds": seconds, "base_mb": base / 1024, "peak_mb": peak / 1024}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="백필 최대 메모리 벤치마크")
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[60, 250, 500], help="구간 길이 (거래일 수)")
+    parser.add_argument("--budget-mb", type=float, default=64, help="plan_tiles 메모리 예산")
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="parquet")
+    parser.add_argument("--dsn", required=True, help="stock_data_log 기록용 PostgreSQL DSN")
+    parser.add_argument("--case-mode", choices=["single", "tiles"], help=argparse.SUPPRESS)
+    parser.add_argument("--case-sessions", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case_mode:
+        run_case(args)
+        sys.exit(0)
+
+    print(f"[INFO] {args.tickers} tickers, {args.format}, 타일 예산 {args.budget_mb:.0f}MB")
+    print(f"{'sessions':>8} {'mode':7} {'tiles':>5} {'seconds':>8} {'base MB':>8} {'peak MB':>8} {'delta MB':>9}")
+    with tempfile.TemporaryDirectory(prefix="backfill_") as root:
+        env = dict(os.environ, CSV_DIR=os.path.join(root, "files"), WORK_QUEUE_DB=os.path.join(root, "queue.db"),
+                   LOG_SPOOL_DIR=os.path.join(root, "spool"), DOWNLOAD_CACHE_MAX_MB="0")
+        for sessions in args.sessions:
+            for mode in ["single", "tiles"]:
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--tickers", str(args.tickers),
+                     "--budget-mb", str(args.budget_mb), "--chunk-size", str(args.chunk_size),
+                     "--format", args.format, "--dsn", args.dsn,
+                     "--case-mode", mode, "--case-sessions", str(sessions)],
+                    env=env, capture_output=True, text=True, check=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{sessions:8} {mode:7} {result['tiles']:5} {result['seconds']:8.2f} {result['base_mb']:8.0f} "
+                      f"{result['peak_mb']:8.0f} {result['peak_mb'] - result['base_mb']:9.0f}")
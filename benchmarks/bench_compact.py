@@ -0,0 +1,122 @@
+"""기존 stock_data(NUMERIC / TEXT / BIGSERIAL) vs compact 스키마(fixed / float) 벤치마크
+
+합성 데이터로 기존 테이블을 채운 뒤 (compact 는 migrate_compact_schema 로 옮긴 뒤)
+테이블 / 인덱스 크기, stock_data 뷰를 통한 조회(findByTicker / findByDate), 이어지는 날짜의 적재 속도(text / binary COPY)를 비교한다.
+
+    python benchmarks/bench_compact.py --tickers 3000 --days 750 --dsn "dbname=bench user=hwet"
+
+주의: --dsn 의 DB 에서 stock_data / stock_data_old / stock_prices / stock_tickers 를 지우고 다시 만든다. 벤치마크 전용 DB 를 쓸 것.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import migrate_compact_schema  # noqa: E402
+from compact_schema import relation_sizes  # noqa: E402
+from pg_load import create_stock_data, iter_frame_csv, load_frame  # noqa: E402
+from stock_frame import reshape_stock_data  # noqa: E402
+from synthetic import make_download_frame  # noqa: E402
+
+
+def fill(dsn, n_tickers, n_days, chunk_days=50):
+    """기존 stock_data 를 n_days 거래일 × n_tickers 행으로 채움 → 마지막 날짜"""
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('stock_data');")
+            if cur.fetchone() == ("v",):
+                cur.execute("DROP VIEW stock_data;")
+            cur.execute("DROP TABLE IF EXISTS stock_data, stock_data_old, stock_prices, stock_tickers CASCADE;")
+            create_stock_data(cur)
+            start = pd.Timestamp("2020-01-01")
+            for offset in range(0, n_days, chunk_days):
+                days = min(chunk_days, n_days - offset)
+                stock_data, tickers = make_download_frame(n_tickers, days, nan_ratio=0.0, missing_ratio=0.0,
+                                                          start=start, seed=offset)
+                frame, _, _ = reshape_stock_data(stock_data, tickers)
+                cur.copy_expert("COPY stock_data (date, ticker, close, high, low, open, volume) "
+                                "FROM STDIN WITH CSV HEADER", io.BytesIO(b"".join(iter_frame_csv(frame))))
+                start = frame["Date"].max() + pd.offsets.BDay(1)
+            cur.execute("ANALYZE stock_data;")
+            cur.execute("SELECT max(date) FROM stock_data;")
+            last = cur.fetchone()[0]
+        conn.commit()
+        return last
+    finally:
+        conn.close()
+
+
+def sizes(dsn):
+    """(테이블 바이트, 인덱스 바이트) — compact 는 stock_prices + stock_tickers"""
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT relkind FROM pg_class WHERE oid = 'stock_data'::regclass;")
+            tables = ["stock_prices", "stock_tickers"] if cur.fetchone()[0] == "v" else ["stock_data"]
+            totals = [relation_sizes(cur, table) for table in tables]
+            cur.execute("SELECT count(*) FROM stock_data;")
+            rows = cur.fetchone()[0]
+        return sum(t[0] for t in totals), sum(t[1] for t in totals), rows
+    finally:
+        conn.close()
+
+
+def query_ms(dsn, sql, params, repeat=20):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            cur.fetchall()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                cur.execute(sql, params)
+                cur.fetchall()
+            return (time.perf_counter() - started) / repeat * 1000
+    finally:
+        conn.close()
+
+
+def load_rate(dsn, n_tickers, start, n_days, copy_format, seed):
+    """start 부터 n_days 거래일치를 load_frame 으로 적재 → rows/s"""
+    stock_data, tickers = make_download_frame(n_tickers, n_days, nan_ratio=0.0, missing_ratio=0.0,
+                                              start=start, seed=seed)
+    frame, _, _ = reshape_stock_data(stock_data, tickers)
+    started = time.perf_counter()
+    inserted, _, _ = load_frame({"dsn": dsn}, frame, copy_format=copy_format)
+    return inserted / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="기존 stock_data vs compact 스키마 벤치마크")
+    parser.add_argument("--tickers", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=750)
+    parser.add_argument("--load-days", type=int, default=20, help="적재 속도를 잴 때 한 번에 넣는 거래일 수")
+    parser.add_argument("--dsn", required=True, help="벤치마크 전용 PostgreSQL DSN")
+    args = parser.parse_args()
+
+    print(f"{'schema':8} {'rows':>10} {'table MB':>9} {'index MB':>9} {'B/row':>6} "
+          f"{'byTicker ms':>12} {'byDate ms':>10} {'text rows/s':>12} {'binary rows/s':>14}")
+    for schema in ["numeric", "fixed", "float"]:
+        last = fill(args.dsn, args.tickers, args.days)
+        if schema != "numeric":
+            migrate_compact_schema.DB_CONFIG = {"dsn": args.dsn}
+            with contextlib.redirect_stdout(io.StringIO()):
+                migrate_compact_schema.migrate(schema, drop_old=True)
+        heap, indexes, rows = sizes(args.dsn)
+        by_ticker = query_ms(args.dsn, "SELECT * FROM stock_data WHERE ticker = %s;", (f"T{args.tickers // 2:04d}",))
+        by_date = query_ms(args.dsn, "SELECT * FROM stock_data WHERE date = %s;",
+                           ((last - pd.offsets.BDay(args.days // 2)).date(),), repeat=5)
+        text_start = last + pd.offsets.BDay(1)
+        text_rate = load_rate(args.dsn, args.tickers, text_start, args.load_days, "text", 1)
+        binary_start = text_start + pd.offsets.BDay(args.load_days)
+        binary_rate = load_rate(args.dsn, args.tickers, binary_start, args.load_days, "binary", 2)
+        print(f"{schema:8} {rows:10,} {heap / 2**20:9.1f} {indexes / 2**20:9.1f} {(heap + indexes) / rows:6.1f} "
+              f"{by_ticker:12.2f} {by_date:10.2f} {text_rate:12,.0f} {binary_rate:14,.0f}")
@@ -0,0 +1,279 @@
+"""월 단위 파일 압축(compact_files) 벤치마크 / 시나리오 확인
+
+LocalStorage 또는 WebHDFS stand-in 서버(webhdfs_stub.py) 위에 한 달 치 일간 티커 파일을 만들고
+compact_month 를 실행해서 시나리오마다 결과를 확인한다 (하나라도 어긋나면 종료 코드 1).
+
+- basic      : 합친 뒤 (ticker, date) 값이 원본과 같고 일간 파일이 지워짐
+- mismatch   : 버킷 파일 행 수가 맞지 않으면 중단하고 일간 파일 / 기존 compacted 를 그대로 둠
+- late       : 압축한 뒤 다시 받은 일간 파일이 다음 압축 때 기존 값을 덮어씀
+- interrupted: compacted → _compacted_old_* rename 직후 끊긴 실행을 recover_month 가 복구
+- queue      : 대기 중인 파일이 있는 달은 건너뛰고, 압축 중에 다시 등록된 파일은 남기고,
+               dead 였던 파일 대신 버킷 파일을 등록
+
+    python benchmarks/bench_compaction.py --tickers 50 --days 10
+    python benchmarks/bench_compaction.py --storage hdfs --latency 0.002
+"""
+import argparse
+import os
+import posixpath
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from compact_files import COMPACTED_DIR, STAGING_PREFIX, compact_month, recover_month  # noqa: E402
+from data_files import ManifestEntry  # noqa: E402
+from stock_frame import OUTPUT_COLUMNS  # noqa: E402
+from storage import HdfsStorage, LocalStorage  # noqa: E402
+from synthetic import make_tickers  # noqa: E402
+from work_queue import DEAD, PENDING, QUEUE_LOCAL, SUPERSEDED, WorkQueue  # noqa: E402
+from webhdfs_stub import start_server  # noqa: E402
+
+YEAR, MONTH = "2024", "01"
+
+
+class FaultyStorage:
+    """장애를 흉내내는 storage 래퍼
+
+    - drop_rows: 버킷 파일을 쓸 때 마지막 행을 빼먹음 (행 수 불일치)
+    - fail_swap: staging → compacted rename 에서 예외 (교체 도중 끊긴 실행)
+    - on_swap  : staging → compacted rename 직전에 호출 (압축 중에 fetcher 가 다시 등록하는 상황)
+    """
+
+    def __init__(self, storage, drop_rows=False, fail_swap=False, on_swap=None):
+        self.storage = storage
+        self.drop_rows = drop_rows
+        self.fail_swap = fail_swap
+        self.on_swap = on_swap
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+    def write_chunks(self, path, chunks):
+        if self.drop_rows and "TICKER_BUCKET_" in path:
+            data = b"".join(chunks)
+            chunks = iter([data[:data.rstrip(b"\n").rfind(b"\n") + 1]])  # 리스트는 requests 가 form 으로 인코딩함
+        self.storage.write_chunks(path, chunks)
+
+    def rename(self, src, dst):
+        if posixpath.basename(dst) == COMPACTED_DIR:
+            if self.fail_swap:
+                raise InterruptedError("staging → compacted rename 중단 (시뮬레이션)")
+            if self.on_swap:
+                self.on_swap()
+        self.storage.rename(src, dst)
+
+
+def write_daily_files(storage, root, tickers, days, expected, seed):
+    """root/YYYY/MM/DD/TICKER_DATA_* 일간 파일 작성 (expected 에 (ticker, date) → close 반영) → 경로 목록"""
+    rng = np.random.default_rng(seed)
+    header = ",".join(OUTPUT_COLUMNS)
+    paths = []
+    for day in days:
+        file_date = f"{YEAR}-{MONTH}-{day:02d}"
+        day_dir = storage.join(root, YEAR, MONTH, f"{day:02d}")
+        storage.makedirs(day_dir)
+        for ticker in tickers:
+            close = round(float(rng.uniform(10, 500)), 4)
+            line = f"{file_date},{ticker},{close},{close + 1},{close - 1},{close},{int(rng.integers(1, 10**6))}"
+            path = storage.join(day_dir, f"TICKER_DATA_{ticker}_{YEAR}_{MONTH}_{day:02d}.csv")
+            storage.write_bytes(path, f"{header}\n{line}\n".encode("utf-8"))
+            expected[(ticker, file_date)] = close
+            paths.append(path)
+    return paths
+
+
+def read_month(storage, root):
+    """compacted + 남은 일간 파일의 (ticker, date) → close (일간 파일이 compacted 보다 나중 값)
+    반환값: (값 dict, compacted 파일 수, 일간 파일 수, staging 디렉터리 수)"""
+    month_dir = storage.join(root, YEAR, MONTH)
+    frames, n_compacted, n_daily, n_staging = [], 0, 0, 0
+    for name, status in storage.list(month_dir):
+        path = storage.join(month_dir, name)
+        if name.startswith(STAGING_PREFIX):
+            n_staging += 1
+        elif name == COMPACTED_DIR:
+            for file_name, _ in storage.list(path):
+                if file_name.startswith("TICKER_BUCKET_"):
+                    frames.insert(0, _read(storage, storage.join(path, file_name)))
+                    n_compacted += 1
+        elif status["type"] == "DIRECTORY" and name.isdigit():
+            for file_name, _ in storage.list(path):
+                frames.append(_read(storage, storage.join(path, file_name)))
+                n_daily += 1
+    values = {}
+    for frame in frames:
+        for ticker, file_date, close in zip(frame["Ticker"], pd.to_datetime(frame["Date"]), frame["Close"]):
+            values[(ticker, file_date.strftime("%Y-%m-%d"))] = round(float(close), 4)
+    return values, n_compacted, n_daily, n_staging
+
+
+def _read(storage, path):
+    with storage.open_read(path, encoding="utf-8") as reader:
+        return pd.read_csv(reader)
+
+
+def scenario_basic(storage, root, args):
+    expected = {}
+    write_daily_files(storage, root, make_tickers(args.tickers), range(2, 2 + args.days), expected, 0)
+    result = compact_month(storage, root, YEAR, MONTH, args.buckets)
+    values, n_compacted, n_daily, n_staging = read_month(storage, root)
+    return [
+        ("status SUCCESS", result["status"] == "SUCCESS"),
+        ("값 일치", values == expected),
+        (f"버킷 파일 {args.buckets}개", n_compacted == args.buckets),
+        ("일간 파일 / staging 없음", n_daily == 0 and n_staging == 0),
+    ]
+
+
+def scenario_mismatch(storage, root, args):
+    expected = {}
+    tickers = make_tickers(args.tickers)
+    write_daily_files(storage, root, tickers, range(2, 2 + args.days), expected, 0)
+    compact_month(storage, root, YEAR, MONTH, args.buckets)
+    write_daily_files(storage, root, tickers[:5], [2 + args.days], expected, 1)
+    try:
+        compact_month(FaultyStorage(storage, drop_rows=True), root, YEAR, MONTH, args.buckets)
+        error = None
+    except RuntimeError as e:
+        error = str(e)
+    values, n_compacted, n_daily, n_staging = read_month(storage, root)
+    return [
+        ("행 수 불일치로 중단", error is not None and "행 수 불일치" in error),
+        ("값 일치 (기존 compacted + 일간 파일 유지)", values == expected),
+        ("일간 파일 유지 / staging 정리", n_daily == 5 and n_staging == 0 and n_compacted == args.buckets),
+    ]
+
+
+def scenario_late(storage, root, args):
+    expected = {}
+    tickers = make_tickers(args.tickers)
+    write_daily_files(storage, root, tickers, range(2, 2 + args.days), expected, 0)
+    compact_month(storage, root, YEAR, MONTH, args.buckets)
+    # 이미 합친 날짜를 다시 받음 (값이 바뀜) + 새 날짜
+    write_daily_files(storage, root, tickers[:10], [3, 2 + args.days], expected, 2)
+    before, _, n_daily_before, _ = read_month(storage, root)
+    result = compact_month(storage, root, YEAR, MONTH, args.buckets)
+    values, n_compacted, n_daily, _ = read_month(storage, root)
+    return [
+        ("압축 전에도 일간 파일 값이 우선", before == expected and n_daily_before == 20),
+        ("status SUCCESS", result["status"] == "SUCCESS" and result["previous_files"] == args.buckets),
+        ("다시 받은 값으로 덮어씀", values == expected),
+        ("일간 파일 없음", n_daily == 0 and n_compacted == args.buckets),
+    ]
+
+
+def scenario_interrupted(storage, root, args):
+    expected = {}
+    tickers = make_tickers(args.tickers)
+    write_daily_files(storage, root, tickers, range(2, 2 + args.days), expected, 0)
+    compact_month(storage, root, YEAR, MONTH, args.buckets)
+    write_daily_files(storage, root, tickers[:5], [2 + args.days], expected, 3)
+    try:
+        compact_month(FaultyStorage(storage, fail_swap=True), root, YEAR, MONTH, args.buckets)
+        interrupted = False
+    except InterruptedError:
+        interrupted = True
+    month_dir = storage.join(root, YEAR, MONTH)
+    names = [name for name, _ in storage.list(month_dir)]
+    left_behind = COMPACTED_DIR not in names and any(n.startswith(STAGING_PREFIX) for n in names)
+    recover_month(storage, month_dir)
+    recovered, n_compacted, n_daily, n_staging = read_month(storage, root)
+    result = compact_month(storage, root, YEAR, MONTH, args.buckets)
+    values, _, n_daily_after, _ = read_month(storage, root)
+    return [
+        ("rename 도중 중단 (compacted 없음, staging 남음)", interrupted and left_behind),
+        ("recover_month 로 이전 compacted 복구", recovered == expected and n_compacted == args.buckets
+         and n_daily == 5 and n_staging == 0),
+        ("다시 실행하면 SUCCESS", result["status"] == "SUCCESS" and values == expected and n_daily_after == 0),
+    ]
+
+
+def scenario_queue(storage, root, args):
+    expected = {}
+    tickers = make_tickers(args.tickers)
+    paths = write_daily_files(storage, root, tickers, range(2, 2 + args.days), expected, 0)
+    with tempfile.TemporaryDirectory(prefix="compaction_queue_") as queue_dir:
+        work_queue = WorkQueue(os.path.join(queue_dir, "work_queue.db"), QUEUE_LOCAL, max_attempts=1)
+        try:
+            work_queue.enqueue([ManifestEntry(path) for path in paths])
+            queued = compact_month(storage, root, YEAR, MONTH, args.buckets, work_queue=work_queue)
+
+            # 3개는 적재 실패(dead), 나머지는 적재 완료
+            items = work_queue.claim("bench", len(paths))
+            work_queue.finish("bench", items, {item.path for item in items[3:]})
+            refetched = paths[-1]
+            faulty = FaultyStorage(storage, on_swap=lambda: work_queue.enqueue([ManifestEntry(refetched)]))
+            result = compact_month(faulty, root, YEAR, MONTH, args.buckets, work_queue=work_queue)
+            values, _, n_daily, _ = read_month(storage, root)
+            counts = work_queue.stats()
+            pending = [item.path for item in work_queue.claim("bench", len(paths))]
+        finally:
+            work_queue.close()
+    buckets = [path for path in pending if "TICKER_BUCKET_" in path]
+    return [
+        ("대기 중인 파일이 있으면 QUEUED", queued["status"] == "QUEUED" and queued["queued"] == len(paths)),
+        ("status SUCCESS", result["status"] == "SUCCESS" and values == expected),
+        ("다시 등록된 파일은 남김", result.get("kept") == 1 and n_daily == 1 and storage.exists(refetched)),
+        ("dead → superseded", counts[DEAD] == 0 and counts[SUPERSEDED] == 3),
+        (f"버킷 파일 {args.buckets}개 등록", result.get("requeued") == args.buckets
+         and len(buckets) == args.buckets and counts[PENDING] == args.buckets + 1),
+    ]
+
+
+SCENARIOS = {
+    "basic": scenario_basic,
+    "mismatch": scenario_mismatch,
+    "late": scenario_late,
+    "interrupted": scenario_interrupted,
+    "queue": scenario_queue,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="월 단위 파일 압축 벤치마크 / 시나리오 확인")
+    parser.add_argument("--storage", choices=["local", "hdfs"], default="local",
+                        help="hdfs: webhdfs_stub 서버를 띄워서 HdfsStorage 로 실행")
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--days", type=int, default=10, help="일간 파일을 만들 날짜 수 (2일부터)")
+    parser.add_argument("--buckets", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0, help="hdfs: 요청당 서버 지연 (초)")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    args = parser.parse_args()
+
+    failed = 0
+    with tempfile.TemporaryDirectory(prefix="compaction_") as base:
+        server, counts = None, {}
+        if args.storage == "hdfs":
+            from hdfs import InsecureClient
+
+            server, url, counts = start_server(base, latency=args.latency)
+            storage = HdfsStorage(InsecureClient(url, user="bench"))
+        else:
+            storage = LocalStorage()
+
+        print(f"[INFO] {args.storage}: {args.tickers} tickers × {args.days} days, 버킷 {args.buckets}개")
+        print(f"{'scenario':12} {'seconds':>8} {'requests':>9}  result")
+        for name in args.scenarios:
+            root = storage.join(base if args.storage == "local" else "/", name)
+            counts.clear()
+            started = time.perf_counter()
+            try:
+                checks = SCENARIOS[name](storage, root, args)
+            except Exception as e:
+                checks = [(f"예외: {e!r}", False)]
+            seconds = time.perf_counter() - started
+            bad = [label for label, ok in checks if not ok]
+            failed += bool(bad)
+            print(f"{name:12} {seconds:8.2f} {sum(counts.values()):9,}  "
+                  + ("PASS" if not bad else f"FAIL ({'; '.join(bad)})"))
+        if server is not None:
+            server.shutdown()
+
+    if failed:
+        print(f"[ERROR] 시나리오 {failed}개 실패")
+        sys.exit(1)
@@ -0,0 +1,81 @@
+"""text(CSV) COPY vs binary COPY 벤치마크
+
+    python benchmarks/bench_copy.py --rows 1000000                      # 클라이언트 인코딩만
+    python benchmarks/bench_copy.py --rows 1000000 --dsn "dbname=stock_db user=hwet"
+"""
+import argparse
+import os
+import sys
+import time
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from pg_load import COPY_FORMATS, frame_reader  # noqa: E402
+from stock_frame import reshape_stock_data  # noqa: E402
+from synthetic import make_download_frame  # noqa: E402
+
+
+def make_frame(rows, n_tickers=3000):
+    n_days = max(1, rows // n_tickers)
+    stock_data, tickers = make_download_frame(n_tickers, n_days, nan_ratio=0.0, missing_ratio=0.0)
+    df_final, _, _ = reshape_stock_data(stock_data, tickers)
+    return df_final
+
+
+def encode_only(frame, copy_format):
+    reader = frame_reader(frame, copy_format=copy_format)
+    total = 0
+    while True:
+        chunk = reader.read(1 << 16)
+        if not chunk:
+            return total
+        total += len(chunk)
+
+
+def copy_into_stage(frame, copy_format, dsn):
+    """staging 테이블 COPY 와 병합(stock_data 와 같은 구조의 임시 테이블)을 각각 측정"""
+    stage_ddl, copy_sql, merge_sql = COPY_FORMATS[copy_format]
+    stage = f"bench_stage_{copy_format}"
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                CREATE TEMP TABLE stock_data (
+                    id BIGSERIAL PRIMARY KEY, ticker TEXT NOT NULL, date DATE NOT NULL,
+                    open NUMERIC, high NUMERIC, low NUMERIC, close NUMERIC, volume BIGINT,
+                    UNIQUE (ticker, date)
+                );
+            """)
+            cur.execute(stage_ddl.format(table=stage))
+            start = time.perf_counter()
+            cur.copy_expert(copy_sql.format(table=stage), frame_reader(frame, copy_format=copy_format))
+            copy_sec = time.perf_counter() - start
+            start = time.perf_counter()
+            cur.execute(merge_sql.format(table=stage))
+            merge_sec = time.perf_counter() - start
+    finally:
+        conn.rollback()
+        conn.close()
+    return copy_sec, merge_sec
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="text vs binary COPY 벤치마크")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dsn", default=None, help="PostgreSQL DSN (없으면 클라이언트 인코딩만 측정)")
+    args = parser.parse_args()
+
+    frame = make_frame(args.rows)
+    print(f"[INFO] {len(frame):,} rows")
+    print(f"{'format':8} {'bytes':>14} {'encode rows/s':>14} {'copy rows/s':>12} {'merge rows/s':>13}")
+    for copy_format in ["text", "binary"]:
+        start = time.perf_counter()
+        size = encode_only(frame, copy_format)
+        encode_rate = len(frame) / (time.perf_counter() - start)
+        copy_rate = merge_rate = float("nan")
+        if args.dsn:
+            copy_sec, merge_sec = copy_into_stage(frame, copy_format, args.dsn)
+            copy_rate, merge_rate = len(frame) / copy_sec, len(frame) / merge_sec
+        print(f"{copy_format:8} {size:14,} {encode_rate:14,.0f} {copy_rate:12,.0f} {merge_rate:13,.0f}")
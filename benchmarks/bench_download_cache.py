@@ -0,0 +1,64 @@
+"""다운로드 캐시(CachingSource) 벤치마크: 같은 백필을 캐시 없이 / 빈 캐시 / 채워진 캐시로 실행
+
+SyntheticSource 에 요청당 지연을 줘서 네트워크 대기를 흉내내고, 거래일 window 단위로 나눈
+같은 구간을 반복해서 받을 때 소스 요청 수와 시간을 비교한다.
+
+    python benchmarks/bench_download_cache.py --tickers 1000 --days 120 --latency 0.2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from download_cache import CachingSource  # noqa: E402
+from downloader import ChunkedDownloader  # noqa: E402
+from stock_frame import reshape_stock_data  # noqa: E402
+from synthetic import SyntheticSource, make_tickers  # noqa: E402
+from trading_calendar import get_trading_calendar  # noqa: E402
+
+
+def backfill(source, tickers, windows, args):
+    """window 마다 청크 다운로드 + reshape → (초, 소스 요청 수, 행 수)"""
+    downloader = ChunkedDownloader(source, chunk_size=args.chunk_size, max_workers=4, rate=args.rate)
+    synthetic = source.source if isinstance(source, CachingSource) else source
+    calls = len(synthetic.calls)
+    rows = 0
+    started = time.perf_counter()
+    for window_from, window_to in windows:
+        stock_data, _ = downloader.download(tickers, window_from, window_to)
+        rows += len(reshape_stock_data(stock_data, tickers)[0])
+    return time.perf_counter() - started, len(synthetic.calls) - calls, rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="다운로드 캐시 벤치마크")
+    parser.add_argument("--tickers", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=120, help="백필할 달력 일수 (2024-01-02 부터)")
+    parser.add_argument("--window-sessions", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="청크 요청당 지연 (초)")
+    parser.add_argument("--rate", type=float, default=5, help="초당 최대 요청 수")
+    args = parser.parse_args()
+
+    tickers = make_tickers(args.tickers)
+    to_date = (datetime(2024, 1, 2) + timedelta(days=args.days)).strftime("%Y-%m-%d")
+    windows = get_trading_calendar().split_range("2024-01-02", to_date, args.window_sessions)
+    print(f"[INFO] {args.tickers} tickers, window {len(windows)}개 ({args.window_sessions} 거래일씩), "
+          f"청크 {args.chunk_size}개씩 요청당 {args.latency * 1000:.0f}ms, {args.rate:g} req/s")
+
+    with tempfile.TemporaryDirectory(prefix="download_cache_") as root:
+        cache = CachingSource(SyntheticSource(latency=args.latency), root)
+        results = {
+            "no cache": backfill(SyntheticSource(latency=args.latency), tickers, windows, args),
+            "cold cache": backfill(cache, tickers, windows, args),
+            "warm cache": backfill(cache, tickers, windows, args),
+        }
+        print(f"{'mode':12} {'seconds':>8} {'requests':>9} {'rows':>10}")
+        for mode, (seconds, calls, rows) in results.items():
+            print(f"{mode:12} {seconds:8.2f} {calls:9} {rows:10,}")
+        print(cache.report())
+        cache.close()
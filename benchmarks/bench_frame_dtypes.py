@@ -0,0 +1,63 @@
+"""reshape 결과 프레임의 dtype 별 메모리 / groupby 벤치마크
+
+기존 프레임(object 티커, ns 날짜, float64)과 compact 프레임(category 티커, 초 단위 날짜,
+float64 / float32 가격)의 memory_usage(deep=True) 와 티커별 / 날짜별 groupby 시간을 비교한다.
+
+    python benchmarks/bench_frame_dtypes.py --tickers 3000 --days 252
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from stock_frame import reshape_stock_data  # noqa: E402
+from synthetic import make_download_frame  # noqa: E402
+
+
+def legacy_frame(frame):
+    """compact 이전 reshape 결과와 같은 dtype 의 프레임"""
+    return frame.astype({"Ticker": object, "Date": "datetime64[ns]"})
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(frame, repeat):
+    """(MB, 티커별 groupby 초, 날짜별 groupby 초)"""
+    by_ticker = best_of(lambda: frame.groupby("Ticker", observed=True)["Close"].agg(["first", "last", "max"]), repeat)
+    by_date = best_of(lambda: frame.groupby("Date")["Close"].agg(["mean", "std"]), repeat)
+    return frame.memory_usage(deep=True).sum() / 1024 ** 2, by_ticker, by_date
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="프레임 dtype 벤치마크")
+    parser.add_argument("--tickers", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--nan-ratio", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=5, help="groupby 반복 횟수 (최솟값 사용)")
+    args = parser.parse_args()
+
+    stock_data, tickers = make_download_frame(args.tickers, args.days, args.nan_ratio)
+    compact64 = reshape_stock_data(stock_data, tickers)[0]
+    frames = {
+        "legacy": legacy_frame(compact64),
+        "compact f64": compact64,
+        "compact f32": reshape_stock_data(stock_data, tickers, price_dtype="float32")[0],
+    }
+    del stock_data
+    print(f"[INFO] {args.tickers} tickers × {args.days} days = {len(compact64):,} rows")
+
+    print(f"{'frame':12} {'MB':>8} {'by ticker':>10} {'by date':>9}")
+    base_mb = None
+    for name, frame in frames.items():
+        mb, by_ticker, by_date = measure(frame, args.repeat)
+        base_mb = base_mb or mb
+        print(f"{name:12} {mb:8.1f} {by_ticker:9.3f}s {by_date:8.3f}s  ({mb / base_mb:.0%} 메모리)")
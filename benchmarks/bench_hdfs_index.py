@@ -0,0 +1,68 @@
+"""매니페스트 파일 존재 확인 벤치마크: 파일마다 GETFILESTATUS vs 디렉터리별 LISTSTATUS 인덱스
+
+WebHDFS stand-in 서버(webhdfs_stub.py)에 일간 티커 파일을 만들고
+csv_to_db_hdfs.iter_load_targets 를 두 방식으로 실행해서 요청 수와 시간을 비교한다.
+
+    python benchmarks/bench_hdfs_index.py --files 3000 --days 5 --latency 0.002
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from webhdfs_stub import start_server  # noqa: E402
+
+
+def make_manifest(root, n_files, n_days, missing_ratio):
+    """root 아래에 YYYY/MM/DD/TICKER_DATA_* 파일을 만들고 매니페스트(HDFS 경로 목록) 반환"""
+    per_day = max(1, n_files // n_days)
+    manifest = []
+    for day in range(1, n_days + 1):
+        folder = f"/stock/2024/01/{day:02d}"
+        os.makedirs(os.path.join(root, folder.lstrip("/")), exist_ok=True)
+        for i in range(per_day):
+            path = f"{folder}/TICKER_DATA_T{i:05d}_2024_01_{day:02d}.csv"
+            manifest.append(path)
+            if i >= per_day * (1 - missing_ratio):
+                continue  # 매니페스트에는 있지만 실제로는 없는 파일
+            with open(os.path.join(root, path.lstrip("/")), "w") as f:
+                f.write("Date,Ticker,Close,High,Low,Open,Volume\n")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HDFS 파일 존재 확인 벤치마크")
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--missing-ratio", type=float, default=0.01)
+    parser.add_argument("--latency", type=float, default=0.002, help="요청당 서버 지연 (초)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="webhdfs_") as root:
+        manifest = make_manifest(root, args.files, args.days, args.missing_ratio)
+        server, url, counts = start_server(root, latency=args.latency)
+        os.environ["HDFS_URL"] = url
+        os.environ.setdefault("HDFS_USER", "bench")
+
+        import csv_to_db_hdfs
+        from storage import HdfsStorage, PathIndex
+
+        print(f"[INFO] 매니페스트 {len(manifest):,}개, 디렉터리 {args.days}개, 요청당 지연 {args.latency * 1000:.1f}ms")
+        print(f"{'method':12} {'seconds':>8} {'requests':>9} {'found':>7}")
+        for method in ["per-file", "dir-index"]:
+            counts.clear()
+            start = time.perf_counter()
+            path_index = None
+            with contextlib.redirect_stdout(io.StringIO()):  # 파일마다 찍는 로그 숨김
+                if method == "dir-index":
+                    path_index = PathIndex(HdfsStorage(csv_to_db_hdfs.client))
+                    path_index.preload(manifest)
+                found = sum(1 for _ in csv_to_db_hdfs.iter_load_targets(manifest, path_index=path_index))
+            seconds = time.perf_counter() - start
+            print(f"{method:12} {seconds:8.2f} {sum(counts.values()):9,} {found:7,}  {dict(counts)}")
+        server.shutdown()
@@ -0,0 +1,171 @@
+"""HDFS 읽기/쓰기 메모리(RSS) 벤치마크: 파일 전체를 메모리에 올리던 기존 방식 vs 스트리밍
+
+WebHDFS stand-in 서버(webhdfs_stub.py)를 띄우고, 각 방식은 별도 프로세스에서 실행해서
+작업 구간의 최대 RSS 증가량(VmHWM - 시작 시 VmRSS)을 잰다. 서버 메모리는 포함하지 않는다.
+
+    python benchmarks/bench_hdfs_stream.py --size-mb 2048
+    python benchmarks/bench_hdfs_stream.py --size-mb 512 --modes read-csv-stream write-csv-stream
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from stock_frame import reshape_stock_data  # noqa: E402
+from synthetic import make_download_frame  # noqa: E402
+
+MODES = [
+    "read-csv-legacy", "read-csv-stream",
+    "read-parquet-legacy", "read-parquet-stream",
+    "write-csv-legacy", "write-csv-stream",
+    "write-parquet-legacy", "write-parquet-stream",
+]
+
+
+def _proc_status(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def _reset_peak():
+    """VmHWM 을 현재 RSS 로 초기화 (Linux 4.0+)"""
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def _drain(reader, size):
+    """copy_expert 처럼 read(size) 를 끝까지 호출"""
+    total = 0
+    while True:
+        chunk = reader.read(size)
+        if not chunk:
+            return total
+        total += len(chunk)
+
+
+def _make_frame(rows):
+    n_tickers = 3000
+    stock_data, tickers = make_download_frame(n_tickers, max(1, rows // n_tickers), nan_ratio=0.0, missing_ratio=0.0)
+    df_final, _, _ = reshape_stock_data(stock_data, tickers)
+    return df_final
+
+
+def generate_inputs(root, size_mb):
+    """size_mb 크기의 월간 CSV 와 같은 행 수의 Parquet 를 stub 루트에 직접 작성"""
+    import pyarrow.parquet as pq
+
+    from parquet_io import PARQUET_COMPRESSION, PARQUET_SCHEMA, frame_to_table
+    from pg_load import iter_frame_csv
+
+    block = _make_frame(200_000)
+    body = b"".join(iter_frame_csv(block, header=False))
+    header = next(iter_frame_csv(block.iloc[:0]))
+    repeats = max(1, (size_mb << 20) // len(body))
+
+    os.makedirs(os.path.join(root, "bench"), exist_ok=True)
+    with open(os.path.join(root, "bench", "ALL_DATA_2024_01_31.csv"), "wb") as f:
+        f.write(header)
+        for _ in range(repeats):
+            f.write(body)
+
+    table = frame_to_table(block)
+    with pq.ParquetWriter(os.path.join(root, "bench", "ALL_DATA_2024_01_31.parquet"), PARQUET_SCHEMA,
+                          compression=PARQUET_COMPRESSION) as writer:
+        for _ in range(repeats):
+            writer.write_table(table)
+    return repeats * len(block)
+
+
+def run_mode(mode, url, rows):
+    """자식 프로세스에서 실행: 방식 하나의 RSS 증가량 측정"""
+    from hdfs import InsecureClient
+
+    from hdfs_stream import READ_CHUNK_SIZE, open_hdfs_copy_source, write_hdfs_frame
+    from parquet_io import frame_to_parquet_bytes, parquet_to_csv_buffer
+
+    client = InsecureClient(url, user="bench")
+    csv_path, parquet_path = "/bench/ALL_DATA_2024_01_31.csv", "/bench/ALL_DATA_2024_01_31.parquet"
+    frame = _make_frame(rows) if mode.startswith("write") else None
+
+    baseline = _proc_status("VmRSS")
+    _reset_peak()
+    start = time.perf_counter()
+
+    if mode == "read-csv-legacy":
+        with client.read(csv_path, encoding="utf-8") as reader:
+            nbytes = _drain(io.StringIO(reader.read()), 8192)
+    elif mode == "read-parquet-legacy":
+        with client.read(parquet_path) as reader:
+            nbytes = _drain(parquet_to_csv_buffer(reader.read()), 8192)
+    elif mode in ("read-csv-stream", "read-parquet-stream"):
+        path = csv_path if "csv" in mode else parquet_path
+        with open_hdfs_copy_source(client, path) as stream:
+            nbytes = _drain(stream, READ_CHUNK_SIZE)
+    elif mode == "write-csv-legacy":
+        csv_buffer = io.StringIO()
+        frame.to_csv(csv_buffer, index=False)
+        with client.write("/bench/out.csv", encoding="utf-8", overwrite=True) as writer:
+            writer.write(csv_buffer.getvalue())
+        nbytes = client.status("/bench/out.csv")["length"]
+    elif mode == "write-parquet-legacy":
+        client.write("/bench/out.parquet", data=frame_to_parquet_bytes(frame), overwrite=True)
+        nbytes = client.status("/bench/out.parquet")["length"]
+    else:
+        fmt = "parquet" if "parquet" in mode else "csv"
+        write_hdfs_frame(client, f"/bench/out.{fmt}", frame, fmt)
+        nbytes = client.status(f"/bench/out.{fmt}")["length"]
+
+    return {
+        "mode": mode,
+        "seconds": time.perf_counter() - start,
+        "bytes": nbytes,
+        "baseline_rss": baseline,
+        "peak_rss_delta": _proc_status("VmHWM") - baseline,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HDFS 스트리밍 읽기/쓰기 RSS 벤치마크")
+    parser.add_argument("--size-mb", type=int, default=2048, help="읽기용 월간 CSV 크기")
+    parser.add_argument("--write-rows", type=int, default=None,
+                        help="쓰기 벤치마크 DataFrame 행 수 (기본: 읽기 파일과 같은 행 수)")
+    parser.add_argument("--modes", nargs="*", default=MODES, choices=MODES)
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "URL", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, url, rows = args.child
+        print(json.dumps(run_mode(mode, url, int(rows))))
+        sys.exit(0)
+
+    from webhdfs_stub import start_server
+
+    with tempfile.TemporaryDirectory(prefix="webhdfs_") as root:
+        rows = generate_inputs(root, args.size_mb)
+        sizes = {ext: os.path.getsize(os.path.join(root, "bench", f"ALL_DATA_2024_01_31.{ext}"))
+                 for ext in ("csv", "parquet")}
+        print(f"[INFO] {rows:,} rows, csv {sizes['csv'] / 2**20:,.0f}MB, parquet {sizes['parquet'] / 2**20:,.0f}MB")
+        server, url, _ = start_server(root)
+        write_rows = args.write_rows or rows
+
+        print(f"{'mode':22} {'seconds':>8} {'MB moved':>9} {'peak RSS Δ MB':>14}")
+        for mode in args.modes:
+            proc_rows = write_rows if mode.startswith("write") else rows
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, url, str(proc_rows)],
+                                 capture_output=True, text=True)
+            if out.returncode != 0:
+                print(f"{mode:22} 실패: {out.stderr.strip().splitlines()[-1] if out.stderr else out.returncode}")
+                continue
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{mode:22} {result['seconds']:8.1f} {result['bytes'] / 2**20:9,.0f} "
+                  f"{result['peak_rss_delta'] / 2**20:14,.0f}")
+        server.shutdown()
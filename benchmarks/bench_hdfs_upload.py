@@ -0,0 +1,89 @@
+"""fetch_stock_data_hdfs 저장 단계 벤치마크: 순차 업로드 vs HdfsUploader 스레드 풀
+
+WebHDFS stand-in 서버(webhdfs_stub.py)에 요청당 지연을 주고, 합성 데이터로
+fetch_stock_data 를 실제로 실행해서 저장 단계 시간과 작업 큐에 등록된 파일 목록을 비교한다.
+(DB 로그는 LOG_SPOOL_DIR 의 스풀 파일로 남음)
+
+    python benchmarks/bench_hdfs_upload.py --tickers 300 --days 2 --latency 0.01 --workers 1 8 16
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from webhdfs_stub import start_server  # noqa: E402
+from synthetic import SyntheticSource, make_tickers  # noqa: E402
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HDFS 업로드 동시성 벤치마크")
+    parser.add_argument("--tickers", type=int, default=300)
+    parser.add_argument("--days", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.01, help="요청당 서버 지연 (초)")
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="webhdfs_") as root:
+        server, url, counts = start_server(root, latency=args.latency)
+        os.environ.update({
+            "HDFS_URL": url, "HDFS_USER": "bench", "HDFS_DIR": "/stock",
+            "WORK_QUEUE_DB": os.path.join(root, "work_queue.db"),
+            "DB_HOST": "127.0.0.1", "DB_PORT": "1",  # DB 없음 → 로그는 스풀 파일로
+            "LOG_SPOOL_DIR": os.path.join(root, "spool"),
+        })
+
+        import fetch_stock_data_hdfs as fetch
+        from downloader import ChunkedDownloader
+        from hdfs_stream import make_hdfs_client
+        from stock_frame import iter_date_partitions, reshape_stock_data
+        from work_queue import QUEUE_HDFS, WorkQueue
+
+        tickers = make_tickers(args.tickers)
+        from_date, to_date = "2024-01-02", f"2024-01-{2 + args.days:02d}"
+        downloader = ChunkedDownloader(SyntheticSource(), chunk_size=500, rate=1000)
+        expected = None
+
+        print(f"[INFO] {args.tickers} tickers × {args.days} days, 요청당 지연 {args.latency * 1000:.0f}ms")
+        print(f"{'mode':14} {'seconds':>8} {'files':>6} {'requests':>9}")
+        for workers in [0] + args.workers:
+            fetch.work_queue = WorkQueue(os.path.join(root, f"work_queue_{workers}.db"), QUEUE_HDFS)
+            counts.clear()
+
+            if workers == 0:
+                label = "sequential"
+            else:
+                fetch.HDFS_UPLOAD_WORKERS = workers
+                fetch.client = make_hdfs_client(url, "bench", pool_size=workers)
+                label = f"pool x{workers}"
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # 파일마다 찍는 로그 숨김
+                if workers == 0:
+                    # 기존 방식: save_csv_to_hdfs 를 uploader 없이 호출 (파일마다 동기 업로드 + 작업 큐 등록)
+                    stock_data, _ = downloader.download(tickers, from_date, to_date)
+                    df_final, valid, _ = reshape_stock_data(stock_data, tickers)
+                    for date, df_date, ticker_slices in iter_date_partitions(df_final):
+                        date_str = date.strftime("%Y_%m_%d")
+                        fetch.save_csv_to_hdfs(df_date, date_str, "_".join(valid), is_monthly=True)
+                        for tick, ticker_data in ticker_slices:
+                            fetch.save_csv_to_hdfs(ticker_data, date_str, tick)
+                else:
+                    fetch.fetch_stock_data(tickers, from_date, to_date, downloader)
+            seconds = time.perf_counter() - start
+
+            # 등록 순서대로 경로만 비교 (run_id 는 매번 다름)
+            entries = [item.path for item in fetch.work_queue.claim("bench", limit=1 << 30)]
+            fetch.work_queue.close()
+            if expected is None:
+                expected = entries
+            elif entries != expected:
+                print(f"[WARN] {label}: 작업 큐 내용이 순차 업로드 결과와 다름")
+            print(f"{label:14} {seconds:8.2f} {len(entries):6,} {sum(counts.values()):9,}")
+
+        fetch.close_resources()
+        server.shutdown()
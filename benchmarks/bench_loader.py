@@ -0,0 +1,100 @@
+"""파일마다 연결/트랜잭션 vs BatchLoader(연결 하나 + 배치 병합) vs ParallelLoader(워커 N개) 적재 벤치마크
+
+    python benchmarks/bench_loader.py --files 500 --dsn "dbname=stock_db user=hwet"
+    python benchmarks/bench_loader.py --files 500 --batch-size 100 --commit-every 5 --dsn "..."
+    python benchmarks/bench_loader.py --files 2000 --workers 1 2 4 8 --dsn "..."
+
+주의: --dsn 의 DB 에 stock_data 테이블이 만들어지고 합성 티커(T00000 ...) 행이 들어간다.
+벤치마크 전용 DB 를 쓸 것.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from pg_load import BatchLoader, ParallelLoader, load_frame  # noqa: E402
+from stock_frame import reshape_stock_data  # noqa: E402
+from synthetic import make_download_frame  # noqa: E402
+
+
+def make_files(n_files, n_days):
+    """티커별 파일 n_files 개 → [(DataFrame, CSV 바이트)]"""
+    stock_data, tickers = make_download_frame(n_files, n_days, nan_ratio=0.0, missing_ratio=0.0)
+    df_final, _, _ = reshape_stock_data(stock_data, tickers)
+    files = []
+    for _, frame in df_final.groupby("Ticker", sort=False):
+        buffer = io.StringIO()
+        frame.to_csv(buffer, index=False)
+        files.append((frame, buffer.getvalue().encode("utf-8")))
+    return files
+
+
+def reset(dsn):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DROP TABLE IF EXISTS stock_data;")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def per_file(files, dsn, copy_format):
+    """기존 방식: 파일마다 연결 + staging 생성 + 병합 + commit"""
+    start = time.perf_counter()
+    for frame, _ in files:
+        load_frame({"dsn": dsn}, frame, copy_format=copy_format)
+    return time.perf_counter() - start
+
+
+def batched(files, dsn, copy_format, batch_size, commit_every):
+    start = time.perf_counter()
+    with BatchLoader({"dsn": dsn}, batch_size, commit_every, copy_format) as loader:
+        for frame, data in files:
+            loader.copy(frame if copy_format == "binary" else io.BytesIO(data))
+    return time.perf_counter() - start, loader
+
+
+def parallel(files, dsn, copy_format, workers):
+    start = time.perf_counter()
+    loader = ParallelLoader({"dsn": dsn}, workers, copy_format)
+    loader.load(range(len(files)),
+                lambda i: files[i][0] if copy_format == "binary" else io.BytesIO(files[i][1]))
+    return time.perf_counter() - start, loader
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="파일별 적재 vs 배치 적재 벤치마크")
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--days", type=int, default=1, help="파일당 거래일 수")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--commit-every", type=int, default=1)
+    parser.add_argument("--workers", type=int, nargs="*", default=[],
+                        help="ParallelLoader 워커 수 목록 (예: 1 2 4 8)")
+    parser.add_argument("--copy-format", choices=["text", "binary"], default="text")
+    parser.add_argument("--dsn", required=True, help="벤치마크 전용 PostgreSQL DSN")
+    args = parser.parse_args()
+
+    files = make_files(args.files, args.days)
+    print(f"[INFO] {len(files)} files, {sum(len(f) for f, _ in files):,} rows")
+
+    reset(args.dsn)
+    sec = per_file(files, args.dsn, args.copy_format)
+    print(f"per-file  {sec:8.2f}s  {len(files) / sec:8.1f} files/s")
+
+    reset(args.dsn)
+    sec, loader = batched(files, args.dsn, args.copy_format, args.batch_size, args.commit_every)
+    print(f"batched   {sec:8.2f}s  {len(files) / sec:8.1f} files/s  "
+          f"(batch={args.batch_size}, commit_every={args.commit_every})")
+    print(loader.report())
+
+    for workers in args.workers:
+        reset(args.dsn)
+        sec, loader = parallel(files, args.dsn, args.copy_format, workers)
+        print(f"parallel  {sec:8.2f}s  {len(files) / sec:8.1f} files/s  (workers={workers})")
+        print(loader.report())
@@ -0,0 +1,119 @@
+"""CSV vs Parquet 저장 형식 벤치마크 (쓰기 시간 / 용량 / 읽기·적재 시간)
+
+    python benchmarks/bench_parquet.py --tickers 3000 --days 21
+    python benchmarks/bench_parquet.py --dsn "dbname=stock_db user=hwet"   # COPY 적재 시간 포함
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from data_files import data_file_path  # noqa: E402
+from parquet_io import write_parquet, read_parquet_frame, parquet_to_csv_buffer  # noqa: E402
+from stock_frame import reshape_stock_data, iter_date_partitions  # noqa: E402
+from synthetic import make_download_frame  # noqa: E402
+
+
+COPY_SQL = """
+    COPY bench_stock_data (date, ticker, close, high, low, open, volume)
+    FROM STDIN WITH CSV HEADER DELIMITER ',' QUOTE '"';
+"""
+
+
+def write_all(df_final, root, fmt, ticker_files=False):
+    """fetch_stock_data 와 같은 방식으로 날짜별 (및 티커별) 파일 저장 → 경로 목록"""
+    paths = []
+    for date, df_date, ticker_slices in iter_date_partitions(df_final):
+        date_str = date.strftime("%Y_%m_%d")
+        parts = [(df_date, "ALL", True)]
+        if ticker_files and fmt == "csv":
+            parts += [(data, tick, False) for tick, data in ticker_slices]
+        for data, tickers, is_monthly in parts:
+            folder, name = data_file_path(root, date_str, tickers, is_monthly, fmt)
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, name)
+            if fmt == "parquet":
+                write_parquet(data, path)
+            else:
+                data.to_csv(path, index=False)
+            if is_monthly:
+                paths.append(path)
+    return paths
+
+
+def dir_bytes(root):
+    total = 0
+    for folder, _, files in os.walk(root):
+        total += sum(os.path.getsize(os.path.join(folder, f)) for f in files)
+    return total
+
+
+def read_all(paths, fmt):
+    rows = 0
+    for path in paths:
+        frame = read_parquet_frame(path) if fmt == "parquet" else pd.read_csv(path)
+        rows += len(frame)
+    return rows
+
+
+def copy_all(paths, fmt, dsn):
+    import psycopg2
+
+    conn = psycopg2.connect(dsn)
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE bench_stock_data (
+                ticker TEXT, date DATE, open NUMERIC, high NUMERIC,
+                low NUMERIC, close NUMERIC, volume BIGINT
+            );
+        """)
+        for path in paths:
+            if fmt == "parquet":
+                cur.copy_expert(COPY_SQL, parquet_to_csv_buffer(path))
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    cur.copy_expert(COPY_SQL, f)
+        cur.execute("SELECT count(*) FROM bench_stock_data;")
+        rows = cur.fetchone()[0]
+    conn.rollback()
+    conn.close()
+    return rows
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV vs Parquet 벤치마크")
+    parser.add_argument("--tickers", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=21)
+    parser.add_argument("--ticker-files", action="store_true", help="CSV 티커별 파일까지 저장 (현재 HDFS 동작)")
+    parser.add_argument("--dsn", default=None, help="COPY 적재 시간 측정용 PostgreSQL DSN")
+    args = parser.parse_args()
+
+    stock_data, tickers = make_download_frame(args.tickers, args.days)
+    df_final, _, _ = reshape_stock_data(stock_data, tickers)
+    print(f"[INFO] {len(df_final):,} rows ({args.tickers} tickers × {args.days} days)")
+    print(f"{'format':8} {'write s':>9} {'bytes':>14} {'read s':>8} {'copy s':>8}")
+
+    for fmt in ["csv", "parquet"]:
+        root = tempfile.mkdtemp(prefix=f"bench_{fmt}_")
+        try:
+            write_sec, paths = timed(write_all, df_final, root, fmt, args.ticker_files)
+            size = dir_bytes(root)
+            read_sec, rows = timed(read_all, paths, fmt)
+            assert rows == len(df_final)
+            copy_sec = timed(copy_all, paths, fmt, args.dsn)[0] if args.dsn else float("nan")
+            print(f"{fmt:8} {write_sec:9.3f} {size:14,} {read_sec:8.3f} {copy_sec:8.3f}")
+        finally:
+            shutil.rmtree(root)
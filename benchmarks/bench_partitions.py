@@ -0,0 +1,107 @@
+"""단일 stock_data vs date 범위 파티션(+BRIN) 벤치마크
+
+합성 데이터로 단일 테이블을 채운 뒤 migrate_stock_data 로 파티션 테이블로 옮기고,
+전후로 findByDate 조회(SELECT ... WHERE date = ?)와 하루치 야간 적재(BatchLoader)를 비교한다.
+
+    python benchmarks/bench_partitions.py --tickers 3000 --days 750 --dsn "dbname=bench user=hwet"
+
+주의: --dsn 의 DB 에서 stock_data / stock_data_old 를 지우고 다시 만든다. 벤치마크 전용 DB 를 쓸 것.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import migrate_stock_data  # noqa: E402
+from pg_load import BatchLoader, create_stock_data, iter_frame_csv  # noqa: E402
+from stock_frame import reshape_stock_data  # noqa: E402
+from synthetic import make_download_frame  # noqa: E402
+
+
+def fill(dsn, n_tickers, n_days, chunk_days=50):
+    """단일 stock_data 를 n_days 거래일 × n_tickers 행으로 채움 (chunk_days 씩 생성해서 COPY)"""
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DROP TABLE IF EXISTS stock_data, stock_data_old, stock_data_new CASCADE;")
+            create_stock_data(cur)
+            start = pd.Timestamp("2020-01-01")
+            for offset in range(0, n_days, chunk_days):
+                days = min(chunk_days, n_days - offset)
+                stock_data, tickers = make_download_frame(n_tickers, days, nan_ratio=0.0, missing_ratio=0.0,
+                                                          start=start, seed=offset)
+                frame, _, _ = reshape_stock_data(stock_data, tickers)
+                data = io.BytesIO(b"".join(iter_frame_csv(frame)))
+                cur.copy_expert("COPY stock_data (date, ticker, close, high, low, open, volume) "
+                                "FROM STDIN WITH CSV HEADER", data)
+                start = frame["Date"].max() + pd.offsets.BDay(1)
+            cur.execute("ANALYZE stock_data;")
+            cur.execute("SELECT max(date), pg_total_relation_size('stock_data') FROM stock_data;")
+            last, size = cur.fetchone()
+        conn.commit()
+        return last, size
+    finally:
+        conn.close()
+
+
+def find_by_date(dsn, day, repeat=20):
+    """SELECT * FROM stock_data WHERE date = ? → (평균 ms, 읽은 버퍼 수, 계획 요약)"""
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT * FROM stock_data WHERE date = %s;", (day,))
+            plan = cur.fetchone()[0][0]["Plan"]
+            buffers = plan["Shared Hit Blocks"] + plan["Shared Read Blocks"]
+            node = plan
+            while node.get("Plans") and node["Node Type"] in ("Append", "Gather", "Bitmap Heap Scan"):
+                node = node["Plans"][0]
+            started = time.perf_counter()
+            for _ in range(repeat):
+                cur.execute("SELECT * FROM stock_data WHERE date = %s;", (day,))
+                rows = len(cur.fetchall())
+            ms = (time.perf_counter() - started) / repeat * 1000
+        return ms, buffers, rows, f"{plan['Node Type']} → {node['Node Type']}"
+    finally:
+        conn.close()
+
+
+def nightly_load(dsn, n_tickers, day, seed):
+    """하루치 (n_tickers 행) 를 BatchLoader 로 병합 → (초, 신규 행 수)"""
+    stock_data, tickers = make_download_frame(n_tickers, 1, nan_ratio=0.0, missing_ratio=0.0, start=day, seed=seed)
+    frame, _, _ = reshape_stock_data(stock_data, tickers)
+    data = b"".join(iter_frame_csv(frame))
+    started = time.perf_counter()
+    with BatchLoader({"dsn": dsn}, batch_size=1) as loader:
+        loader.copy(io.BytesIO(data))
+    return time.perf_counter() - started, loader.stats["inserted"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="단일 테이블 vs 파티션 테이블 벤치마크")
+    parser.add_argument("--tickers", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=750)
+    parser.add_argument("--partition-by", choices=["month", "year"], default="month")
+    parser.add_argument("--dsn", required=True, help="벤치마크 전용 PostgreSQL DSN")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    last, size = fill(args.dsn, args.tickers, args.days)
+    print(f"[INFO] {args.tickers} tickers × {args.days} days, {size / 2**20:,.0f}MB "
+          f"(생성 {time.perf_counter() - started:.0f}s)")
+    probe = (last - pd.offsets.BDay(args.days // 2)).date()
+    next_days = [(last + pd.offsets.BDay(i)).date() for i in (1, 2)]
+
+    print(f"{'table':12} {'findByDate ms':>14} {'buffers':>8} {'rows':>6}  {'plan':28} {'nightly load s':>15}")
+    for i, label in enumerate(["single", "partitioned"]):
+        if label == "partitioned":
+            migrate_stock_data.DB_CONFIG = {"dsn": args.dsn}
+            migrate_stock_data.migrate(args.partition_by, drop_old=True)
+        ms, buffers, rows, plan = find_by_date(args.dsn, probe)
+        load_seconds, inserted = nightly_load(args.dsn, args.tickers, next_days[i], i)
+        print(f"{label:12} {ms:14.2f} {buffers:8,} {rows:6,}  {plan:28} {load_seconds:15.2f}")
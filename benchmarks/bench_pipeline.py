@@ -0,0 +1,112 @@
+"""순차 수집(구간마다 다운로드 → 저장 → 적재) vs stock_pipeline(단계별 동시 실행) 벤치마크
+
+SyntheticSource 에 요청당 지연을 줘서 네트워크 대기를 흉내내고, 같은 구간들을
+1) fetch_stock_data.fetch_stock_data (--direct-load --archive 와 같은 순차 경로)
+2) stock_pipeline 의 파이프라인
+으로 처리해서 전체 시간과 단계별 보고를 비교한다.
+
+    python benchmarks/bench_pipeline.py --tickers 1000 --days 60 --latency 0.2 --dsn "dbname=bench user=hwet"
+
+주의: --dsn 의 DB 에서 stock_data 를 지우고 다시 만든다. 벤치마크 전용 DB 를 쓸 것.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from synthetic import SyntheticSource, make_tickers  # noqa: E402
+
+
+def reset(dsn):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DROP TABLE IF EXISTS stock_data CASCADE;")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def count_rows(dsn):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT count(*) FROM stock_data;")
+            return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="순차 수집 vs 파이프라인 벤치마크")
+    parser.add_argument("--tickers", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=60, help="수집할 달력 일수 (2024-01-02 부터)")
+    parser.add_argument("--window-sessions", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2, help="청크 요청당 지연 (초)")
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="parquet")
+    parser.add_argument("--dsn", required=True, help="벤치마크 전용 PostgreSQL DSN")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="pipeline_") as root:
+        os.environ.update({"CSV_DIR": os.path.join(root, "files"), "WORK_QUEUE_DB": os.path.join(root, "queue.db"),
+                           "LOG_SPOOL_DIR": os.path.join(root, "spool")})
+        import fetch_stock_data as fetch
+        import stock_pipeline
+        from db_log_writer import create_log_table
+        from downloader import ChunkedDownloader
+
+        fetch.DB_CONFIG = {"dsn": args.dsn}
+        create_log_table(fetch.DB_CONFIG, fetch.LOG_TABLE_NAME)
+        fetch.DIRECT_LOAD, fetch.ARCHIVE, fetch.OUTPUT_FORMAT = True, True, args.format
+
+        tickers = make_tickers(args.tickers)
+        to_date = (datetime(2024, 1, 2) + timedelta(days=args.days)).strftime("%Y-%m-%d")
+        units = stock_pipeline.plan_units(fetch, tickers, "2024-01-02", to_date, args.window_sessions, incremental=False)
+        print(f"[INFO] {args.tickers} tickers, 구간 {len(units)}개 ({args.window_sessions} 거래일씩), "
+              f"청크 {args.chunk_size}개씩 요청당 {args.latency * 1000:.0f}ms, {args.format}")
+
+        def make_downloader():
+            return ChunkedDownloader(SyntheticSource(latency=args.latency), chunk_size=args.chunk_size,
+                                     max_workers=4, rate=1000)
+
+        results = {}
+
+        reset(args.dsn)
+        downloader = make_downloader()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for unit in units:
+                run_from, run_to = stock_pipeline.window_bounds(unit)
+                fetch.fetch_stock_data(tickers, run_from, run_to, downloader, unit)
+        results["sequential"] = (time.perf_counter() - started, count_rows(args.dsn))
+
+        reset(args.dsn)
+        downloader = make_downloader()
+        workers = {"download": 2, "reshape": 1, "persist": 2, "load": 2}
+        run_args = argparse.Namespace(storage="local", queue_size=2)
+        output = io.StringIO()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            stock_pipeline.run_cycle(fetch, downloader, units, run_args, workers, threading.Event())
+        results["pipeline"] = (time.perf_counter() - started, count_rows(args.dsn))
+
+        print(f"{'mode':12} {'seconds':>8} {'rows':>10}")
+        for mode, (seconds, rows) in results.items():
+            print(f"{mode:12} {seconds:8.2f} {rows:10,}")
+        report = output.getvalue().splitlines()
+        start = next(i for i, line in enumerate(report) if line.startswith("stage"))
+        errors = [line for line in report if line.startswith("[ERROR]")]
+        if errors:
+            print("\n".join(errors))
+        print("\n".join(report[start:]))
+        fetch.close_resources()
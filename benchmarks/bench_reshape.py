@@ -0,0 +1,77 @@
+"""fetch_stock_data 의 reshape / 날짜·티커 분할 단계 벤치마크
+
+    python benchmarks/bench_reshape.py --tickers 3000 --days 63
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from stock_frame import reshape_stock_data, iter_date_partitions  # noqa: E402
+from synthetic import make_download_frame  # noqa: E402
+
+
+def legacy_reshape_and_split(stock_data, tickers):
+    """기존 fetch_stock_data 구현 (티커별 / 날짜×티커별 boolean mask)"""
+    valid_tickers = set()
+    data_list = []
+    ticker_in_column = stock_data.stack(level=0, future_stack=True).reset_index()
+    missing_tickers = [ticker for ticker in tickers if stock_data[ticker].isna().all().all()]
+    down_tickers = list(set(tickers) - set(missing_tickers))
+    for ticker in down_tickers:
+        df_ticker = ticker_in_column[ticker_in_column["Ticker"] == ticker]
+        if not df_ticker[["Open", "High", "Low", "Close", "Volume"]].isna().all().all():
+            valid_tickers.add(ticker)
+            df_ticker = df_ticker[['Date', 'Ticker', 'Close', 'High', 'Low', 'Open', 'Volume']]
+            data_list.append(df_ticker)
+
+    df_final = pd.concat(data_list).reset_index(drop=True)
+    df_final = df_final.dropna()
+    df_final['Volume'] = df_final['Volume'].astype(int)
+
+    n_parts = 0
+    for date, df_date in df_final.groupby("Date"):
+        n_parts += 1
+        for tick in valid_tickers:
+            df_date[df_date['Ticker'] == tick]
+            n_parts += 1
+    return n_parts
+
+
+def new_reshape_and_split(stock_data, tickers):
+    """reshape_stock_data + iter_date_partitions"""
+    df_final, _, _ = reshape_stock_data(stock_data, tickers)
+    n_parts = 0
+    for _, _, ticker_slices in iter_date_partitions(df_final):
+        n_parts += 1 + sum(1 for _ in ticker_slices)
+    return n_parts
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="reshape 단계 벤치마크")
+    parser.add_argument("--tickers", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=63)
+    parser.add_argument("--nan-ratio", type=float, default=0.01)
+    parser.add_argument("--skip-legacy", action="store_true", help="기존 구현 측정 생략")
+    args = parser.parse_args()
+
+    stock_data, tickers = make_download_frame(args.tickers, args.days, args.nan_ratio)
+    print(f"[INFO] 합성 프레임: {args.tickers} tickers × {args.days} days")
+
+    new_sec, new_parts = timed(new_reshape_and_split, stock_data, tickers)
+    print(f"new    : {new_sec:8.3f}s  ({new_parts} partitions)")
+
+    if not args.skip_legacy:
+        old_sec, old_parts = timed(legacy_reshape_and_split, stock_data, tickers)
+        print(f"legacy : {old_sec:8.3f}s  ({old_parts} partitions)")
+        print(f"speedup: {old_sec / new_sec:8.1f}x")
@@ -0,0 +1,426 @@
+"""오프라인 벤치마크 모음: 수집 → 저장 → 적재 단계를 따로 측정해서 JSON 으로 남기고 기준 결과와 비교
+
+Yahoo / HDFS / PostgreSQL 없이 실행한다.
+- 데이터: synthetic.make_download_frame (yf.download 모양, tickers × days × NaN 비율)
+- HDFS: webhdfs_stub (로컬 디렉터리를 WebHDFS 처럼 보여주는 서버)
+- PostgreSQL: --dsn 을 주지 않으면 local_postgres 로 임시 클러스터를 띄웠다가 지움
+  (--dsn 을 주면 그 DB 에 임시 스키마를 만들어 쓰고 지우므로 기존 stock_data 는 건드리지 않음)
+
+단계 (--stages 로 묶음 선택):
+- frame: reshape (reshape_stock_data), split (iter_date_partitions),
+         serialize_csv / serialize_parquet / serialize_binary (파일 / binary COPY 인코딩)
+- write: write_local (fetch_stock_data.save_csv), write_hdfs (fetch_stock_data_hdfs.save_csv_to_hdfs + HdfsUploader)
+         — fetch_stock_data 의 날짜별 / 티커별 저장 루프 그대로
+- copy: copy_{text,binary} (staging COPY), merge_{text,binary} (빈 stock_data 에 병합),
+        upsert_{text,binary} (같은 행을 upsert 로 다시 병합 → 모두 동일)
+- load: load_local (csv_to_db.process_csv_files), load_hdfs (csv_to_db_hdfs.process_csv_files)
+        — write 단계가 작업 큐에 등록한 파일을 빈 stock_data 에 적재
+
+    python benchmarks/bench_suite.py --tickers 500 --days 20 --output results.json
+    python benchmarks/bench_suite.py --tickers 500 --days 20 --baseline results.json --tolerance 0.2
+    sudo python benchmarks/bench_suite.py --pg-run-as postgres      # root 로 실행할 때 (initdb 는 root 불가)
+
+--baseline 과 비교해서 처리량(rows/s)이 tolerance 넘게 떨어진 단계가 있으면 exit 1
+"""
+import argparse
+import atexit
+import contextlib
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import psycopg2
+import pyarrow
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "scripts"))
+
+from local_postgres import disposable_postgres  # noqa: E402
+from parquet_io import frame_to_parquet_bytes  # noqa: E402
+from hdfs_stream import HdfsUploader  # noqa: E402
+from pg_load import (  # noqa: E402
+    COPY_FORMATS, copy_frame, create_stock_data, iter_frame_binary, iter_frame_csv, merge_stage,
+)
+from stock_frame import PRICE_DTYPES, iter_date_partitions, reshape_stock_data  # noqa: E402
+from synthetic import make_download_frame  # noqa: E402
+from webhdfs_stub import start_server  # noqa: E402
+from work_queue import QUEUE_HDFS, QUEUE_LOCAL, WorkQueue  # noqa: E402
+
+STAGE_GROUPS = ("frame", "write", "copy", "load")
+
+
+def stopwatch(func, *args, **kwargs):
+    """(초, 반환값)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def dir_bytes(root):
+    return sum(os.path.getsize(os.path.join(folder, name))
+               for folder, _, files in os.walk(root) for name in files)
+
+
+def copy_queue(source_path, target_path):
+    """작업 큐 DB 복사 (WAL 포함). 로더가 반복마다 같은 파일 목록을 받도록"""
+    with contextlib.closing(sqlite3.connect(source_path)) as source, \
+            contextlib.closing(sqlite3.connect(target_path)) as target:
+        source.backup(target)
+
+
+def reset_stock_data(db_config):
+    """빈 stock_data 로 다시 만듦"""
+    with contextlib.closing(psycopg2.connect(**db_config)) as conn:
+        with conn.cursor() as cur:
+            cur.execute("DROP TABLE IF EXISTS stock_data CASCADE;")
+            create_stock_data(cur)
+        conn.commit()
+
+
+def count_stock_data(db_config):
+    with contextlib.closing(psycopg2.connect(**db_config)) as conn, conn.cursor() as cur:
+        cur.execute("SELECT count(*) FROM stock_data;")
+        return cur.fetchone()[0]
+
+
+def run_frame(stock_data, tickers, price_dtype):
+    """reshape / 분할 / 직렬화 → ({단계: (초, 행, 바이트)}, 프레임, 유효 티커)"""
+    reshape_sec, (frame, valid, _) = stopwatch(reshape_stock_data, stock_data, tickers, price_dtype)
+    rows = len(frame)
+
+    def split():
+        return sum(1 + sum(1 for _ in ticker_slices) for _, _, ticker_slices in iter_date_partitions(frame))
+
+    split_sec, _ = stopwatch(split)
+    csv_sec, csv_bytes = stopwatch(lambda: len(frame.to_csv(index=False).encode("utf-8")))
+    parquet_sec, parquet_bytes = stopwatch(lambda: len(frame_to_parquet_bytes(frame)))
+    binary_sec, binary_bytes = stopwatch(lambda: sum(len(chunk) for chunk in iter_frame_binary(frame)))
+    return {
+        "reshape": (reshape_sec, rows, int(frame.memory_usage(deep=True).sum())),
+        "split": (split_sec, rows, 0),
+        "serialize_csv": (csv_sec, rows, csv_bytes),
+        "serialize_parquet": (parquet_sec, rows, parquet_bytes),
+        "serialize_binary": (binary_sec, rows, binary_bytes),
+    }, frame, valid
+
+
+def run_write_local(fetch, frame, valid, root, run):
+    """fetch_stock_data 의 저장 루프 → ({단계: 측정값}, 작업 큐 경로)"""
+    fetch.CSV_DIR = os.path.join(root, "local", str(run))
+    queue_path = os.path.join(root, f"local_queue_{run}.db")
+    fetch.work_queue = WorkQueue(queue_path, QUEUE_LOCAL)
+
+    def write():
+        saved = True
+        for date, df_date, ticker_slices in iter_date_partitions(frame):
+            date_str = date.strftime("%Y_%m_%d")
+            saved = fetch.save_csv(df_date, date_str, "_".join(valid), is_monthly=True) is not None and saved
+            if fetch.OUTPUT_FORMAT != "parquet":
+                for tick, ticker_data in ticker_slices:
+                    saved = fetch.save_csv(ticker_data, date_str, tick, is_monthly=False) is not None and saved
+        return saved
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds, saved = stopwatch(write)
+    fetch.work_queue.close()
+    if not saved:
+        print("[WARN] write_local: 저장에 실패한 파일이 있음")
+    return {"write_local": (seconds, len(frame), dir_bytes(fetch.CSV_DIR))}, queue_path
+
+
+def run_write_hdfs(fetch_hdfs, frame, valid, root, hdfs_root, run):
+    """fetch_stock_data_hdfs 의 업로드 루프 (HdfsUploader) → ({단계: 측정값}, 작업 큐 경로)"""
+    fetch_hdfs.HDFS_DIR = f"/stock/{run}"
+    queue_path = os.path.join(root, f"hdfs_queue_{run}.db")
+    fetch_hdfs.work_queue = WorkQueue(queue_path, QUEUE_HDFS)
+
+    def write():
+        uploader = HdfsUploader(fetch_hdfs.get_client(), max_workers=fetch_hdfs.HDFS_UPLOAD_WORKERS)
+        dates, saved = [], True
+        try:
+            for date, df_date, ticker_slices in iter_date_partitions(frame):
+                date_str = date.strftime("%Y_%m_%d")
+                saved = fetch_hdfs.save_csv_to_hdfs(df_date, date_str, "_".join(valid), is_monthly=True,
+                                                    uploader=uploader) is not None and saved
+                if fetch_hdfs.OUTPUT_FORMAT != "parquet":
+                    for tick, ticker_data in ticker_slices:
+                        saved = fetch_hdfs.save_csv_to_hdfs(ticker_data, date_str, tick, is_monthly=False,
+                                                            uploader=uploader) is not None and saved
+                dates.append(date)
+        finally:
+            saved = fetch_hdfs.finish_uploads(uploader.close(), dates) and saved
+        return saved
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds, saved = stopwatch(write)
+    fetch_hdfs.work_queue.close()
+    if not saved:
+        print("[WARN] write_hdfs: 업로드에 실패한 파일이 있음")
+    return {"write_hdfs": (seconds, len(frame), dir_bytes(os.path.join(hdfs_root, "stock", str(run))))}, queue_path
+
+
+def run_copy(frame, db_config, copy_format, encoded_bytes):
+    """staging COPY / 빈 stock_data 에 병합 / 같은 행을 upsert 로 다시 병합"""
+    reset_stock_data(db_config)
+    stage = f"bench_stage_{copy_format}"
+    rows = len(frame)
+    with contextlib.closing(psycopg2.connect(**db_config)) as conn, conn.cursor() as cur:
+        def merge(merge_mode):
+            counts = merge_stage(cur, stage, copy_format, merge_mode)
+            conn.commit()  # ON COMMIT DELETE ROWS: staging 은 commit 때 비워짐
+            return counts
+
+        cur.execute(COPY_FORMATS[copy_format][0].format(table=stage))
+        copy_sec, _ = stopwatch(copy_frame, cur, frame, stage, copy_format)
+        merge_sec, (inserted, _, _) = stopwatch(merge, "insert")
+        copy_frame(cur, frame, stage, copy_format)
+        upsert_sec, (_, updated, unchanged) = stopwatch(merge, "upsert")
+
+    if inserted != rows or updated or unchanged != rows:
+        print(f"[WARN] {copy_format} 병합 결과가 예상과 다름: 신규 {inserted}, 수정 {updated}, 동일 {unchanged} "
+              f"(프레임 {rows}행)")
+    return {
+        f"copy_{copy_format}": (copy_sec, rows, encoded_bytes),
+        f"merge_{copy_format}": (merge_sec, rows, 0),
+        f"upsert_{copy_format}": (upsert_sec, rows, 0),
+    }
+
+
+def run_load(loader, stage, queue_path, file_bytes, db_config, expected_rows, root, run, args):
+    """write 단계가 등록한 작업 큐를 그대로 복사해서 빈 stock_data 에 process_csv_files 실행"""
+    reset_stock_data(db_config)
+    loader.WORK_QUEUE_DB = os.path.join(root, f"{stage}_queue_{run}.db")
+    copy_queue(queue_path, loader.WORK_QUEUE_DB)
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds, _ = stopwatch(loader.process_csv_files, copy_format=args.copy_format,
+                               batch_size=args.batch_size, workers=args.workers)
+    rows = count_stock_data(db_config)
+    if rows != expected_rows:
+        print(f"[WARN] {stage}: stock_data {rows}행 (프레임 {expected_rows}행)")
+    return {stage: (seconds, rows, file_bytes)}
+
+
+def summarize(samples):
+    """{단계: [(초, 행, 바이트), ...]} → {단계: 중앙값 기준 결과}"""
+    stages = {}
+    for stage, runs in samples.items():
+        seconds = [s for s, _, _ in runs]
+        median = statistics.median(seconds)
+        _, rows, nbytes = runs[-1]
+        stages[stage] = {
+            "seconds": median,
+            "min_seconds": min(seconds),
+            "samples": seconds,
+            "rows": rows,
+            "bytes": nbytes,
+            "rows_per_sec": rows / median if median > 0 else None,
+            "mb_per_sec": nbytes / 1024 ** 2 / median if nbytes and median > 0 else None,
+        }
+    return stages
+
+
+def environment(db_config):
+    """결과 JSON 에 남길 실행 환경"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    server = None
+    if db_config is not None:
+        with contextlib.closing(psycopg2.connect(**db_config)) as conn, conn.cursor() as cur:
+            cur.execute("SHOW server_version;")
+            server = cur.fetchone()[0]
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pyarrow.__version__,
+        "psycopg2": psycopg2.__version__.split()[0],
+        "postgres": server,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """기준 결과 대비 단계별 처리량 변화 출력 → 처리량이 tolerance 넘게 떨어진 단계 목록"""
+    def sizing(params):  # 처리량에 영향을 주는 인자만 (단계 선택 / 반복 횟수 제외)
+        return {key: value for key, value in (params or {}).items() if key not in ("stages", "repeat")}
+
+    if sizing(baseline.get("params")) != sizing(results.get("params")):
+        print("[WARN] 기준 결과와 실행 인자가 다름: 처리량 비교가 정확하지 않을 수 있음")
+    regressions = []
+    print(f"\n{'stage':18} {'base rows/s':>12} {'rows/s':>12} {'change':>8}")
+    for stage, result in results["stages"].items():
+        base = baseline["stages"].get(stage)
+        if not base or not base.get("rows_per_sec") or not result["rows_per_sec"]:
+            continue
+        change = result["rows_per_sec"] / base["rows_per_sec"] - 1
+        regressed = change < -tolerance
+        if regressed:
+            regressions.append(stage)
+        print(f"{stage:18} {base['rows_per_sec']:12,.0f} {result['rows_per_sec']:12,.0f} {change:+8.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def run_suite(args, root, db_config):
+    """선택한 단계를 args.repeat 번씩 실행 → {단계: [(초, 행, 바이트), ...]}"""
+    # HDFS stand-in / 로그 스풀 / 작업 큐를 모두 임시 디렉터리에 두고 fetcher / loader 를 import
+    hdfs_root = os.path.join(root, "hdfs")
+    os.makedirs(hdfs_root)
+    server, url, _ = start_server(hdfs_root)
+    os.environ.update({
+        "HDFS_URL": url, "HDFS_USER": "bench", "HDFS_DIR": "/stock",
+        "CSV_DIR": os.path.join(root, "local"), "OUTPUT_FORMAT": args.format,
+        "WORK_QUEUE_DB": os.path.join(root, "work_queue.db"), "DOWNLOAD_CACHE_MAX_MB": "0",
+        "DB_HOST": "127.0.0.1", "DB_PORT": "1",  # DB 없이 실행하면 로그는 스풀 파일로
+    })
+    # 로그 스풀 파일 이름이 pid 기준이라 fetcher 마다 다른 디렉터리를 줌
+    os.environ["LOG_SPOOL_DIR"] = os.path.join(root, "spool_local")
+    os.makedirs(os.environ["LOG_SPOOL_DIR"])
+    import fetch_stock_data as fetch
+    os.environ["LOG_SPOOL_DIR"] = os.path.join(root, "spool_hdfs")
+    os.makedirs(os.environ["LOG_SPOOL_DIR"])
+    import fetch_stock_data_hdfs as fetch_hdfs
+    import csv_to_db as loader
+    import csv_to_db_hdfs as loader_hdfs
+    from db_log_writer import create_log_table
+
+    if db_config is not None:
+        # 모듈이 잡고 있는 DB_CONFIG (로그 기록기 / PartitionManager 가 같은 dict 를 참조) 를 그대로 바꿈
+        for module in (fetch, fetch_hdfs, loader, loader_hdfs):
+            module.DB_CONFIG.clear()
+            module.DB_CONFIG.update(db_config)
+        create_log_table(fetch.DB_CONFIG, fetch.LOG_TABLE_NAME)
+
+    stock_data, tickers = make_download_frame(args.tickers, args.days, args.nan_ratio)
+    groups = set(args.stages)
+    samples = {}
+
+    def record(results):
+        for stage, measured in results.items():
+            samples.setdefault(stage, []).append(measured)
+
+    frame_results, frame, valid = run_frame(stock_data, tickers, args.price_dtype)
+    print(f"[INFO] {args.tickers} tickers × {args.days} days → {len(frame):,} rows, 반복 {args.repeat}회")
+    copy_bytes = {"text": sum(len(chunk) for chunk in iter_frame_csv(frame)),
+                  "binary": frame_results["serialize_binary"][2]}
+    try:
+        for run in range(args.repeat):
+            if "frame" in groups:
+                frame_results = frame_results if run == 0 else run_frame(stock_data, tickers, args.price_dtype)[0]
+                record(frame_results)
+
+            if groups & {"write", "load"}:
+                local, local_queue = run_write_local(fetch, frame, valid, root, run)
+                remote, hdfs_queue = run_write_hdfs(fetch_hdfs, frame, valid, root, hdfs_root, run)
+                if "write" in groups:
+                    record(local)
+                    record(remote)
+
+            if "copy" in groups:
+                for copy_format, encoded_bytes in copy_bytes.items():
+                    record(run_copy(frame, db_config, copy_format, encoded_bytes))
+
+            if "load" in groups:
+                record(run_load(loader, "load_local", local_queue, local["write_local"][2], db_config,
+                                len(frame), root, run, args))
+                record(run_load(loader_hdfs, "load_hdfs", hdfs_queue, remote["write_hdfs"][2], db_config,
+                                len(frame), root, run, args))
+    finally:
+        server.shutdown()
+        # DB 없이 실행하면 로그는 임시 디렉터리의 스풀 파일에 남고 함께 지워짐 (종료 시 재시도 / 연결 실패 메시지 생략)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for module in (fetch, fetch_hdfs):
+                if module.log_writer is not None:
+                    atexit.unregister(module.log_writer.close)
+                module.close_resources()
+    return samples
+
+
+@contextlib.contextmanager
+def bench_database(args):
+    """적재 단계에 쓸 DB_CONFIG (--dsn 이 없으면 임시 클러스터). 임시 스키마는 끝나면 지움"""
+    with contextlib.ExitStack() as stack:
+        dsn = args.dsn or stack.enter_context(disposable_postgres(args.pg_bin, args.pg_run_as))
+        schema = f"bench_suite_{os.getpid()}"
+        with contextlib.closing(psycopg2.connect(dsn)) as conn, conn.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA {schema};")
+            conn.commit()
+        try:
+            yield {"dsn": dsn, "options": f"-c search_path={schema}"}
+        finally:
+            with contextlib.closing(psycopg2.connect(dsn)) as conn, conn.cursor() as cur:
+                cur.execute(f"DROP SCHEMA {schema} CASCADE;")
+                conn.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="오프라인 수집 / 적재 벤치마크 모음")
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--nan-ratio", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3, help="단계마다 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--stages", nargs="+", choices=STAGE_GROUPS, default=list(STAGE_GROUPS))
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="저장 형식 (OUTPUT_FORMAT)")
+    parser.add_argument("--price-dtype", choices=PRICE_DTYPES, default="float64")
+    parser.add_argument("--copy-format", choices=["text", "binary"], default="text", help="load 단계 COPY 형식")
+    parser.add_argument("--batch-size", type=int, default=None, help="load 단계 배치 모드 (csv_to_db --batch-size)")
+    parser.add_argument("--workers", type=int, default=1, help="load 단계 병렬 적재 (csv_to_db --workers)")
+    parser.add_argument("--dsn", default=None, help="임시 클러스터 대신 쓸 PostgreSQL DSN (임시 스키마만 사용)")
+    parser.add_argument("--pg-bin", default=None, help="임시 클러스터용 initdb / pg_ctl 디렉터리")
+    parser.add_argument("--pg-run-as", default=None, help="임시 클러스터를 실행할 OS 사용자 (root 로 실행할 때)")
+    parser.add_argument("--output", default=None, help="결과 JSON 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="허용하는 처리량 감소 비율")
+    args = parser.parse_args()
+
+    params = {key: value for key, value in vars(args).items()
+              if key not in ("dsn", "pg_bin", "pg_run_as", "output", "baseline", "tolerance")}
+    needs_db = bool(set(args.stages) & {"copy", "load"})
+    with contextlib.ExitStack() as stack:
+        try:
+            db_config = stack.enter_context(bench_database(args)) if needs_db else None
+        except (RuntimeError, psycopg2.Error) as e:
+            print(f"[ERROR] 벤치마크용 PostgreSQL 준비 실패: {e}")
+            sys.exit(1)
+        root = stack.enter_context(tempfile.TemporaryDirectory(prefix="bench_suite_"))
+        samples = run_suite(args, root, db_config)
+        results = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "params": params,
+            "environment": environment(db_config),
+            "stages": summarize(samples),
+        }
+
+    print(f"\n{'stage':18} {'seconds':>8} {'min':>8} {'rows':>10} {'rows/s':>12} {'MB/s':>8}")
+    for stage, result in results["stages"].items():
+        mb_per_sec = f"{result['mb_per_sec']:8.1f}" if result["mb_per_sec"] else f"{'-':>8}"
+        print(f"{stage:18} {result['seconds']:8.3f} {result['min_seconds']:8.3f} {result['rows']:10,} "
+              f"{result['rows_per_sec'] or 0:12,.0f} {mb_per_sec}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"[INFO] 결과 저장: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"[ERROR] 처리량 감소 {args.tolerance:.0%} 초과: {', '.join(regressions)}")
+            sys.exit(1)
+        print("[INFO] 기준 결과 대비 처리량 감소 없음")
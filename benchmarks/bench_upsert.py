@@ -0,0 +1,111 @@
+"""최근 구간 재수집 벤치마크: insert(무시) vs 삭제 후 재적재 vs upsert(바뀐 행만 수정)
+
+stock_data 를 n_days 치로 채운 뒤, 마지막 --window 거래일을 다시 받아온 것처럼
+--changed 비율의 행만 가격을 고쳐서 세 가지 방식으로 병합하고 시간 / 쓴 튜플 / WAL 양을 비교한다.
+
+    python benchmarks/bench_upsert.py --tickers 3000 --days 250 --window 5 --dsn "dbname=bench user=hwet"
+
+주의: --dsn 의 DB 에서 stock_data 를 지우고 다시 만든다. 벤치마크 전용 DB 를 쓸 것.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from pg_load import create_stock_data, iter_frame_csv, load_frame  # noqa: E402
+from stock_frame import reshape_stock_data  # noqa: E402
+from synthetic import make_download_frame  # noqa: E402
+
+
+def fill(dsn, frame):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DROP TABLE IF EXISTS stock_data CASCADE;")
+            create_stock_data(cur)
+            cur.copy_expert("COPY stock_data (date, ticker, close, high, low, open, volume) "
+                            "FROM STDIN WITH CSV HEADER", io.BytesIO(b"".join(iter_frame_csv(frame))))
+            cur.execute("ANALYZE stock_data;")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def revise(frame, ratio, seed=0):
+    """ratio 비율의 행만 Close 를 0.01 바꾼 복사본 (수정 주가 흉내)"""
+    revised = frame.copy()
+    rng = np.random.default_rng(seed)
+    mask = rng.random(len(revised)) < ratio
+    revised.loc[mask, "Close"] = (revised.loc[mask, "Close"] + 0.01).round(6)
+    return revised, int(mask.sum())
+
+
+def counters(cur):
+    """(쓴 튜플 수, WAL 위치)"""
+    cur.execute("SELECT n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables WHERE relname = 'stock_data';")
+    tuples = cur.fetchone()[0]
+    cur.execute("SELECT pg_current_wal_lsn();")
+    return tuples, cur.fetchone()[0]
+
+
+def measure(dsn, label, run):
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_stat_force_next_flush();")
+            tuples, lsn = counters(cur)
+            started = time.perf_counter()
+            result = run()
+            seconds = time.perf_counter() - started
+            time.sleep(0.1)
+            cur.execute("SELECT pg_stat_clear_snapshot();")
+            new_tuples, new_lsn = counters(cur)
+            cur.execute("SELECT pg_wal_lsn_diff(%s, %s);", (new_lsn, lsn))
+            wal = cur.fetchone()[0]
+        print(f"{label:16} {seconds:8.2f} {new_tuples - tuples:12,} {wal / 2**20:9.1f}  {result}")
+    finally:
+        conn.close()
+
+
+def delete_and_reload(dsn, frame):
+    """예전 방식: 구간을 지우고 다시 적재"""
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM stock_data WHERE date >= %s;", (frame["Date"].min().date(),))
+        conn.commit()
+    finally:
+        conn.close()
+    return load_frame({"dsn": dsn}, frame)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="최근 구간 재수집 병합 방식 벤치마크")
+    parser.add_argument("--tickers", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--window", type=int, default=5, help="다시 받아오는 최근 거래일 수")
+    parser.add_argument("--changed", type=float, default=0.01, help="값이 바뀐 행 비율")
+    parser.add_argument("--dsn", required=True, help="벤치마크 전용 PostgreSQL DSN")
+    args = parser.parse_args()
+
+    stock_data, tickers = make_download_frame(args.tickers, args.days, nan_ratio=0.0, missing_ratio=0.0)
+    frame, _, _ = reshape_stock_data(stock_data, tickers)
+    last_days = np.sort(frame["Date"].unique())[-args.window:]
+    window, changed = revise(frame[frame["Date"].isin(last_days)], args.changed)
+    print(f"[INFO] {len(frame):,}행 중 최근 {args.window}일 {len(window):,}행 재적재, 값이 바뀐 행 {changed:,}개")
+
+    print(f"{'mode':16} {'seconds':>8} {'tuples':>12} {'WAL MB':>9}  (신규, 수정, 동일)")
+    for label, run in [
+        ("insert", lambda: load_frame({"dsn": args.dsn}, window)),
+        ("delete+reload", lambda: delete_and_reload(args.dsn, window)),
+        ("upsert", lambda: load_frame({"dsn": args.dsn}, window, merge_mode="upsert")),
+    ]:
+        fill(args.dsn, frame)
+        measure(args.dsn, label, run)
@@ -0,0 +1,81 @@
+"""벤치마크용 일회용 PostgreSQL 클러스터
+
+임시 디렉터리에 initdb 로 클러스터를 만들고 unix 소켓으로만 띄웠다가, 끝나면 멈추고 디렉터리째 지운다.
+서버 바이너리는 --pg-bin / PG_BIN → pg_config --bindir → PATH 의 initdb → /usr/lib/postgresql/*/bin 순으로 찾는다.
+initdb 는 root 로 실행할 수 없으므로 root 라면 run_as(--run-as) 로 서버를 실행할 OS 사용자를 지정한다.
+
+    python benchmarks/local_postgres.py --run-as postgres     # 띄워 두고 DSN 출력 (Ctrl+C 로 정리)
+"""
+import argparse
+import contextlib
+import glob
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+
+def find_pg_bin(bin_dir=None):
+    """initdb / pg_ctl 이 있는 디렉터리"""
+    candidates = [bin_dir, os.getenv("PG_BIN")]
+    if shutil.which("pg_config"):
+        output = subprocess.run(["pg_config", "--bindir"], capture_output=True, text=True)
+        candidates.append(output.stdout.strip())
+    if shutil.which("initdb"):
+        candidates.append(os.path.dirname(shutil.which("initdb")))
+    candidates += sorted(glob.glob("/usr/lib/postgresql/*/bin"), reverse=True)
+    for candidate in candidates:
+        if candidate and os.path.exists(os.path.join(candidate, "initdb")):
+            return candidate
+    raise RuntimeError("PostgreSQL 서버 바이너리(initdb / pg_ctl)를 찾을 수 없음: --pg-bin 또는 PG_BIN 지정")
+
+
+@contextlib.contextmanager
+def disposable_postgres(bin_dir=None, run_as=None, port=5432):
+    """🐘 임시 클러스터를 띄우고 DSN 을 넘겨줌 (with 블록이 끝나면 멈추고 삭제)"""
+    bin_dir = find_pg_bin(bin_dir)
+    if run_as is None and hasattr(os, "geteuid") and os.geteuid() == 0:
+        raise RuntimeError("root 로는 initdb 를 실행할 수 없음: run_as 로 서버를 실행할 OS 사용자 지정")
+    prefix = ["runuser", "-u", run_as, "--"] if run_as else []
+
+    # unix 소켓 경로 길이 제한(107자) 때문에 짧은 경로 사용
+    root = tempfile.mkdtemp(prefix="bench_pg_", dir="/tmp" if os.path.isdir("/tmp") else None)
+    data = os.path.join(root, "data")
+    if run_as:
+        shutil.chown(root, user=run_as)
+
+    def pg_ctl(*args):
+        return subprocess.run(prefix + [os.path.join(bin_dir, "pg_ctl"), "-D", data, *args],
+                              capture_output=True, text=True, check=True)
+
+    try:
+        subprocess.run(prefix + [os.path.join(bin_dir, "initdb"), "-D", data, "-U", "postgres", "-A", "trust",
+                                 "-E", "UTF8", "--no-sync"], capture_output=True, text=True, check=True)
+        pg_ctl("-l", os.path.join(root, "server.log"), "-w", "-o",
+               f"-k {root} -p {port} -c listen_addresses=''", "start")
+    except subprocess.CalledProcessError as e:
+        shutil.rmtree(root, ignore_errors=True)
+        raise RuntimeError(f"임시 PostgreSQL 시작 실패: {e.stderr.strip() or e.stdout.strip()}") from e
+
+    try:
+        yield f"host={root} port={port} user=postgres dbname=postgres"
+    finally:
+        with contextlib.suppress(subprocess.CalledProcessError):
+            pg_ctl("-m", "fast", "-w", "stop")
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벤치마크용 일회용 PostgreSQL")
+    parser.add_argument("--pg-bin", default=None, help="initdb / pg_ctl 디렉터리")
+    parser.add_argument("--run-as", default=None, help="서버를 실행할 OS 사용자 (root 로 실행할 때 필요)")
+    args = parser.parse_args()
+
+    with disposable_postgres(args.pg_bin, args.run_as) as dsn:
+        print(f"[INFO] 임시 PostgreSQL: {dsn}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from downloader import inspect_download
+
+
+PRICE_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def make_tickers(n_tickers):
+    """합성 티커 이름 목록 (T0000, T0001, ...)"""
+    return [f"T{i:04d}" for i in range(n_tickers)]
+
+
+def make_download_frame(n_tickers=3000, n_days=63, nan_ratio=0.01, missing_ratio=0.005,
+                        start="2024-01-02", seed=0):
+    """🧪 yf.download(group_by='ticker') 와 같은 모양의 MultiIndex 프레임 생성
+
+    - 컬럼: (Ticker, Price) MultiIndex
+    - nan_ratio: 개별 값이 NaN 인 비율
+    - missing_ratio: 전 기간이 NaN 인 (받아오지 못한) 티커 비율
+    """
+    rng = np.random.default_rng(seed)
+    tickers = make_tickers(n_tickers)
+    dates = pd.bdate_range(start, periods=n_days, name="Date")
+
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_days, n_tickers)), axis=0))
+    spread = np.abs(rng.normal(0, 0.01, (n_days, n_tickers))) * close
+    fields = {
+        "Open": close + rng.normal(0, 0.5, (n_days, n_tickers)),
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(1_000, 10_000_000, (n_days, n_tickers)).astype("float64"),
+    }
+
+    cube = np.stack([fields[f] for f in PRICE_FIELDS], axis=2)
+    cube[rng.random(cube.shape) < nan_ratio] = np.nan
+    cube[:, rng.random(n_tickers) < missing_ratio, :] = np.nan
+
+    columns = pd.MultiIndex.from_product([tickers, PRICE_FIELDS], names=["Ticker", "Price"])
+    frame = pd.DataFrame(cube.reshape(n_days, n_tickers * len(PRICE_FIELDS)), index=dates, columns=columns)
+    return frame, tickers
+
+
+class SyntheticSource:
+    """🧪 오프라인 테스트용 데이터 소스 (downloader.YFinanceSource 대체)
+
+    - 요청한 티커/기간에 대해 make_download_frame 과 같은 모양의 프레임 반환
+    - fail_tickers 가 포함된 요청은 티커마다 fail_times 번까지 예외 발생 (청크 재시도 확인용)
+    - silent=True 면 예외 대신 yf.download 처럼 fail_tickers 컬럼을 전부 NaN 으로 돌려주고
+      YFinanceSource 와 같이 inspect_download 로 검사함
+    - latency 초만큼 지연시켜 네트워크 대기를 흉내냄
+    """
+
+    def __init__(self, nan_ratio=0.0, latency=0.0, fail_tickers=(), fail_times=1, seed=0, silent=False):
+        self.nan_ratio = nan_ratio
+        self.latency = latency
+        self.fail_tickers = set(fail_tickers)
+        self.fail_times = fail_times
+        self.silent = silent
+        self.seed = seed
+        self.calls = []
+        self._failures = {}
+
+    def download(self, tickers, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        if self.latency:
+            time.sleep(self.latency)
+
+        failed = sorted(ticker for ticker in self.fail_tickers.intersection(tickers)
+                        if self._failures.get(ticker, 0) < self.fail_times)
+        if failed:
+            for ticker in failed:
+                self._failures[ticker] = self._failures.get(ticker, 0) + 1
+            if not self.silent:
+                raise RuntimeError(f"synthetic failure for {failed}")
+
+        dates = pd.bdate_range(start, end, inclusive="left", name="Date")
+        if len(dates) == 0:
+            frame = pd.DataFrame()
+        else:
+            frame, _ = make_download_frame(len(tickers), len(dates), self.nan_ratio, 0.0,
+                                           start=dates[0], seed=self.seed)
+            frame.columns = pd.MultiIndex.from_product([list(tickers), PRICE_FIELDS], names=["Ticker", "Price"])
+            frame.index = dates
+            frame.loc[:, failed] = np.nan
+        return inspect_download(frame, tickers) if self.silent else frame
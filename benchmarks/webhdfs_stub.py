@@ -0,0 +1,212 @@
+"""로컬 디렉터리를 WebHDFS REST API 처럼 보여주는 벤치마크용 서버
+
+hdfs.InsecureClient 가 쓰는 연산만 구현한다:
+OPEN(offset/length), CREATE(리다이렉트 + chunked 업로드), GETFILESTATUS, LISTSTATUS, MKDIRS, RENAME, DELETE
+네트워크 지연은 --latency (초) 로 요청마다 흉내낼 수 있다.
+
+    python benchmarks/webhdfs_stub.py --root /tmp/hdfs_root --port 50070
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PREFIX = "/webhdfs/v1"
+BLOCK = 1 << 20
+
+
+def _status(path, name=""):
+    stat = os.stat(path)
+    return {
+        "pathSuffix": name,
+        "type": "DIRECTORY" if os.path.isdir(path) else "FILE",
+        "length": 0 if os.path.isdir(path) else stat.st_size,
+        "modificationTime": int(stat.st_mtime * 1000),
+        "accessTime": int(stat.st_atime * 1000),
+        "blockSize": 134217728,
+        "replication": 1,
+        "owner": "bench",
+        "group": "bench",
+        "permission": "755",
+    }
+
+
+class WebHdfsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # 헤더 / 본문 write 사이의 delayed-ACK 지연(~40ms) 방지
+    root = "."
+    latency = 0.0
+    counts = None
+
+    def log_message(self, *args):
+        pass
+
+    # ---- helpers ----
+    def _parse(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        hdfs_path = url.path[len(PREFIX):] or "/"
+        local = os.path.join(self.root, hdfs_path.lstrip("/"))
+        op = params.get("op", "").upper()
+        if self.counts is not None:
+            self.counts[op] = self.counts.get(op, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        return op, params, hdfs_path, local
+
+    def _json(self, payload, code=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self, hdfs_path):
+        self._json({"RemoteException": {"exception": "FileNotFoundException",
+                                        "javaClassName": "java.io.FileNotFoundException",
+                                        "message": f"File does not exist: {hdfs_path}"}}, 404)
+
+    def _read_body(self):
+        """Content-Length / chunked 요청 본문을 조각 단위로 생성"""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                remaining = size
+                while remaining:
+                    data = self.rfile.read(min(remaining, BLOCK))
+                    remaining -= len(data)
+                    yield data
+                self.rfile.readline()
+        else:
+            remaining = int(self.headers.get("Content-Length") or 0)
+            while remaining:
+                data = self.rfile.read(min(remaining, BLOCK))
+                if not data:
+                    return
+                remaining -= len(data)
+                yield data
+
+    # ---- verbs ----
+    def do_GET(self):
+        op, params, hdfs_path, local = self._parse()
+        if not os.path.exists(local):
+            return self._not_found(hdfs_path)
+        if op == "GETFILESTATUS":
+            return self._json({"FileStatus": _status(local)})
+        if op == "LISTSTATUS":
+            if os.path.isdir(local):
+                entries = [_status(os.path.join(local, n), n) for n in sorted(os.listdir(local))]
+            else:
+                entries = [_status(local)]
+            return self._json({"FileStatuses": {"FileStatus": entries}})
+        if op == "OPEN":
+            size = os.path.getsize(local)
+            offset = int(params.get("offset", 0))
+            length = min(int(params.get("length", size - offset)), max(0, size - offset))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(length))
+            self.end_headers()
+            with open(local, "rb") as f:
+                f.seek(offset)
+                while length:
+                    data = f.read(min(length, BLOCK))
+                    if not data:
+                        break
+                    self.wfile.write(data)
+                    length -= len(data)
+            return
+        self._json({"RemoteException": {"exception": "UnsupportedOperationException",
+                                        "message": op}}, 400)
+
+    def do_PUT(self):
+        op, params, hdfs_path, local = self._parse()
+        if op == "CREATE":
+            if "datanode" not in params:
+                # 실제 WebHDFS 처럼 namenode 가 datanode 주소로 리다이렉트
+                for _ in self._read_body():
+                    pass
+                self.send_response(307)
+                self.send_header("Location", f"http://{self.headers['Host']}{self.path}&datanode=true")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if os.path.exists(local) and params.get("overwrite", "false").lower() != "true":
+                return self._json({"RemoteException": {"exception": "FileAlreadyExistsException",
+                                                        "message": hdfs_path}}, 403)
+            os.makedirs(os.path.dirname(local), exist_ok=True)
+            tmp = f"{local}.__uploading__.{threading.get_ident()}"
+            with open(tmp, "wb") as f:
+                for data in self._read_body():
+                    f.write(data)
+            os.replace(tmp, local)
+            self.send_response(201)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        for _ in self._read_body():
+            pass
+        if op == "MKDIRS":
+            os.makedirs(local, exist_ok=True)
+            return self._json({"boolean": True})
+        if op == "RENAME":
+            destination = os.path.join(self.root, params["destination"].lstrip("/"))
+            if (not os.path.exists(local) or os.path.exists(destination)
+                    or not os.path.isdir(os.path.dirname(destination))):
+                return self._json({"boolean": False})
+            os.rename(local, destination)
+            return self._json({"boolean": True})
+        self._json({"RemoteException": {"exception": "UnsupportedOperationException",
+                                        "message": op}}, 400)
+
+    def do_DELETE(self):
+        op, params, hdfs_path, local = self._parse()
+        if not os.path.exists(local):
+            return self._json({"boolean": False})
+        if os.path.isdir(local):
+            if params.get("recursive", "false").lower() == "true":
+                shutil.rmtree(local)
+            else:
+                try:
+                    os.rmdir(local)
+                except OSError:
+                    return self._json({"RemoteException": {"exception": "PathIsNotEmptyDirectoryException",
+                                                            "message": hdfs_path}}, 403)
+        else:
+            os.remove(local)
+        self._json({"boolean": True})
+
+
+def start_server(root, port=0, latency=0.0):
+    """백그라운드 스레드로 서버 시작. 반환값: (server, url, 연산별 요청 수 dict)"""
+    counts = {}
+    handler = type("Handler", (WebHdfsHandler,), {"root": root, "latency": latency, "counts": counts})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벤치마크용 WebHDFS 서버")
+    parser.add_argument("--root", required=True)
+    parser.add_argument("--port", type=int, default=50070)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url, _ = start_server(args.root, args.port, args.latency)
+    print(f"[INFO] WebHDFS stub: {url} → {args.root}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
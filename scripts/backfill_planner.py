@@ -0,0 +1,70 @@
+import numpy as np
+
+from trading_calendar import get_trading_calendar
+
+
+# (티커, 거래일) 한 칸을 수집할 때 드는 최대 메모리 추정치 (바이트)
+# 청크 프레임 + 합친 MultiIndex 프레임 + reshape 배열 + long 프레임 + 파일 버퍼가 동시에 살아 있는 시점 기준
+# (tracemalloc 측정값 parquet ~200B / csv ~300B 에 할당자 / 파편화 여유를 더함)
+DEFAULT_BYTES_PER_CELL = 512
+
+
+def plan_tiles(ranges, memory_budget, calendar=None, bytes_per_cell=DEFAULT_BYTES_PER_CELL, max_sessions=None):
+    """🧮 수집 구간을 메모리 예산에 맞는 타일(연속된 거래일 window) 목록으로 나눔
+
+    ranges: {(from_date, to_date): [tickers]} (plan_incremental_ranges 결과 또는 전체 구간 하나)
+    memory_budget: 타일 하나를 처리할 때 쓸 최대 메모리 (바이트)
+    max_sessions: 타일 하나의 최대 거래일 수 (--window-sessions)
+    반환값: [{(from_date, to_date): [tickers]}] — 타일마다 그 window 와 겹치는 구간만 잘라서 담음
+
+    - 거래일마다 (그날을 포함하는 구간의 티커 수) 칸이 필요하다고 보고, 칸 합계 × bytes_per_cell 이
+      예산을 넘기 전에 window 를 끊는다. 타일 수는 구간 길이에 비례하고 타일 하나의 크기는 일정하다.
+    - 날짜별 파일(ALL_DATA_YYYY_MM_DD)은 그날의 모든 티커를 담으므로, 같은 날짜는 항상 한 타일에 둔다
+      (티커 방향은 ChunkedDownloader 의 청크로 요청 크기가 제한됨)
+    - 거래일 하나만으로도 예산을 넘으면 거래일 하나씩 나누고 경고
+    """
+    calendar = calendar or get_trading_calendar()
+    ranges = {window: list(tickers) for window, tickers in ranges.items() if tickers}
+    if not ranges:
+        return []
+
+    # 거래일별 필요한 칸 수 (그날을 포함하는 구간들의 티커 수 합)
+    sessions = [calendar.sessions_in_range(range_from, range_to) for range_from, range_to in ranges]
+    days = np.unique(np.concatenate(sessions))
+    cells = np.zeros(len(days), dtype="int64")
+    for range_sessions, tickers in zip(sessions, ranges.values()):
+        cells[np.searchsorted(days, range_sessions)] += len(tickers)
+
+    budget_cells = max(1, int(memory_budget // bytes_per_cell))
+    if cells.max(initial=0) > budget_cells:
+        print(f"[WARN] 거래일 하나({cells.max():,} 칸, ~{cells.max() * bytes_per_cell / 1024 ** 2:.0f}MB)가 "
+              f"메모리 예산 {memory_budget / 1024 ** 2:.0f}MB 보다 큼: 거래일 하나씩 수집합니다")
+
+    # 칸 수 누적합이 예산을 넘기 직전(또는 max_sessions)에서 window 를 끊음
+    total = np.concatenate(([0], np.cumsum(cells)))
+    windows = []
+    start = 0
+    while start < len(days):
+        end = max(start + 1, int(np.searchsorted(total, total[start] + budget_cells, side="right")) - 1)
+        if max_sessions:
+            end = min(end, start + max_sessions)
+        windows.append((days[start], days[end - 1]))
+        start = end
+
+    tiles = []
+    for first, last in windows:
+        tile = {}
+        for range_from, range_to in ranges:
+            clipped = calendar.trim_range(max(np.datetime64(range_from), first),
+                                          min(np.datetime64(range_to), last + np.timedelta64(1, "D")))
+            if clipped is not None:
+                tile[clipped] = ranges[(range_from, range_to)]
+        tiles.append(tile)
+    return tiles
+
+
+def tile_cells(tile, calendar=None):
+    """타일 하나의 (티커, 거래일) 칸 수"""
+    calendar = calendar or get_trading_calendar()
+    return sum(len(tickers) * calendar.count_sessions(range_from, range_to)
+               for (range_from, range_to), tickers in tile.items())
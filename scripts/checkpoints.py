@@ -0,0 +1,161 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+
+# journal.log 한 줄의 종류
+DOWNLOADED = "downloaded"  # downloaded \t {구간} \t {청크 번호}
+PERSISTED = "persisted"    # persisted  \t {날짜}
+FINISHED = "finished"      # finished   \t {window}
+
+
+def new_run_id():
+    """시작 시각 + 임의 접미사 (예: 20250305_071502_3f9a1c)"""
+    return f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}"
+
+
+def range_key(range_from, range_to):
+    return f"{range_from}~{range_to}"
+
+
+def window_bounds(ranges):
+    """{(from_date, to_date): [tickers]} → 전체 (from_date, to_date)"""
+    return min(r_from for r_from, _ in ranges), max(r_to for _, r_to in ranges)
+
+
+class RunCheckpoint:
+    """💾 수집 run 하나의 체크포인트 (--resume RUN_ID 로 끝나지 않은 단위만 다시 처리)
+
+    {root}/{run_id}/run.json    : 수집 계획 (window 별 구간 / 티커 목록, chunk_size, 저장 형식 등)
+    {root}/{run_id}/journal.log : 끝난 단위를 한 줄씩 append + fsync (중간에 죽어도 기록한 줄까지는 남음)
+      - downloaded: (구간, 티커 청크) 를 받았고 프레임을 chunks/ 에 저장함
+      - persisted : 그날 파일 저장 / DB 적재까지 끝남 (모든 청크를 받은 window 에서만 기록)
+      - finished  : window 의 모든 날짜가 끝남 (다시 실행할 때 window 통째로 건너뜀)
+    {root}/{run_id}/chunks/     : 받은 청크 (yf.download 모양의 MultiIndex 프레임, Parquet)
+
+    청크 번호는 ChunkedDownloader.make_chunks 순서이므로 다시 실행할 때도 같은 chunk_size 를 써야 한다.
+    """
+
+    def __init__(self, root, run_id, plan):
+        self.run_id = run_id
+        self.path = os.path.join(root, run_id)
+        self.plan = plan
+        self.downloaded = set()
+        self.persisted = set()
+        self.finished = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, root, plan, run_id=None):
+        """새 run 시작: 계획을 run.json 에 저장"""
+        run_id = run_id or new_run_id()
+        checkpoint = cls(root, run_id, dict(plan, run_id=run_id, created=datetime.now().isoformat()))
+        os.makedirs(os.path.join(checkpoint.path, "chunks"), exist_ok=True)
+        tmp_path = os.path.join(checkpoint.path, "run.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint.plan, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(checkpoint.path, "run.json"))
+        return checkpoint
+
+    @classmethod
+    def load(cls, root, run_id):
+        """기존 run 이어서 실행: run.json + journal.log 다시 읽기"""
+        with open(os.path.join(root, run_id, "run.json")) as f:
+            checkpoint = cls(root, run_id, json.load(f))
+        os.makedirs(os.path.join(checkpoint.path, "chunks"), exist_ok=True)
+        checkpoint._replay()
+        return checkpoint
+
+    def _replay(self):
+        journal = os.path.join(self.path, "journal.log")
+        if not os.path.exists(journal):
+            return
+        with open(journal) as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # 쓰다가 죽은 마지막 줄
+                fields = line.rstrip("\n").split("\t")
+                if fields[0] == DOWNLOADED and len(fields) == 3:
+                    self.downloaded.add((fields[1], int(fields[2])))
+                elif fields[0] == PERSISTED and len(fields) == 2:
+                    self.persisted.add(fields[1])
+                elif fields[0] == FINISHED and len(fields) == 2:
+                    self.finished.add(fields[1])
+
+    def _append(self, lines):
+        with self._lock:
+            with open(os.path.join(self.path, "journal.log"), "a") as f:
+                f.writelines("\t".join(map(str, fields)) + "\n" for fields in lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def windows(self):
+        """계획된 window 목록 → [{(from_date, to_date): [tickers]}]"""
+        return [{(r_from, r_to): tickers for r_from, r_to, tickers in ranges} for ranges in self.plan["windows"]]
+
+    def _chunk_path(self, key, index):
+        return os.path.join(self.path, "chunks", f"{key}_{index}.parquet")
+
+    def save_chunk(self, range_from, range_to, result):
+        """downloader 의 on_result: 성공한 청크를 저장하고 journal 에 기록 (워커 스레드에서 호출)"""
+        if result.status != "SUCCESS":
+            return
+        key = range_key(range_from, range_to)
+        if result.frame is not None and not result.frame.empty:
+            path = self._chunk_path(key, result.index)
+            result.frame.to_parquet(path + ".tmp")
+            os.replace(path + ".tmp", path)
+        self._append([(DOWNLOADED, key, result.index)])
+        with self._lock:
+            self.downloaded.add((key, result.index))
+
+    def download(self, downloader, tickers, range_from, range_to):
+        """📥 downloader.download 와 같지만 이미 받은 청크는 디스크에서 읽고, 새로 받은 청크는 저장
+
+        반환값: (stock_data, chunk_results) — chunk_results 에는 이번에 받은 청크만 들어 있음
+        """
+        key = range_key(range_from, range_to)
+        done = {index for k, index in self.downloaded if k == key}
+        stock_data, results = downloader.download(
+            tickers, range_from, range_to, skip=done,
+            on_result=lambda result: self.save_chunk(range_from, range_to, result))
+
+        saved = [pd.read_parquet(self._chunk_path(key, index)) for index in sorted(done)
+                 if os.path.exists(self._chunk_path(key, index))]
+        if saved:
+            print(f"[INFO] 체크포인트에서 {key} 청크 {len(done)}개 불러옴")
+            frames = ([stock_data] if not stock_data.empty else []) + saved
+            stock_data = frames[0] if len(frames) == 1 else pd.concat(frames, axis=1).sort_index()
+        return stock_data, results
+
+    def mark_persisted(self, dates):
+        """날짜(Timestamp / 'YYYY-MM-DD')들의 저장 / 적재가 끝났음을 기록"""
+        days = [pd.Timestamp(d).strftime("%Y-%m-%d") for d in dates]
+        if days:
+            self._append([(PERSISTED, day) for day in days])
+            self.persisted.update(days)
+
+    def is_persisted(self, date):
+        return pd.Timestamp(date).strftime("%Y-%m-%d") in self.persisted
+
+    def mark_finished(self, range_from, range_to):
+        key = range_key(range_from, range_to)
+        self._append([(FINISHED, key)])
+        self.finished.add(key)
+
+    def is_finished(self, range_from, range_to):
+        return range_key(range_from, range_to) in self.finished
+
+    def close(self):
+        """모든 window 가 끝났으면 받아 둔 청크를 지우고 True, 아니면 False"""
+        done = all(self.is_finished(*window_bounds(ranges)) for ranges in self.windows())
+        if done:
+            shutil.rmtree(os.path.join(self.path, "chunks"), ignore_errors=True)
+        return done
@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import zlib
+from datetime import datetime
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from data_files import ManifestEntry, parse_data_file_name
+from parquet_io import iter_parquet_bytes, read_parquet_frame
+from pg_load import iter_frame_csv
+from stock_frame import OUTPUT_COLUMNS
+from storage import LocalStorage, HdfsStorage
+from work_queue import CLAIMED, DEFAULT_WORK_QUEUE_DB, PENDING, QUEUE_HDFS, QUEUE_LOCAL, WorkQueue
+
+
+# .env 파일 로드
+load_dotenv()
+
+CSV_DIR = os.getenv("CSV_DIR")
+HDFS_URL = os.getenv("HDFS_URL")
+HDFS_USER = os.getenv("HDFS_USER")
+HDFS_DIR = os.getenv("HDFS_DIR")
+WORK_QUEUE_DB = os.getenv("WORK_QUEUE_DB") or DEFAULT_WORK_QUEUE_DB
+
+COMPACTED_DIR = "compacted"
+STAGING_PREFIX = "_compacting_"
+RETIRED_PREFIX = "_compacted_old_"
+SUCCESS_FILE = "_SUCCESS"
+
+
+def ticker_bucket(ticker, n_buckets):
+    """티커 → 버킷 번호 (실행마다 같은 값이 나오도록 crc32 사용)"""
+    return zlib.crc32(ticker.encode("utf-8")) % n_buckets
+
+
+def _read_frame(storage, path):
+    if path.endswith(".parquet"):
+        return read_parquet_frame(storage.read_bytes(path))
+    with storage.open_read(path, encoding="utf-8") as reader:
+        return pd.read_csv(reader)
+
+
+def _frame_chunks(frame, fmt):
+    if fmt == "parquet":
+        return iter_parquet_bytes(frame)
+    return iter_frame_csv(frame)
+
+
+def list_month_dirs(storage, root):
+    """root 아래의 YYYY/MM 디렉터리 목록 → [(YYYY, MM)]"""
+    months = []
+    for year, year_status in storage.list(root):
+        if year_status["type"] != "DIRECTORY" or not (year.isdigit() and len(year) == 4):
+            continue
+        for month, month_status in storage.list(storage.join(root, year)):
+            if month_status["type"] == "DIRECTORY" and month.isdigit() and len(month) == 2:
+                months.append((year, month))
+    return months
+
+
+def list_daily_ticker_files(storage, month_dir):
+    """월 디렉터리 아래 DD/TICKER_DATA_*.csv 목록 → [(경로, 티커)]"""
+    files = []
+    for day, day_status in storage.list(month_dir):
+        if day_status["type"] != "DIRECTORY" or not day.isdigit():
+            continue
+        day_dir = storage.join(month_dir, day)
+        for name, status in storage.list(day_dir):
+            parsed = parse_data_file_name(name)
+            if status["type"] == "FILE" and parsed and parsed[0] is not None:
+                files.append((storage.join(day_dir, name), parsed[0]))
+    return files
+
+
+def recover_month(storage, month_dir):
+    """이전 실행이 중간에 끊긴 흔적 정리 (staging 삭제 / 교체 중이던 결과 복구)"""
+    entries = dict(storage.list(month_dir))
+    for name in list(entries):
+        if name.startswith(STAGING_PREFIX):
+            storage.delete(storage.join(month_dir, name), recursive=True)
+        elif name.startswith(RETIRED_PREFIX):
+            retired = storage.join(month_dir, name)
+            if COMPACTED_DIR in entries:
+                storage.delete(retired, recursive=True)
+            else:
+                storage.rename(retired, storage.join(month_dir, COMPACTED_DIR))
+                entries[COMPACTED_DIR] = entries[name]
+
+
+def compact_month(storage, root, year, month, n_buckets=4, fmt="csv", dry_run=False, work_queue=None):
+    """🗜️ 한 달 치 티커별 일간 파일을 버킷 파일 몇 개로 합침
+
+    1. 일간 파일 + 기존 compacted 파일을 읽어 (ticker, date) 기준 중복 제거
+    2. _compacting_* 디렉터리에 버킷별 파일 작성 후 다시 읽어 행 수 검증
+    3. 기존 compacted 를 치우고 rename 으로 교체, 그 뒤에 원본 일간 파일 삭제
+    work_queue(WorkQueue) 를 주면 로더와 맞춤:
+    - 일간 파일 중 대기 중 / 적재 중인 것이 있으면 그 달은 건너뜀 (QUEUED)
+    - 삭제 직전에 다시 확인해서 그사이 다시 등록된 파일은 남겨 둠 (다음 압축 때 합쳐짐)
+    - dead 였던 일간 파일은 superseded 로 바꾸고 합친 버킷 파일을 대신 등록
+    반환값: 결과 요약 dict
+    """
+    month_dir = storage.join(root, year, month)
+    recover_month(storage, month_dir)
+
+    daily_files = list_daily_ticker_files(storage, month_dir)
+    if not daily_files:
+        return {"month": f"{year}_{month}", "status": "SKIP", "files": 0}
+    if work_queue is not None:
+        states = work_queue.path_states([path for path, _ in daily_files])
+        queued = sum(1 for state in states.values() if state in (PENDING, CLAIMED))
+        if queued:
+            return {"month": f"{year}_{month}", "status": "QUEUED", "files": len(daily_files), "queued": queued}
+
+    compacted_dir = storage.join(month_dir, COMPACTED_DIR)
+    previous = []
+    if storage.exists(compacted_dir):
+        previous = [storage.join(compacted_dir, name) for name, status in storage.list(compacted_dir)
+                    if status["type"] == "FILE" and name != SUCCESS_FILE]
+
+    frames = [_read_frame(storage, path) for path in previous]
+    frames += [_read_frame(storage, path) for path, _ in daily_files]
+    input_rows = sum(len(f) for f in frames)
+
+    merged = pd.concat(frames, ignore_index=True)[OUTPUT_COLUMNS]
+    merged["Date"] = pd.to_datetime(merged["Date"])
+    # 같은 (ticker, date) 가 여러 번 있으면 나중에 받은 일간 파일 값을 사용
+    merged = merged.drop_duplicates(["Ticker", "Date"], keep="last")
+    merged = merged.sort_values(["Ticker", "Date"], ignore_index=True)
+    buckets = merged["Ticker"].map(lambda t: ticker_bucket(t, n_buckets))
+
+    summary = {
+        "month": f"{year}_{month}",
+        "files": len(daily_files),
+        "previous_files": len(previous),
+        "input_rows": input_rows,
+        "rows": len(merged),
+        "buckets": int(buckets.nunique()),
+    }
+    if dry_run:
+        summary["status"] = "DRY_RUN"
+        return summary
+
+    # 1) staging 디렉터리에 버킷 파일 작성
+    stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    staging_dir = storage.join(month_dir, f"{STAGING_PREFIX}{stamp}")
+    storage.makedirs(staging_dir)
+    written, bucket_rows = [], []
+    for bucket, frame in merged.groupby(buckets, sort=True):
+        path = storage.join(staging_dir, f"TICKER_BUCKET_{bucket:02d}_{year}_{month}.{fmt}")
+        storage.write_chunks(path, _frame_chunks(frame, fmt))
+        written.append(path)
+        bucket_rows.append(len(frame))
+
+    # 2) 다시 읽어서 행 수 검증 (실패하면 원본은 그대로 두고 중단)
+    output_rows = sum(len(_read_frame(storage, path)) for path in written)
+    if output_rows != len(merged):
+        storage.delete(staging_dir, recursive=True)
+        raise RuntimeError(f"{year}_{month} 행 수 불일치: 입력 {len(merged)} / 출력 {output_rows}")
+    storage.write_bytes(storage.join(staging_dir, SUCCESS_FILE),
+                        json.dumps(summary, ensure_ascii=False).encode("utf-8"))
+
+    # 3) rename 으로 교체 후 원본 삭제
+    retired_dir = None
+    if storage.exists(compacted_dir):
+        retired_dir = storage.join(month_dir, f"{RETIRED_PREFIX}{stamp}")
+        storage.rename(compacted_dir, retired_dir)
+    storage.rename(staging_dir, compacted_dir)
+    if retired_dir:
+        storage.delete(retired_dir, recursive=True)
+
+    keep = set()
+    if work_queue is not None:
+        keep, dead = work_queue.retire_paths([path for path, _ in daily_files])
+        if dead:
+            # 적재되지 못한 일간 파일의 행은 이제 버킷 파일에만 있음
+            work_queue.enqueue([ManifestEntry(storage.join(compacted_dir, os.path.basename(path)), rows=rows)
+                                for path, rows in zip(written, bucket_rows)])
+            summary["requeued"] = len(written)
+        if keep:
+            summary["kept"] = len(keep)
+
+    day_dirs = set()
+    for path, _ in daily_files:
+        if path in keep:
+            continue
+        storage.delete(path)
+        day_dirs.add(path.rsplit("/", 1)[0])
+    for day_dir in day_dirs:
+        if not storage.list(day_dir):
+            storage.delete(day_dir)
+
+    summary["status"] = "SUCCESS"
+    return summary
+
+
+def closed_months(months, today=None):
+    """이번 달 이전(이미 끝난) 달만 선택"""
+    today = today or datetime.now()
+    current = (f"{today.year:04d}", f"{today.month:02d}")
+    return [m for m in months if m < current]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="티커별 일간 CSV 파일을 월 단위로 합치는 스크립트")
+    parser.add_argument("months", nargs="*", help="대상 월 (YYYY_MM). 생략하면 끝난 달 전체")
+    parser.add_argument("--hdfs", action="store_true", help="HDFS_DIR 대상 (기본: CSV_DIR)")
+    parser.add_argument("--buckets", type=int, default=4, help="월별 티커 버킷 파일 수")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="합친 파일 형식")
+    parser.add_argument("--dry-run", action="store_true", help="파일을 쓰지 않고 대상만 확인")
+    args = parser.parse_args()
+
+    if args.hdfs:
+        from hdfs import InsecureClient
+
+        storage, root = HdfsStorage(InsecureClient(HDFS_URL, user=HDFS_USER)), HDFS_DIR
+    else:
+        storage, root = LocalStorage(), CSV_DIR
+    # fetcher 가 같은 경로를 등록한 큐 (로더가 아직 읽을 파일은 지우지 않음)
+    work_queue = None if args.dry_run else WorkQueue(WORK_QUEUE_DB, QUEUE_HDFS if args.hdfs else QUEUE_LOCAL)
+
+    if args.months:
+        targets = [tuple(m.split("_")) for m in args.months]
+    else:
+        targets = closed_months(list_month_dirs(storage, root))
+
+    for year, month in targets:
+        try:
+            result = compact_month(storage, root, year, month, args.buckets, args.format, args.dry_run, work_queue)
+            print(f"[INFO] {result}")
+        except Exception as e:
+            print(f"[ERROR] {year}_{month} 압축 실패: {e}")
+    if work_queue is not None:
+        work_queue.close()
@@ -0,0 +1,164 @@
+COMPACT_PRICE_TYPES = ("fixed", "float")
+
+# fixed: 가격 × 10^4 를 BIGINT 로 저장 (소수점 4자리까지 정확), float: DOUBLE PRECISION (유효숫자 15자리)
+PRICE_SCALE = 10_000
+PRICE_COLUMN_TYPES = {"fixed": "BIGINT", "float": "DOUBLE PRECISION"}
+PRICE_COLUMNS = ("open", "high", "low", "close")
+
+# compact 스키마
+# - stock_tickers: 티커 문자열은 여기 한 번만 저장하고 가격 행은 4바이트 ticker_id 로 참조
+# - stock_prices : id(BIGSERIAL) 없이 (ticker_id, date) 가 PK. 4바이트 컬럼 두 개 뒤에 8바이트 컬럼만 두어 패딩 없음
+#   (적재는 항상 stock_tickers 와 조인해서 ticker_id 를 얻으므로 FK 는 두지 않음)
+# - stock_data   : 기존 컬럼 이름 / 타입(NUMERIC)을 그대로 보여주는 뷰 (검색 앱 / 조회 쿼리는 그대로 동작)
+COMPACT_TICKERS_DDL = """
+    CREATE TABLE IF NOT EXISTS stock_tickers (
+        ticker_id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        ticker TEXT NOT NULL UNIQUE
+    );
+"""
+
+COMPACT_PRICES_DDL = """
+    CREATE TABLE IF NOT EXISTS stock_prices (
+        ticker_id INT NOT NULL,
+        date DATE NOT NULL,
+        open {price},
+        high {price},
+        low {price},
+        close {price},
+        volume BIGINT
+    );
+"""
+
+COMPACT_CONSTRAINTS_DDL = """
+    ALTER TABLE stock_prices ADD PRIMARY KEY (ticker_id, date);
+    CREATE INDEX IF NOT EXISTS stock_prices_date_brin ON stock_prices USING brin (date) WITH (pages_per_range = 32);
+"""
+
+# id 는 (ticker_id, date) 로 만든 고유 값 (JPA 엔티티의 @Id 용, 1900-01-01 부터 2^20 일 ≈ 2870년까지)
+COMPACT_VIEW_DDL = """
+    CREATE OR REPLACE VIEW stock_data AS
+    SELECT (p.ticker_id::bigint << 20) + (p.date - DATE '1900-01-01') AS id,
+           t.ticker, p.date, {prices}, p.volume
+    FROM stock_prices p JOIN stock_tickers t ON t.ticker_id = p.ticker_id;
+"""
+
+# 새 티커만 등록 (이미 있는 티커는 IDENTITY 값을 쓰지 않도록 먼저 거름)
+COMPACT_TICKERS_SQL = """
+    INSERT INTO stock_tickers (ticker)
+    SELECT DISTINCT s.ticker FROM {table} s
+    WHERE NOT EXISTS (SELECT 1 FROM stock_tickers t WHERE t.ticker = s.ticker)
+    ON CONFLICT (ticker) DO NOTHING;
+"""
+
+COMPACT_MERGE_SQL = """
+    INSERT INTO stock_prices (ticker_id, date, open, high, low, close, volume)
+    SELECT {distinct}t.ticker_id, s.date, {values}, s.volume
+    FROM {table} s JOIN stock_tickers t ON t.ticker = s.ticker
+    {order}
+    ON CONFLICT (ticker_id, date) DO NOTHING;
+"""
+
+# pg_load.UPSERT_SQL 과 같은 방식 (바뀐 행만 UPDATE, 없는 행만 INSERT), 비교는 저장 형식으로 바꾼 값끼리
+COMPACT_UPSERT_SQL = """
+    WITH source AS MATERIALIZED (
+        SELECT DISTINCT ON (t.ticker_id, s.date) t.ticker_id, s.date, {values}, s.volume
+        FROM {table} s JOIN stock_tickers t ON t.ticker = s.ticker
+        ORDER BY t.ticker_id, s.date{order}
+    ),
+    updated AS (
+        UPDATE stock_prices p
+        SET open = src.open, high = src.high, low = src.low, close = src.close, volume = src.volume
+        FROM source src
+        WHERE p.ticker_id = src.ticker_id AND p.date = src.date
+          AND (p.open, p.high, p.low, p.close, p.volume)
+              IS DISTINCT FROM (src.open, src.high, src.low, src.close, src.volume)
+        RETURNING 1
+    ),
+    inserted AS (
+        INSERT INTO stock_prices (ticker_id, date, open, high, low, close, volume)
+        SELECT ticker_id, date, open, high, low, close, volume FROM source
+        ON CONFLICT (ticker_id, date) DO NOTHING
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM inserted), (SELECT count(*) FROM updated), (SELECT count(*) FROM source);
+"""
+
+
+def encode_prices(price_type, alias="s"):
+    """staging 가격 컬럼(NUMERIC 또는 DOUBLE PRECISION) → 저장 형식 SELECT 목록"""
+    if price_type == "fixed":
+        return ", ".join(f"round({alias}.{c} * {PRICE_SCALE})::bigint AS {c}" for c in PRICE_COLUMNS)
+    return ", ".join(f"{alias}.{c}::float8 AS {c}" for c in PRICE_COLUMNS)
+
+
+def decode_prices(price_type, alias="p"):
+    """저장 형식 → 기존 stock_data 와 같은 NUMERIC 컬럼 (fixed 는 뒤쪽 0 을 지워서 123.4500 이 아니라 123.45)"""
+    if price_type == "fixed":
+        return ", ".join(f"trim_scale({alias}.{c} * {1 / PRICE_SCALE}) AS {c}" for c in PRICE_COLUMNS)
+    return ", ".join(f"{alias}.{c}::numeric AS {c}" for c in PRICE_COLUMNS)
+
+
+def create_compact_schema(cur, price_type, constraints=True):
+    """🗜️ stock_tickers / stock_prices 생성 + stock_data 뷰
+
+    constraints=False 면 stock_prices 의 PK / BRIN 과 뷰는 만들지 않음 (대량 복사 후에 따로)
+    """
+    if price_type not in COMPACT_PRICE_TYPES:
+        raise ValueError(f"compact 가격 형식은 {COMPACT_PRICE_TYPES} 중 하나여야 함: {price_type}")
+    cur.execute(COMPACT_TICKERS_DDL)
+    cur.execute(COMPACT_PRICES_DDL.format(price=PRICE_COLUMN_TYPES[price_type]))
+    if constraints:
+        add_compact_constraints(cur)
+        create_compact_view(cur, price_type)
+
+
+def add_compact_constraints(cur):
+    cur.execute(COMPACT_CONSTRAINTS_DDL)
+
+
+def create_compact_view(cur, price_type):
+    cur.execute(COMPACT_VIEW_DDL.format(prices=decode_prices(price_type)))
+
+
+def load_compact_layout(cur):
+    """stock_data 가 compact 스키마의 뷰면 가격 형식(fixed / float), 아니면 None"""
+    cur.execute("""
+        SELECT format_type(a.atttypid, a.atttypmod)
+        FROM pg_class c JOIN pg_attribute a ON a.attrelid = to_regclass('stock_prices') AND a.attname = 'open'
+        WHERE c.oid = to_regclass('stock_data') AND c.relkind = 'v';
+    """)
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return "fixed" if row[0] == "bigint" else "float"
+
+
+def merge_compact_stage(cur, table, price_type, merge_mode="insert", order=None):
+    """📤 staging 테이블 → stock_tickers / stock_prices 병합 (pg_load.merge_stage 의 compact 스키마 버전)
+
+    table 은 ticker, date, open ~ volume 컬럼이 있는 테이블 또는 괄호로 감싼 서브쿼리
+    반환값: (신규, 수정, 동일) 행 수. insert 모드는 (신규, 0, None)
+    """
+    values = encode_prices(price_type)
+    cur.execute(COMPACT_TICKERS_SQL.format(table=table))
+    if merge_mode == "upsert":
+        cur.execute(COMPACT_UPSERT_SQL.format(table=table, values=values, order=f", {order}" if order else ""))
+        inserted, updated, total = cur.fetchone()
+        return inserted, updated, total - inserted - updated
+    if order:
+        cur.execute(COMPACT_MERGE_SQL.format(table=table, values=values,
+                                             distinct="DISTINCT ON (t.ticker_id, s.date) ",
+                                             order=f"ORDER BY t.ticker_id, s.date, {order}"))
+    else:
+        cur.execute(COMPACT_MERGE_SQL.format(table=table, values=values, distinct="", order=""))
+    return cur.rowcount, 0, None
+
+
+def relation_sizes(cur, table):
+    """(테이블 바이트, 인덱스 바이트) — 파티션 테이블이면 모든 파티션 합계"""
+    cur.execute("""
+        SELECT sum(pg_table_size(relid)), sum(pg_indexes_size(relid))
+        FROM (SELECT relid FROM pg_partition_tree(%s::regclass) UNION SELECT %s::regclass) tree;
+    """, (table, table))
+    heap, indexes = cur.fetchone()
+    return int(heap), int(indexes)
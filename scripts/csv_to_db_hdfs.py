@@ -1,29 +1,35 @@
 import argparse
 import subprocess
-import os
-import io
-from dotenv import load_dotenv
 import psycopg2
 from hdfs import InsecureClient
-
-# .env 파일 로드
-load_dotenv()
-
-# PostgreSQL 연결 정보
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST"),
-    "port": os.getenv("DB_PORT"),
-    "dbname": os.getenv("DB_NAME"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASS"),
-}
-
-CSV_LOG_FILE = os.getenv("HDFS_CSV_LOG_DIR")  # HDFS 로그 파일 경로
-# HDFS 연결 정보 설정
-HDFS_URL = os.getenv("HDFS_URL")
-HDFS_USER = os.getenv("HDFS_USER")
-HDFS_DIR = os.getenv("HDFS_DIR")
-HDFS_CSV_LOG_DIR = os.getenv("HDFS_CSV_LOG_DIR")
+import pandas as pd
+from data_files import parse_data_file_name, select_canonical_entries
+from watermarks import HighWaterMarkIndex
+from parquet_io import read_parquet_frame
+from hdfs_stream import READ_CHUNK_SIZE, open_hdfs_copy_source, open_hdfs_range_file
+from compact_schema import COMPACT_PRICE_TYPES
+from partitions import PARTITION_GRANULARITIES, PartitionManager
+from pg_load import (
+    MERGE_MODES, TEMP_STAGE_PREFIX, StageTableGuard, create_stock_data, format_merge_counts, load_frame, load_targets,
+    merge_stage, stage_table_name, sweep_stage_tables,
+)
+from storage import HdfsStorage, PathIndex
+from settings import (
+    DB_CONFIG, HDFS_CSV_LOG_DIR, HDFS_URL, HDFS_USER, STOCK_DATA_COMPACT, STOCK_DATA_MERGE_MODE, STOCK_DATA_PARTITION_BY,
+    WORK_QUEUE_CLAIM_SIZE, WORK_QUEUE_DB, WORK_QUEUE_LEASE_SECONDS,
+)
+from work_queue import QUEUE_HDFS, WorkQueue, process_queue
+
+# 공통 설정(DB / 작업 큐 / stock_data 옵션)은 settings 에서 가져옴
+CSV_LOG_FILE = HDFS_CSV_LOG_DIR  # 예전 HDFS 매니페스트 (남아 있으면 시작할 때 작업 큐로 옮김)
+
+# 실행마다 다른 staging 테이블 (여러 로더가 동시에 돌아도 서로의 데이터를 섞거나 지우지 않도록)
+# 쓰는 동안 StageTableGuard 로 lock 을 잡아 두고, 죽은 로더가 남긴 테이블은 시작할 때 sweep_stage_tables 로 정리
+TEMP_TABLE = stage_table_name(TEMP_STAGE_PREFIX)
+_temp_table_guard = None
+
+# stock_data 가 파티션 테이블이면 병합 전에 필요한 파티션을 만듦 (단일 테이블이면 아무 일도 안 함)
+partition_manager = PartitionManager(DB_CONFIG, STOCK_DATA_PARTITION_BY)
 
 client = InsecureClient(HDFS_URL, user=HDFS_USER)
 
@@ -33,30 +39,21 @@ def create_stock_data_table():
     """📊 stock_data 테이블 생성 (없으면 생성)"""
     try:
         with psycopg2.connect(**DB_CONFIG) as conn, conn.cursor() as cur:
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS stock_data (
-                    id BIGSERIAL PRIMARY KEY,
-                    ticker TEXT NOT NULL,
-                    date DATE NOT NULL,
-                    open NUMERIC,
-                    high NUMERIC,
-                    low NUMERIC,
-                    close NUMERIC,
-                    volume BIGINT,
-                    UNIQUE (ticker, date)
-                );
-            """)
+            create_stock_data(cur, STOCK_DATA_PARTITION_BY, STOCK_DATA_COMPACT)
             conn.commit()
     except Exception as e:
         print(f"❌ 테이블 생성 오류: {e}")
 
 
 def create_temp_table():
-    """📌 stock_data_temp 테이블 생성 (없으면 생성)"""
+    """📌 TEMP_TABLE (stock_data_temp_<pid>_<uuid>) 테이블 생성 후 비움 (이전 파일에서 남은 행이 섞이지 않도록)"""
+    global _temp_table_guard
     try:
+        if _temp_table_guard is None:
+            _temp_table_guard = StageTableGuard(DB_CONFIG, TEMP_TABLE)
         with psycopg2.connect(**DB_CONFIG) as conn, conn.cursor() as cur:
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS stock_data_temp (
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {TEMP_TABLE} (
                     ticker TEXT,
                     date DATE,
                     open NUMERIC,
@@ -66,26 +63,24 @@ def create_temp_table():
                     volume BIGINT
                 );
             """)
+            cur.execute(f"TRUNCATE {TEMP_TABLE};")
             conn.commit()
     except Exception as e:
         print(f"❌ 임시 테이블 생성 오류: {e}")
 
 
-def csv_to_temp_table(hdfs_csv_file, target_table="stock_data_temp"):
+def csv_to_temp_table(hdfs_csv_file, target_table=TEMP_TABLE):
     """📥 HDFS에서 CSV 데이터를 읽어 PostgreSQL에 적재"""
     try:
-        # HDFS에서 CSV 읽기
-        with client.read(hdfs_csv_file, encoding='utf-8') as reader:
-            csv_data = io.StringIO(reader.read())
-
-        # PostgreSQL 연결 및 적재
+        # PostgreSQL 연결 및 적재 (HDFS 응답을 조각 단위로 COPY 에 바로 흘려보냄, Parquet 는 CSV 스트림으로 변환)
         with psycopg2.connect(**DB_CONFIG) as conn, conn.cursor() as cur:
             create_temp_table()
             copy_query = f"""
             COPY {target_table} (date, ticker, close, high, low, open, volume)
             FROM STDIN WITH CSV HEADER DELIMITER ',' QUOTE '"';
             """
-            cur.copy_expert(sql=copy_query, file=csv_data)
+            with open_hdfs_copy_source(client, hdfs_csv_file) as csv_data:
+                cur.copy_expert(sql=copy_query, file=csv_data, size=READ_CHUNK_SIZE)
             conn.commit()
 
         print(f"✅ HDFS 파일 적재 성공: {hdfs_csv_file}")
@@ -100,25 +95,25 @@ def csv_to_temp_table(hdfs_csv_file, target_table="stock_data_temp"):
 
 
 def move_data_from_temp_to_main():
-    """📤 stock_data_temp 테이블에서 stock_data 테이블로 데이터 이동"""
+    """📤 TEMP_TABLE 에서 stock_data 테이블로 데이터 이동 → 성공 여부"""
     try:
         with psycopg2.connect(**DB_CONFIG) as conn, conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO stock_data (ticker, date, open, high, low, close, volume)
-                SELECT ticker, date, open, high, low, close, volume
-                FROM stock_data_temp
-                ON CONFLICT (ticker, date) DO NOTHING;
-            """)
+            partition_manager.ensure_for_table(cur, TEMP_TABLE)  # 파티션 테이블이면 필요한 파티션 준비
+            counts = merge_stage(cur, TEMP_TABLE, "text", STOCK_DATA_MERGE_MODE)  # upsert 면 바뀐 행만 고침
             conn.commit()
+            if STOCK_DATA_MERGE_MODE == "upsert":
+                print(f"🔁 {format_merge_counts(*counts)}")
+        return True
     except Exception as e:
         print(f"❌ 데이터 이동 실패: {e}")
+        return False
 
 
 def drop_temp_table():
-    """📂 stock_data_temp 테이블 삭제"""
+    """📂 TEMP_TABLE 삭제"""
     try:
         with psycopg2.connect(**DB_CONFIG) as conn, conn.cursor() as cur:
-            cur.execute("DROP TABLE IF EXISTS stock_data_temp;")
+            cur.execute(f"DROP TABLE IF EXISTS {TEMP_TABLE};")
             conn.commit()
     except Exception as e:
         print(f"❌ 임시 테이블 삭제 실패: {e}")
@@ -140,58 +135,213 @@ def hdfs_file_exists(hdfs_path):
 
 
 
-def process_csv_files(csv_file_path=None):
-    """📂 로그 파일에서 CSV 목록을 읽어 처리"""
-    if csv_file_path:
-        # 단일 CSV 파일 처리
-        if hdfs_file_exists(csv_file_path):
-            success = csv_to_temp_table(csv_file_path)
-            if success:
-                move_data_from_temp_to_main()
-                drop_temp_table()
-        else:
-            print(f"⚠️ HDFS 파일을 찾을 수 없음1: {csv_file_path}")
-    else:
-        if not os.path.exists(CSV_LOG_FILE):
-            print("📂 CSV 로그 파일이 없습니다.")
-            return
+def _read_hdfs_tickers(hdfs_csv_file):
+    """HDFS CSV / Parquet 에서 Ticker 컬럼만 읽음"""
+    if hdfs_csv_file.endswith(".parquet"):
+        with open_hdfs_range_file(client, hdfs_csv_file) as reader:
+            return read_parquet_frame(reader, columns=["Ticker"])
+    with client.read(hdfs_csv_file, encoding='utf-8') as reader:
+        return pd.read_csv(reader, usecols=["Ticker"])
+
 
-        with open(CSV_LOG_FILE, "r") as file:
-            csv_files = [line.strip() for line in file.readlines() if line.strip()]
+def batch_keys(csv_file):
+    """🔖 파일 이름 / 내용에서 배치의 (티커 목록, 날짜) 추출 (규칙에 맞지 않으면 None)"""
+    parsed = parse_data_file_name(csv_file)
+    if parsed is None:
+        return None
+    ticker, file_date = parsed
+    if ticker is not None:
+        return [ticker], file_date
+    try:
+        tickers = _read_hdfs_tickers(csv_file)["Ticker"].astype(str).unique().tolist()
+    except Exception as e:
+        print(f"⚠️ 티커 목록 확인 실패: {e}")
+        return None
+    return tickers, file_date
 
-        if not csv_files:
-            print("📂 적재할 CSV 파일이 없습니다.")
-            return
 
-        print(f"📂 총 {len(csv_files)}개의 CSV 파일을 처리합니다.")
+def read_data_file(hdfs_csv_file):
+    """📖 HDFS CSV / Parquet 파일 → DataFrame (binary COPY 용)"""
+    if hdfs_csv_file.endswith(".parquet"):
+        with open_hdfs_range_file(client, hdfs_csv_file) as reader:
+            return read_parquet_frame(reader)
+    with client.read(hdfs_csv_file, encoding='utf-8') as reader:
+        return pd.read_csv(reader, parse_dates=["Date"], dtype={"Ticker": str})
 
-        for csv_file in csv_files:
-            if hdfs_file_exists(csv_file):
-                success = csv_to_temp_table(csv_file)
-                if success:
-                    move_data_from_temp_to_main()
-                    drop_temp_table()
-            else:
-                print(f"⚠️ HDFS 파일을 찾을 수 없음2: {csv_file}")
 
-        print("✅ 모든 CSV 파일 처리 완료")
+def load_data_file(csv_file, copy_format="text"):
+    """📥 파일 하나를 stock_data 에 적재
 
+    - text  : 기존 방식 (temp 테이블에 CSV COPY → 병합 → temp 테이블 삭제)
+    - binary: 클라이언트에서 PGCOPY binary 로 인코딩해서 한 세션에서 COPY + 병합
+    """
+    if copy_format == "binary":
         try:
-            os.remove(CSV_LOG_FILE)
-            print("🗑️ 로그 파일 삭제 완료")
+            load_frame(DB_CONFIG, read_data_file(csv_file), copy_format="binary",
+                       partition_by=STOCK_DATA_PARTITION_BY, merge_mode=STOCK_DATA_MERGE_MODE,
+                       compact=STOCK_DATA_COMPACT)
+            return True
         except Exception as e:
-            print(f"⚠️ 로그 파일 삭제 실패: {e}")
+            print(f"❌ binary 적재 실패: {csv_file}: {e}")
+            return False
+
+    # Step 1: 임시 테이블에 CSV 파일 적재
+    success = csv_to_temp_table(csv_file)
+    if success:
+        # Step 2: 임시 테이블에서 실제 테이블로 데이터 이동
+        success = move_data_from_temp_to_main()
+
+        # Step 3: 임시 테이블 삭제
+        drop_temp_table()
+    return success
+
+
+def open_copy_source(hdfs_csv_file, copy_format="text"):
+    """BatchLoader.copy 에 넘길 입력 (text: CSV 파일 객체, binary: DataFrame)"""
+    if copy_format == "binary":
+        return read_data_file(hdfs_csv_file)
+    return open_hdfs_copy_source(client, hdfs_csv_file)
+
+
+def _format_rows(entries):
+    """매니페스트에 기록된 행 수 합계 (예전 형식이라 행 수를 모르는 파일은 따로 표시)"""
+    rows = sum(entry.rows for entry in entries if entry.rows is not None)
+    unknown = sum(1 for entry in entries if entry.rows is None)
+    return f"행 {rows:,}개" + (f", 행 수 모름 {unknown}개" if unknown else "")
+
+
+def iter_load_targets(csv_files, hwm=None, skipped=None, path_index=None):
+    """적재할 (파일, 배치 키) 를 차례로 생성 (없는 파일 / 이미 적재된 배치는 건너뛰고, 이미 적재된 파일은 skipped 에 추가)
+
+    path_index(PathIndex) 를 주면 파일마다 status 를 부르지 않고 미리 나열한 목록으로 확인
+    """
+    file_exists = path_index.exists if path_index else hdfs_file_exists
+    for csv_file in csv_files:
+        if not file_exists(csv_file):
+            print(f"⚠️ HDFS 파일을 찾을 수 없음2: {csv_file}")
+            continue
+
+        batch = batch_keys(csv_file) if hwm else None
+        if batch and hwm.is_loaded(*batch):
+            print(f"⏭️ 이미 적재된 배치 건너뜀: {csv_file}")
+            if skipped is not None:
+                skipped.append(csv_file)
+            continue
+        yield csv_file, batch
+
+
+def _covered_results(done, covered_by):
+    """ALL_DATA 로 대신 적재한 TICKER_DATA 의 결과 → (끝난 경로 집합, 되돌릴 경로 집합)
+
+    ALL_DATA 가 끝났을 때만 같이 끝난 것으로 보고, 아니면 시도 횟수를 쓰지 않고 대기열로 되돌려서
+    다음 claim 에서 (ALL_DATA 없이) 따로 적재되게 한다.
+    """
+    finished = {path for path, aggregate in covered_by.items() if aggregate in done}
+    deferred = set(covered_by) - finished
+    if deferred:
+        print(f"⏪ ALL_DATA 적재 실패로 겹치는 TICKER_DATA {len(deferred)}개를 대기열로 되돌림")
+    return done | finished, deferred
+
+
+def load_entries(entries, hwm=None, copy_format="text", batch_size=None, commit_every=1, workers=1):
+    """📥 매니페스트 항목(ManifestEntry)들을 적재 → (끝난 경로 집합, 되돌릴 경로 집합)
+
+    끝난 경로: 적재 성공 + 이미 적재되어 건너뜀 + 적재에 성공한 ALL_DATA 와 겹치는 TICKER_DATA
+    되돌릴 경로: 겹치는 ALL_DATA 가 적재되지 않은 TICKER_DATA (WorkQueue.finish 의 deferred_paths)
+    없는 파일 / 적재에 실패한 파일은 빠지므로 작업 큐에서 나중에 다시 시도한다.
+    """
+    # 매니페스트에 나온 디렉터리를 한 번씩만 나열 (파일마다 status 호출하지 않음)
+    path_index = PathIndex(HdfsStorage(client))
+    n_dirs = path_index.preload([entry.path for entry in entries])
+
+    # ALL_DATA 와 겹치는 TICKER_DATA / 중복 경로는 적재하지 않음
+    # (중복 경로는 같은 경로의 적재 결과를, 겹치는 TICKER_DATA 는 ALL_DATA 의 적재 결과를 따름)
+    entries, redundant, covered_by = select_canonical_entries(entries, path_index.exists)
+    csv_files = [entry.path for entry in entries]
+    print(f"📂 총 {len(csv_files)}개의 CSV 파일을 처리합니다. ({_format_rows(entries)})")
+    if redundant:
+        print(f"🧹 중복 파일 {len(redundant)}개 건너뜀 ({_format_rows(redundant)})")
+    skipped = []
+
+    sizes = {f: path_index.size(f) for f in csv_files if path_index.exists(f)}
+    print(f"📇 디렉터리 {n_dirs}개 확인: 파일 {len(sizes)}개, {sum(sizes.values()) / 2**20:,.1f}MB")
+
+    loaded = load_targets(DB_CONFIG, iter_load_targets(csv_files, hwm, skipped, path_index),
+                          lambda f: open_copy_source(f, copy_format), load_data_file, sizes.get, hwm,
+                          copy_format, batch_size, commit_every, workers, partition_by=STOCK_DATA_PARTITION_BY,
+                          merge_mode=STOCK_DATA_MERGE_MODE, compact=STOCK_DATA_COMPACT)
+    if skipped:
+        print(f"⏭️ 이미 적재되어 건너뛴 배치: {len(skipped)}개")
+    return _covered_results(set(loaded) | set(skipped), covered_by)
+
+
+def process_csv_files(csv_file_path=None, skip_loaded=False, copy_format="text", batch_size=None,
+                      commit_every=1, workers=1):
+    """📂 작업 큐에서 파일을 가져와 처리 (큐가 빌 때까지 WORK_QUEUE_CLAIM_SIZE 개씩, work_queue.process_queue)
+
+    skip_loaded=True 이면 stock_data 에 배치의 (티커, 날짜) 행이 이미 모두 있는 파일은 건너뜀 (HighWaterMarkIndex.is_loaded)
+    copy_format 은 load_data_file 참고 (text / binary)
+    batch_size 를 주면 연결 하나 / 세션 TEMP 테이블로 batch_size 개 파일마다 한 번씩 병합하고,
+    commit_every 배치마다 commit 한다 (생략하면 파일마다 따로 적재하는 기존 방식)
+    workers > 1 이면 ParallelLoader 로 여러 연결에서 동시에 적재 (batch_size 는 무시)
+    끝난 파일은 ack, 실패한 파일은 release 해서 나중에 (다른 로더가) 다시 시도한다.
+    """
+    hwm = HighWaterMarkIndex(DB_CONFIG) if skip_loaded else None
+    try:
+        sweep_stage_tables(DB_CONFIG)
+    except Exception as e:
+        print(f"⚠️ 남은 staging 테이블 정리 실패: {e}")
+
+    if csv_file_path:
+        # 인자가 전달되었을 때: 단일 CSV 파일 처리
+        if hdfs_file_exists(csv_file_path):
+            load_data_file(csv_file_path, copy_format)
+        else:
+            print(f"⚠️ HDFS 파일을 찾을 수 없음1: {csv_file_path}")
+        return
+
+    def load(items):
+        return load_entries([item.entry for item in items], hwm, copy_format, batch_size, commit_every, workers)
+
+    work_queue = WorkQueue(WORK_QUEUE_DB, QUEUE_HDFS, lease_seconds=WORK_QUEUE_LEASE_SECONDS)
+    try:
+        process_queue(work_queue, load, WORK_QUEUE_CLAIM_SIZE, CSV_LOG_FILE)
+    finally:
+        work_queue.close()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="HDFS에서 CSV 파일을 PostgreSQL에 적재하는 스크립트")
     parser.add_argument("csv_file", type=str, help="처리할 HDFS CSV 파일 경로", nargs="?")
+    parser.add_argument("--skip-loaded", action="store_true",
+                        help="stock_data 에 이미 있는 배치는 적재하지 않음")
+    parser.add_argument("--copy-format", choices=["text", "binary"], default="text",
+                        help="COPY 형식 (binary: 클라이언트에서 PGCOPY 로 인코딩)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="연결 하나로 N개 파일마다 한 번씩 병합하는 배치 모드")
+    parser.add_argument("--commit-every", type=int, default=1,
+                        help="배치 모드에서 몇 배치마다 commit 할지")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="2 이상이면 워커마다 연결 / staging 파티션을 따로 쓰는 병렬 적재")
+    parser.add_argument("--partition-by", choices=PARTITION_GRANULARITIES, default=STOCK_DATA_PARTITION_BY,
+                        help="stock_data 가 없을 때 date 범위 파티션 테이블로 생성 (기존 테이블은 migrate_stock_data.py)")
+    parser.add_argument("--compact", choices=COMPACT_PRICE_TYPES, default=STOCK_DATA_COMPACT,
+                        help="stock_data 가 없을 때 compact 스키마로 생성 (fixed: 가격×10^4 BIGINT, float: float8. "
+                             "기존 테이블은 migrate_compact_schema.py)")
+    parser.add_argument("--merge-mode", choices=MERGE_MODES, default=STOCK_DATA_MERGE_MODE,
+                        help="upsert: 이미 있는 (ticker, date) 도 OHLCV 가 바뀌었으면 고침 (같은 행은 다시 쓰지 않음)")
 
     args = parser.parse_args()
+    STOCK_DATA_PARTITION_BY = args.partition_by
+    STOCK_DATA_MERGE_MODE = args.merge_mode
+    STOCK_DATA_COMPACT = args.compact
+    partition_manager = PartitionManager(DB_CONFIG, STOCK_DATA_PARTITION_BY)
 
     create_stock_data_table()
 
     if args.csv_file:
-        process_csv_files(args.csv_file)
+        process_csv_files(args.csv_file, skip_loaded=args.skip_loaded, copy_format=args.copy_format)
     else:
-        process_csv_files()
+        process_csv_files(skip_loaded=args.skip_loaded, copy_format=args.copy_format,
+                          batch_size=args.batch_size, commit_every=args.commit_every,
+                          workers=args.workers)
@@ -0,0 +1,132 @@
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+
+# save_csv / save_csv_to_hdfs 가 만드는 파일 이름 규칙
+#   ALL_DATA_{YYYY_MM_DD}.csv                 : 날짜별 전체 티커
+#   TICKER_DATA_{ticker}_{YYYY_MM_DD}.csv     : 날짜별 티커 하나
+_FILE_NAME_RE = re.compile(
+    r"^(?:ALL_DATA|TICKER_DATA_(?P<ticker>.+))_(?P<date>\d{4}_\d{2}_\d{2})\.(?P<ext>\w+)$"
+)
+
+
+def parse_data_file_name(path):
+    """📄 파일 경로에서 (ticker, date) 추출
+
+    ALL_DATA 파일은 ticker 가 None, 규칙에 맞지 않는 이름은 None 반환
+    """
+    match = _FILE_NAME_RE.match(os.path.basename(path))
+    if not match:
+        return None
+    return match.group("ticker"), datetime.strptime(match.group("date"), "%Y_%m_%d").date()
+
+
+def load_tickers_from_file(file_path: str) -> list:
+    """📂 파일에서 Ticker 목록을 불러오는 함수"""
+    tickers = []
+    try:
+        with open(file_path, "r") as f:
+            tickers = [line.strip() for line in f if line.strip()]  # 빈 줄 제외
+        print(f"[INFO] Ticker {len(tickers)}개 로드 완료")
+    except FileNotFoundError:
+        print(f"[ERROR] 파일을 찾을 수 없습니다: {file_path}")
+    except Exception as e:
+        print(f"[ERROR] Ticker 파일 로드 실패: {e}")
+    return tickers
+
+
+def data_file_path(root, extract_date, tickers, is_monthly=False, fmt="csv"):
+    """📁 저장 경로 규칙 → (폴더, 파일 이름)
+
+    - csv    : {root}/YYYY/MM/date_data/ALL_DATA_*.csv, {root}/YYYY/MM/DD/TICKER_DATA_*.csv
+    - parquet: {root}/year=YYYY/month=MM/ALL_DATA_*.parquet (Hive 스타일 파티션)
+    """
+    year, month, day = extract_date.split("_")
+    prefix = "ALL_DATA" if is_monthly else f"TICKER_DATA_{tickers}"
+    file_name = f"{prefix}_{extract_date}.{fmt}"
+
+    if fmt == "parquet":
+        folder = os.path.join(root, f"year={year}", f"month={month}")
+    elif is_monthly:
+        folder = os.path.join(root, year, month, "date_data")
+    else:
+        folder = os.path.join(root, year, month, day)
+    return folder, file_name
+
+
+# 매니페스트 한 줄: "{경로}\t{역할}\t{행 수}\t{run_id}" (예전 형식인 경로만 있는 줄도 읽음)
+#   aggregate : ALL_DATA 파일 (그날 수집한 모든 티커)
+#   ticker    : TICKER_DATA 파일 (같은 run 의 aggregate 와 내용이 겹침)
+ROLE_AGGREGATE = "aggregate"
+ROLE_TICKER = "ticker"
+
+
+@dataclass
+class ManifestEntry:
+    """매니페스트에 기록된 파일 하나"""
+    path: str
+    role: str = None
+    rows: int = None
+    run_id: str = None
+
+    def to_line(self):
+        rows = "" if self.rows is None else str(self.rows)
+        return "\t".join([self.path, self.role or "", rows, self.run_id or ""])
+
+
+def parse_manifest_line(line):
+    """📜 매니페스트 한 줄 → ManifestEntry (빈 줄은 None, 역할이 없으면 파일 이름으로 추정)"""
+    fields = line.rstrip("\n").split("\t")
+    path = fields[0].strip()
+    if not path:
+        return None
+    role = fields[1] if len(fields) > 1 and fields[1] else None
+    if role is None:
+        parsed = parse_data_file_name(path)
+        if parsed is not None:
+            role = ROLE_AGGREGATE if parsed[0] is None else ROLE_TICKER
+    rows = int(fields[2]) if len(fields) > 2 and fields[2] else None
+    run_id = fields[3] if len(fields) > 3 and fields[3] else None
+    return ManifestEntry(path, role, rows, run_id)
+
+
+def select_canonical_entries(entries, exists=None):
+    """🧹 (ticker, date) 마다 한 벌만 적재하도록 매니페스트 정리 → (적재할 entries, 건너뛸 entries, covered_by)
+
+    - 같은 경로가 여러 번 나오면 처음 한 번만 적재
+    - TICKER_DATA 는 같은 run 에서 올린 그날의 ALL_DATA 가 남아 있으면 건너뜀
+      (ALL_DATA 는 같은 이름으로 덮어쓰므로 그날 마지막으로 기록된 run 의 것만 인정.
+       다른 run 에서 덮어쓴 경우 / run_id 가 없는 예전 형식은 그대로 적재)
+    - exists 를 주면 실제로 있는 ALL_DATA 만 기준으로 삼음
+    - covered_by: 건너뛴 TICKER_DATA 경로 → 대신 적재할 ALL_DATA 경로
+      (ALL_DATA 적재가 끝난 뒤에야 TICKER_DATA 도 끝난 것으로 봐야 함)
+    """
+    latest_aggregate = {}
+    for entry in entries:
+        parsed = parse_data_file_name(entry.path)
+        if entry.role == ROLE_AGGREGATE and parsed is not None:
+            latest_aggregate[parsed[1]] = entry
+
+    covered = {
+        file_date: entry
+        for file_date, entry in latest_aggregate.items()
+        if entry.run_id and (exists is None or exists(entry.path))
+    }
+
+    selected, skipped, seen, covered_by = [], [], set(), {}
+    for entry in entries:
+        if entry.path in seen:
+            skipped.append(entry)
+            continue
+        seen.add(entry.path)
+        if entry.role == ROLE_TICKER and entry.run_id:
+            parsed = parse_data_file_name(entry.path)
+            aggregate = covered.get(parsed[1]) if parsed is not None else None
+            if aggregate is not None and aggregate.run_id == entry.run_id:
+                skipped.append(entry)
+                covered_by[entry.path] = aggregate.path
+                continue
+        selected.append(entry)
+    return selected, skipped, covered_by
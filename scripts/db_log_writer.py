@@ -0,0 +1,224 @@
+import atexit
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+
+LOG_COLUMNS = (
+    "execution_time", "from_date", "to_date", "tickers",
+    "step", "status", "message", "duration_seconds",
+)
+
+
+def _pid_alive(pid):
+    """프로세스 생존 여부 확인"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def create_log_table(db_config, table="stock_data_log"):
+    """ 📑 로그 저장을 위한 테이블 생성 함수 """
+    conn = None
+    try:
+        conn = psycopg2.connect(**db_config)
+        with conn.cursor() as cur:
+            cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id SERIAL PRIMARY KEY,
+                execution_time TIMESTAMP NOT NULL,
+                from_date DATE NOT NULL,
+                to_date DATE NOT NULL,
+                tickers TEXT NOT NULL,
+                step TEXT NOT NULL,
+                status TEXT NOT NULL,
+                message TEXT,
+                duration_seconds DOUBLE PRECISION
+            );
+            """)
+            conn.commit()
+    except Exception as e:
+        print(f"[ERROR] 테이블 생성 실패: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+class StockDataLogWriter:
+    """📝 stock_data_log 배치 기록기
+
+    - 연결 하나를 프로세스 동안 재사용
+    - 기록은 메모리 버퍼에 쌓았다가 batch_size 도달 시, flush_interval 초마다 (백그라운드 타이머),
+      또는 프로세스 종료 시 multi-row INSERT 로 한 번에 저장
+    - 버퍼에 넣기 전에 spool 파일(JSON lines)에 먼저 append 하므로 비정상 종료 시에도
+      기록이 남고, 다음 실행 시 spool 을 다시 적재한다
+    - spool 파일은 기록기마다 따로 ({table}.{pid}-{uuid}.spool) 만들고, 소유 프로세스가 끝난 spool 만 넘겨받는다
+      (한 프로세스에 기록기가 여러 개 있어도 서로의 spool 을 지우거나 다시 적재하지 않음)
+    """
+
+    def __init__(self, db_config, table="stock_data_log", batch_size=500, flush_interval=5.0,
+                 spool_dir=None):
+        self.db_config = db_config
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_dir = spool_dir or tempfile.gettempdir()
+
+        self._conn = None
+        self._spool = None
+        self._buffer = []
+        self._adopted = []  # 이전 실행에서 넘겨받은 spool 파일
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+        self._token = uuid.uuid4().hex
+        self._stop = threading.Event()
+        self._timer = None
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls, db_config, table="stock_data_log"):
+        """LOG_BATCH_SIZE / LOG_FLUSH_INTERVAL / LOG_SPOOL_DIR 환경 변수로 만든 기록기"""
+        return cls(
+            db_config,
+            table=table,
+            batch_size=int(os.getenv("LOG_BATCH_SIZE", "500")),
+            flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "5")),
+            spool_dir=os.getenv("LOG_SPOOL_DIR"),
+        )
+
+    @property
+    def spool_path(self):
+        return os.path.join(self.spool_dir, f"{self.table}.{os.getpid()}-{self._token}.spool")
+
+    def _flush_loop(self):
+        """마지막 기록 뒤 조용해져도 버퍼가 flush_interval 초 넘게 남아 있지 않도록 주기적으로 flush"""
+        while not self._stop.wait(self.flush_interval):
+            with self._lock:
+                if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+                    self.flush()
+
+    def _open_spool(self):
+        """spool 파일을 열고, 종료된 프로세스가 남긴 spool 을 넘겨받음"""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._spool = open(self.spool_path, "a", encoding="utf-8")
+
+        for path in glob.glob(os.path.join(self.spool_dir, f"{self.table}.*.spool")):
+            if path == self.spool_path:
+                continue
+            try:
+                pid = int(path.rsplit(".", 2)[-2].split("-")[0])
+            except ValueError:
+                pid = None
+            if pid is not None and _pid_alive(pid):
+                continue
+
+            # rename 으로 소유권을 먼저 가져와서 다른 프로세스와 중복 적재를 막음
+            claimed = os.path.join(self.spool_dir, f"{self.table}.{os.getpid()}-{uuid.uuid4().hex}.spool")
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+
+            with open(claimed, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            self._buffer.extend(records)
+            self._adopted.append(claimed)
+            print(f"[INFO] 미처리 로그 {len(records)}건 복구: {path}")
+
+    def _connection(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg2.connect(**self.db_config)
+        return self._conn
+
+    def write(self, **record):
+        """로그 한 건 추가 (필요하면 즉시 flush)"""
+        row = {col: record.get(col) for col in LOG_COLUMNS}
+        with self._lock:
+            if self._spool is None:
+                self._open_spool()
+            if self._timer is None and self.flush_interval:
+                self._stop.clear()
+                self._timer = threading.Thread(target=self._flush_loop, name="log-writer-flush", daemon=True)
+                self._timer.start()
+            self._spool.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+            self._spool.flush()
+            self._buffer.append(row)
+
+            if (len(self._buffer) >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+
+    def _insert(self, cur, rows):
+        query = f"INSERT INTO {self.table} ({', '.join(LOG_COLUMNS)}) VALUES %s"
+        execute_values(cur, query, [tuple(r[c] for c in LOG_COLUMNS) for r in rows],
+                       page_size=self.batch_size)
+
+    def flush(self):
+        """버퍼의 로그를 multi-row INSERT 로 저장하고 spool 을 비움"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._buffer:
+                return True
+
+            rows = self._buffer
+            try:
+                conn = self._connection()
+                try:
+                    with conn.cursor() as cur:
+                        self._insert(cur, rows)
+                    conn.commit()
+                except (psycopg2.DataError, psycopg2.IntegrityError):
+                    # 잘못된 행 하나 때문에 배치 전체를 잃지 않도록 한 건씩 재시도
+                    conn.rollback()
+                    with conn.cursor() as cur:
+                        for row in rows:
+                            cur.execute("SAVEPOINT log_row")
+                            try:
+                                self._insert(cur, [row])
+                            except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+                                cur.execute("ROLLBACK TO SAVEPOINT log_row")
+                                print(f"[ERROR] 로그 저장 실패 (건너뜀): {e}")
+                    conn.commit()
+            except Exception as e:
+                print(f"[ERROR] 로그 저장 실패 ({len(rows)}건 보류): {e}")
+                if self._conn is not None and not self._conn.closed:
+                    self._conn.close()
+                self._conn = None
+                return False
+
+            self._buffer = []
+            if self._spool is not None:
+                self._spool.truncate(0)
+                self._spool.seek(0)
+            for path in self._adopted:
+                os.remove(path)
+            self._adopted = []
+            return True
+
+    def close(self):
+        """남은 로그를 저장하고 연결/spool 정리"""
+        self._stop.set()
+        if self._timer is not None and self._timer is not threading.current_thread():
+            self._timer.join()
+        self._timer = None
+        with self._lock:
+            flushed = self.flush()
+            if self._spool is not None:
+                self._spool.close()
+                self._spool = None
+                if flushed:
+                    os.remove(self.spool_path)
+            if self._conn is not None and not self._conn.closed:
+                self._conn.close()
+            self._conn = None
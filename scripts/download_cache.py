@@ -0,0 +1,337 @@
+import argparse
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from downloader import inspect_download
+from trading_calendar import get_trading_calendar
+
+
+DEFAULT_DOWNLOAD_CACHE_DIR = os.path.expanduser("~/.stock_fetch/download_cache")
+
+# 티커 하나 / 구간 하나의 일봉 (yf.download 의 티커별 컬럼과 같음)
+CACHE_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+CACHE_SCHEMA = pa.schema([("Date", pa.date32())] + [(name, pa.float64()) for name in CACHE_FIELDS])
+# Arrow IPC + zstd: Parquet 보다 파일이 작고 티커 하나를 읽는 비용이 훨씬 작음 (적중 시 티커마다 파일 하나를 읽음)
+CACHE_COMPRESSION = "zstd"
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        ticker TEXT NOT NULL,
+        interval TEXT NOT NULL,
+        range_from TEXT NOT NULL,
+        range_to TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        bytes INTEGER NOT NULL,
+        rows INTEGER NOT NULL,
+        stored_at REAL NOT NULL,
+        accessed_at REAL NOT NULL,
+        expires_at REAL,  -- NULL: 마감된 세션만 있는 구간 (바뀌지 않음)
+        PRIMARY KEY (ticker, interval, range_from, range_to)
+    );
+    CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at);
+    CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+"""
+
+
+def _bars_to_bytes(dates, values):
+    """날짜(datetime64[D]) 배열 + [날짜, CACHE_FIELDS] 값 배열 → Arrow IPC(zstd) 바이트"""
+    arrays = [pa.array(dates, type=pa.date32())]
+    arrays += [pa.array(values[:, i], type=pa.float64()) for i in range(len(CACHE_FIELDS))]
+    sink = pa.BufferOutputStream()
+    options = ipc.IpcWriteOptions(compression=CACHE_COMPRESSION)
+    with ipc.new_file(sink, CACHE_SCHEMA, options=options) as writer:
+        writer.write_table(pa.Table.from_arrays(arrays, schema=CACHE_SCHEMA))
+    return sink.getvalue().to_pybytes()
+
+
+def _bars_from_bytes(data):
+    table = ipc.open_file(pa.BufferReader(data)).read_all()
+    dates = table.column("Date").to_numpy().astype("datetime64[D]")
+    values = np.column_stack([table.column(name).to_numpy() for name in CACHE_FIELDS])
+    return dates, values
+
+
+def _split_bars(stock_data, tickers):
+    """source 응답(Ticker, Price MultiIndex 프레임) → {ticker: (날짜, 값)} (응답에 없거나 전부 NaN 인 티커 / 행은 제외)"""
+    columns = pd.MultiIndex.from_product([tickers, CACHE_FIELDS])
+    cube = stock_data.reindex(columns=columns).to_numpy(dtype="float64").reshape(
+        len(stock_data.index), len(tickers), len(CACHE_FIELDS))
+    dates = pd.DatetimeIndex(stock_data.index).to_numpy().astype("datetime64[D]")
+    present = ~np.isnan(cube).all(axis=2)  # [날짜, 티커]
+    return {ticker: (dates[present[:, i]], cube[present[:, i], i, :])
+            for i, ticker in enumerate(tickers) if present[:, i].any()}
+
+
+def _assemble(tickers, bars):
+    """{ticker: (날짜, 값)} → yf.download(group_by='ticker') 와 같은 (Ticker, Price) MultiIndex 프레임
+
+    티커마다 DataFrame 을 만들어 concat 하지 않고, 날짜 합집합 위의 2차원 배열 하나에 바로 채운다.
+    """
+    dates = np.unique(np.concatenate([bars[t][0] for t in tickers]))
+    n_fields = len(CACHE_FIELDS)
+    values = np.full((len(dates), len(tickers) * n_fields), np.nan)
+    for i, ticker in enumerate(tickers):
+        ticker_dates, ticker_values = bars[ticker]
+        values[np.searchsorted(dates, ticker_dates), i * n_fields:(i + 1) * n_fields] = ticker_values
+    columns = pd.MultiIndex.from_product([tickers, CACHE_FIELDS], names=["Ticker", "Price"])
+    return pd.DataFrame(values, index=pd.DatetimeIndex(dates.astype("datetime64[ns]"), name="Date"),
+                        columns=columns)
+
+
+class CachingSource:
+    """🗄️ 데이터 소스 앞에 두는 로컬 응답 캐시 (downloader.YFinanceSource 등을 감쌈)
+
+    - 키: (티커, interval, 세션 구간). 구간은 거래일 달력으로 실제 세션 범위로 좁혀서 같은 세션이면 같은 키
+    - 값: 티커 하나의 일봉을 Arrow IPC(zstd) 로 저장한 blob. 파일 이름은 내용의 sha256 (읽을 때 검증)
+    - 마지막 세션 뒤로 settle_sessions 개 이상 세션이 지난 구간은 바뀌지 않는 것으로 보고 만료 없음,
+      그보다 최근 구간은 recent_ttl 초 뒤 만료 (장 마감 후 정정 / 당일 미완성 데이터)
+    - 전체 크기가 max_bytes 를 넘으면 마지막으로 읽은 시각이 오래된 순(LRU)으로 삭제
+    - 요청한 티커 중 캐시에 없는 것만 소스에 요청하고, 받은 결과를 티커별로 저장
+    - 응답에 없거나 전부 NaN 인 티커는 저장하지 않음 (일시적 실패와 상장 폐지를 구분할 수 없음)
+    - 반환 프레임은 inspect_download 로 검사 (비어 있던 티커는 attrs 로 ChunkedDownloader 에 알림)
+    여러 다운로드 스레드 / 프로세스가 같은 캐시를 동시에 써도 된다 (SQLite WAL 인덱스).
+    """
+
+    def __init__(self, source, cache_dir=DEFAULT_DOWNLOAD_CACHE_DIR, max_bytes=2 * 1024 ** 3,
+                 recent_ttl=3600, settle_sessions=2, calendar=None, interval=None):
+        self.source = source
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.recent_ttl = recent_ttl
+        self.settle_sessions = settle_sessions
+        self.interval = interval or getattr(source, "interval", "1d")
+        self._calendar = calendar
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "corrupt": 0, "stored": 0, "evicted": 0,
+                      "bytes_read": 0, "bytes_written": 0}
+        os.makedirs(os.path.join(cache_dir, "blobs"), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.db"), timeout=30, isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _transaction(self, work):
+        """BEGIN IMMEDIATE → work(conn) → COMMIT (여러 행을 한 번에 기록)"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE;")
+            try:
+                result = work(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK;")
+                raise
+            self.conn.execute("COMMIT;")
+            return result
+
+    @property
+    def calendar(self):
+        if self._calendar is None:
+            self._calendar = get_trading_calendar()
+        return self._calendar
+
+    def _session_range(self, start, end):
+        """[start, end) 를 세션 구간으로 좁힘 (세션이 없으면 None)"""
+        return self.calendar.trim_range(start, end)
+
+    def _expires_at(self, session_range, now):
+        """마감되어 바뀌지 않는 구간이면 None, 아니면 만료 시각"""
+        settled = self.calendar.count_sessions(session_range[1], date.today()) >= self.settle_sessions
+        return None if settled else now + self.recent_ttl
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, "blobs", digest[:2], f"{digest}.arrow")
+
+    def _lookup(self, tickers, session_range, now, count=True):
+        """캐시에서 유효한 항목 {ticker: (digest, bytes)} (count 면 만료된 항목 수를 통계에 더함)"""
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT ticker, digest, bytes, expires_at FROM entries
+                WHERE interval = ? AND range_from = ? AND range_to = ?
+                  AND ticker IN ({','.join('?' * len(tickers))})
+            """, (self.interval, *session_range, *tickers)).fetchall()
+        found, expired = {}, 0
+        for ticker, digest, size, expires_at in rows:
+            if expires_at is not None and expires_at <= now:
+                expired += 1
+            else:
+                found[ticker] = (digest, size)
+        if count:
+            with self._lock:
+                self.stats["expired"] += expired
+        return found
+
+    def covers(self, tickers, start, end):
+        """요청한 티커가 모두 캐시에 있으면 True (ChunkedDownloader 가 요청 제한을 건너뛸 때 사용)"""
+        session_range = self._session_range(start, end)
+        tickers = list(dict.fromkeys(tickers))
+        return session_range is None or len(self._lookup(tickers, session_range, time.time(), count=False)) == len(tickers)
+
+    def _read(self, ticker, session_range, digest):
+        try:
+            with open(self._blob_path(digest), "rb") as f:
+                data = f.read()
+        except OSError:
+            data = None
+        if data is None or hashlib.sha256(data).hexdigest() != digest:
+            # 지워졌거나 손상된 blob 은 항목을 지우고 다시 받음
+            with self._lock:
+                self.stats["corrupt"] += 1
+                self.conn.execute("DELETE FROM entries WHERE ticker = ? AND interval = ? "
+                                  "AND range_from = ? AND range_to = ?", (ticker, self.interval, *session_range))
+            return None
+        with self._lock:
+            self.stats["bytes_read"] += len(data)
+        return _bars_from_bytes(data)
+
+    def _write(self, ticker, session_range, bars, now):
+        data = _bars_to_bytes(*bars)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return (ticker, self.interval, *session_range, digest, len(data), len(bars[0]), now, now,
+                self._expires_at(session_range, now))
+
+    def download(self, tickers, start, end):
+        """source.download 와 같은 (Ticker, Price) MultiIndex 프레임 반환 (캐시에 있는 티커는 디스크에서)"""
+        tickers = list(dict.fromkeys(tickers))
+        session_range = self._session_range(start, end)
+        if session_range is None:
+            return self.source.download(tickers, start, end)
+
+        now = time.time()
+        found = self._lookup(tickers, session_range, now)
+        bars = {}
+        for ticker, (digest, _) in found.items():
+            ticker_bars = self._read(ticker, session_range, digest)
+            if ticker_bars is not None:
+                bars[ticker] = ticker_bars
+        if bars:
+            touched = [(now, ticker, self.interval, *session_range) for ticker in bars]
+            self._transaction(lambda conn: conn.executemany(
+                "UPDATE entries SET accessed_at = ? WHERE ticker = ? AND interval = ? "
+                "AND range_from = ? AND range_to = ?", touched))
+
+        missing = [t for t in tickers if t not in bars]
+        with self._lock:
+            self.stats["hits"] += len(bars)
+            self.stats["misses"] += len(missing)
+        if missing:
+            # 소스 예외는 그대로 올려서 ChunkedDownloader 가 재시도하게 함
+            fetched = self.source.download(missing, start, end)
+            self._store(fetched, missing, session_range, bars)
+
+        # 캐시에서 읽은 프레임도 YFinanceSource 와 같이 검사 (전부 비면 재시도, 일부만 비면 그 티커만 재요청)
+        frame = _assemble([t for t in tickers if t in bars], bars) if bars else pd.DataFrame()
+        return inspect_download(frame, tickers)
+
+    def _store(self, fetched, tickers, session_range, bars):
+        """받은 프레임을 티커별로 나눠 저장하고 bars 에 추가"""
+        if fetched is None or fetched.empty or not isinstance(fetched.columns, pd.MultiIndex):
+            return
+        now = time.time()
+        fetched_bars = _split_bars(fetched, tickers)
+        bars.update(fetched_bars)
+        rows = [self._write(ticker, session_range, ticker_bars, now) for ticker, ticker_bars in fetched_bars.items()]
+        if not rows:
+            return
+        self._transaction(lambda conn: conn.executemany(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows))
+        with self._lock:
+            self.stats["stored"] += len(rows)
+            self.stats["bytes_written"] += sum(row[5] for row in rows)
+        self.evict()
+
+    def _remove_blobs(self, digests):
+        """다른 항목이 쓰지 않는 blob 삭제"""
+        for digest in digests:
+            with self._lock:
+                used = self.conn.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+            if used is None:
+                try:
+                    os.remove(self._blob_path(digest))
+                except FileNotFoundError:
+                    pass
+
+    def evict(self, max_bytes=None):
+        """🧹 만료된 항목을 지우고, 전체 크기가 max_bytes 이하가 될 때까지 LRU 순으로 삭제 → 삭제한 항목 수"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        now = time.time()
+
+        def work(conn):
+            victims = conn.execute("SELECT rowid, digest FROM entries "
+                                   "WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)).fetchall()
+            total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries "
+                                 "WHERE expires_at IS NULL OR expires_at > ?", (now,)).fetchone()[0]
+            if total > max_bytes:
+                # 오래 안 읽은 순으로 넘친 만큼 삭제
+                for key, digest, size in conn.execute(
+                        "SELECT rowid, digest, bytes FROM entries WHERE expires_at IS NULL OR expires_at > ? "
+                        "ORDER BY accessed_at, rowid", (now,)):
+                    if total <= max_bytes:
+                        break
+                    victims.append((key, digest))
+                    total -= size
+            conn.executemany("DELETE FROM entries WHERE rowid = ?", [(key,) for key, _ in victims])
+            return victims
+
+        victims = self._transaction(work)
+        with self._lock:
+            self.stats["evicted"] += len(victims)
+        self._remove_blobs({digest for _, digest in victims})
+        return len(victims)
+
+    def summary(self):
+        """캐시 전체 (항목 수, 바이트, 만료 없는 항목 수)"""
+        with self._lock:
+            return self.conn.execute("SELECT count(*), COALESCE(SUM(bytes), 0), count(*) - count(expires_at) "
+                                     "FROM entries").fetchone()
+
+    def report(self):
+        stats = self.stats
+        lookups = stats["hits"] + stats["misses"]
+        entries, size, immutable = self.summary()
+        return (f"🗄️ 다운로드 캐시: 적중 {stats['hits']} / 미스 {stats['misses']} "
+                f"({100 * stats['hits'] / lookups if lookups else 0:.1f}%), 만료 {stats['expired']}, "
+                f"손상 {stats['corrupt']}, 저장 {stats['stored']}, 삭제 {stats['evicted']}, "
+                f"읽기 {stats['bytes_read'] / 1024 ** 2:.1f}MB, 쓰기 {stats['bytes_written'] / 1024 ** 2:.1f}MB "
+                f"| 항목 {entries} (마감 {immutable}), {size / 1024 ** 2:.1f}MB / {self.max_bytes / 1024 ** 2:.0f}MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="다운로드 캐시 관리")
+    parser.add_argument("--dir", default=os.getenv("DOWNLOAD_CACHE_DIR") or DEFAULT_DOWNLOAD_CACHE_DIR,
+                        help="캐시 디렉터리 (기본값: DOWNLOAD_CACHE_DIR 또는 ~/.stock_fetch/download_cache)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="항목 수 / 크기")
+    prune = commands.add_parser("prune", help="만료된 항목 삭제 후 크기 제한까지 LRU 삭제")
+    prune.add_argument("--max-mb", type=float, default=float(os.getenv("DOWNLOAD_CACHE_MAX_MB", "2048")))
+    commands.add_parser("clear", help="모든 항목 삭제")
+    args = parser.parse_args()
+
+    cache = CachingSource(None, args.dir)
+    try:
+        if args.command == "prune":
+            print(f"🧹 {cache.evict(int(args.max_mb * 1024 ** 2))}개 항목 삭제")
+        elif args.command == "clear":
+            print(f"🧹 {cache.evict(0)}개 항목 삭제")
+        entries, size, immutable = cache.summary()
+        print(f"🗄️ {args.dir}: 항목 {entries} (마감 {immutable}), {size / 1024 ** 2:.1f}MB")
+    finally:
+        cache.close()
@@ -0,0 +1,281 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import pandas as pd
+
+
+# 받은 프레임에서 비어 있던 티커 목록을 담는 DataFrame.attrs 키 (ChunkedDownloader 가 그 티커만 다시 요청)
+MISSING_TICKERS_ATTR = "missing_tickers"
+
+
+class EmptyDownloadError(RuntimeError):
+    """빈 응답 / 요청한 티커가 모두 비어 있음 (요청 제한이나 일시 오류일 수 있으므로 재시도 대상)"""
+
+
+def inspect_download(frame, tickers):
+    """📋 yf.download 결과 검사
+
+    yf.download 는 요청 제한 / 실패한 티커가 있어도 예외 없이 빈 프레임이나 전부 NaN 인 컬럼을 돌려준다.
+    - 프레임이 비었거나 요청한 티커가 모두 없거나 전부 NaN 이면 EmptyDownloadError
+    - 일부만 비었으면 그 티커 목록을 frame.attrs[MISSING_TICKERS_ATTR] 에 담아서 반환
+    """
+    if frame is None or frame.empty:
+        raise EmptyDownloadError(f"빈 응답 ({len(tickers)} tickers)")
+    received = set(frame.columns.get_level_values(0)) if isinstance(frame.columns, pd.MultiIndex) else set()
+    missing = [ticker for ticker in tickers if ticker not in received or frame[ticker].isna().all().all()]
+    if len(missing) == len(tickers):
+        raise EmptyDownloadError(f"요청한 {len(tickers)}개 티커가 모두 비어 있음")
+    frame.attrs[MISSING_TICKERS_ATTR] = missing
+    return frame
+
+
+class YFinanceSource:
+    """📡 yfinance 데이터 소스 (yf.download 와 같은 MultiIndex 프레임 반환, inspect_download 로 검사)"""
+
+    interval = "1d"
+
+    def download(self, tickers, start, end):
+        import yfinance as yf
+
+        frame = yf.download(tickers, start=start, end=end, interval=self.interval, group_by='ticker',
+                            threads=False, progress=False)
+        return inspect_download(frame, tickers)
+
+
+class TokenBucket:
+    """🪣 토큰 버킷 요청 제한기 (AIMD 로 속도 자동 조절)
+
+    - 성공 시 rate 를 increase 만큼 올리고 (max_rate 까지)
+    - 실패(제한/오류) 시 rate 를 decrease 배로 낮춤 (min_rate 까지)
+    """
+
+    def __init__(self, rate, capacity=None, min_rate=0.1, max_rate=None, increase=0.1, decrease=0.5):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate
+        self.increase = increase
+        self.decrease = decrease
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 대기"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_failure(self):
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+
+
+@dataclass
+class ChunkResult:
+    """청크 하나의 다운로드 결과"""
+    index: int
+    tickers: list
+    status: str = "PENDING"
+    attempts: int = 0
+    latency_seconds: float = 0.0
+    rows: int = 0
+    error: str = None
+    missing: list = field(default_factory=list)  # 다시 요청해도 비어 있던 티커
+    frame: pd.DataFrame = field(default=None, repr=False)
+
+
+class ChunkedDownloader:
+    """📦 티커를 청크로 나눠 병렬 다운로드하는 스케줄러
+
+    - chunk_size 개씩 나눈 청크를 max_workers 개의 스레드로 실행
+    - 모든 요청은 TokenBucket 을 거침
+    - 실패한 청크만 지수 backoff + jitter 로 max_retries 번까지 재시도
+    - source 는 download(tickers, start, end) 를 가진 객체면 무엇이든 가능
+    - source 에 covers(tickers, start, end) 가 있고 True 면 (CachingSource 캐시 적중) 요청 제한을 거치지 않음
+    - 일부 티커만 비어 있으면 (frame.attrs[MISSING_TICKERS_ATTR]) 그 티커만 partial_retries 번 다시 요청하고,
+      다시 받은 티커가 있으면 요청 제한에 걸렸던 것으로 보고 rate 를 낮춤
+    """
+
+    def __init__(self, source, chunk_size=200, max_workers=4, rate=2.0, max_retries=3,
+                 base_delay=1.0, max_delay=60.0, rate_limiter=None, partial_retries=1):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.partial_retries = partial_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limiter = rate_limiter or TokenBucket(rate)
+
+    def make_chunks(self, tickers):
+        tickers = list(dict.fromkeys(tickers))
+        return [tickers[i:i + self.chunk_size] for i in range(0, len(tickers), self.chunk_size)]
+
+    def _backoff(self, attempt):
+        """attempt 번째 재시도 전 대기 시간 (full jitter)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _run_chunk(self, result, start, end):
+        covers = getattr(self.source, "covers", None)
+        for attempt in range(self.max_retries + 1):
+            result.attempts = attempt + 1
+            cached = covers is not None and covers(result.tickers, start, end)
+            if not cached:
+                self.rate_limiter.acquire()
+            began = time.monotonic()
+            try:
+                frame = self.source.download(result.tickers, start, end)
+                result.latency_seconds = time.monotonic() - began
+                if not cached:
+                    self.rate_limiter.on_success()
+                frame = self._retry_missing(frame, start, end)
+                result.missing = list(frame.attrs.get(MISSING_TICKERS_ATTR, []))
+                result.frame = frame
+                result.rows = len(frame)
+                result.status = "SUCCESS"
+                result.error = None
+                return result
+            except Exception as e:
+                result.latency_seconds = time.monotonic() - began
+                result.error = str(e)
+                self.rate_limiter.on_failure()
+                if attempt < self.max_retries:
+                    delay = self._backoff(attempt)
+                    print(f"[WARN] 청크 {result.index} 실패, {delay:.1f}초 후 재시도 "
+                          f"({attempt + 1}/{self.max_retries}): {e}")
+                    time.sleep(delay)
+
+        result.status = "FAIL"
+        return result
+
+    def _retry_missing(self, frame, start, end):
+        """비어 있던 티커만 다시 요청해서 받은 컬럼으로 채움 → 합친 프레임 (attrs 에 남은 티커)"""
+        missing = list(frame.attrs.get(MISSING_TICKERS_ATTR, []))
+        for _ in range(self.partial_retries):
+            if not missing:
+                break
+            self.rate_limiter.acquire()
+            try:
+                retried = self.source.download(missing, start, end)
+            except EmptyDownloadError:
+                # 다시 받아도 비어 있음 → 상장폐지 / 기간 내 데이터 없음으로 보고 속도는 그대로 둠
+                self.rate_limiter.on_success()
+                break
+            except Exception as e:
+                self.rate_limiter.on_failure()
+                print(f"[WARN] 비어 있던 티커 {len(missing)}개 재요청 실패: {e}")
+                continue
+            still_missing = set(retried.attrs.get(MISSING_TICKERS_ATTR, []))
+            recovered = [ticker for ticker in missing if ticker not in still_missing]
+            if recovered:
+                # 다시 받으니 값이 있었음 → 첫 응답은 요청 제한 / 일시 오류였다고 보고 속도를 낮춤
+                self.rate_limiter.on_failure()
+                frame = pd.concat([frame.drop(columns=recovered, level=0, errors="ignore"),
+                                   retried[recovered]], axis=1).sort_index()
+            else:
+                self.rate_limiter.on_success()
+            missing = [ticker for ticker in missing if ticker in still_missing]
+        frame.attrs[MISSING_TICKERS_ATTR] = missing
+        return frame
+
+    def download(self, tickers, start, end, skip=(), on_result=None):
+        """전체 티커를 청크 단위로 받아 하나의 MultiIndex 프레임으로 합침
+
+        반환값: (stock_data, chunk_results)
+        실패한 청크의 티커는 프레임에서 빠지므로 reshape 단계에서 결측 티커로 처리된다.
+        skip: 받지 않을 청크 번호 (체크포인트에 이미 받아 둔 청크)
+        on_result: 청크 하나가 끝날 때마다 (워커 스레드에서, 프레임을 놓기 전에) 호출할 함수
+        """
+        results = [ChunkResult(i, chunk) for i, chunk in enumerate(self.make_chunks(tickers)) if i not in skip]
+
+        def run(result):
+            self._run_chunk(result, start, end)
+            if on_result is not None:
+                on_result(result)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(run, results))
+
+        frames = [r.frame for r in results if r.status == "SUCCESS" and r.frame is not None
+                  and not r.frame.empty]
+        for r in results:
+            r.frame = None  # 결과 목록이 프레임을 계속 잡고 있지 않도록 해제
+
+        if not frames:
+            return pd.DataFrame(), results
+
+        stock_data = frames[0] if len(frames) == 1 else pd.concat(frames, axis=1).sort_index()
+        return stock_data, results
+
+
+def make_downloader(chunk_size=None, max_workers=None, rate=None, cache_dir=None, cache_max_mb=None,
+                    cache_recent_ttl=None):
+    """📦 yfinance 청크 다운로더 생성 (인자가 없으면 환경 변수 / 기본값 사용)
+
+    yf.download 응답 캐시(CachingSource)를 앞에 둠: 마감된 구간은 계속 보관, 최근 구간은 TTL 초 뒤 만료
+    (DOWNLOAD_CACHE_DIR / DOWNLOAD_CACHE_MAX_MB / DOWNLOAD_CACHE_RECENT_TTL, MAX_MB=0 이면 사용 안 함)
+    """
+    from download_cache import DEFAULT_DOWNLOAD_CACHE_DIR, CachingSource  # download_cache 가 이 모듈을 import 함
+
+    if cache_max_mb is None:
+        cache_max_mb = float(os.getenv("DOWNLOAD_CACHE_MAX_MB", "2048"))
+    source = YFinanceSource()
+    if cache_max_mb > 0:
+        source = CachingSource(source, cache_dir or os.getenv("DOWNLOAD_CACHE_DIR") or DEFAULT_DOWNLOAD_CACHE_DIR,
+                               max_bytes=int(cache_max_mb * 1024 ** 2),
+                               recent_ttl=cache_recent_ttl or int(os.getenv("DOWNLOAD_CACHE_RECENT_TTL", "3600")))
+    return ChunkedDownloader(
+        source,
+        chunk_size=chunk_size or int(os.getenv("FETCH_CHUNK_SIZE", "200")),
+        max_workers=max_workers or int(os.getenv("FETCH_WORKERS", "4")),
+        rate=rate or float(os.getenv("FETCH_RATE", "2")),
+    )
+
+
+def close_downloader(downloader):
+    """캐시를 쓰는 다운로더면 캐시 통계를 출력하고 닫음"""
+    from download_cache import CachingSource
+
+    if isinstance(downloader.source, CachingSource):
+        print(downloader.source.report())
+        downloader.source.close()
+
+
+def log_chunk_results(chunk_results, from_date, to_date, log):
+    """청크별 지연 시간 / 결과를 로그로 남김 (log: 수집기의 log_to_db)"""
+    for result in chunk_results:
+        print(f"[INFO] 청크 {result.index}: {result.status} "
+              f"({len(result.tickers)} tickers, {result.attempts}회 시도, {result.latency_seconds:.2f}s)")
+        log(
+            execution_time=datetime.now(),
+            from_date=from_date,
+            to_date=to_date,
+            tickers=','.join(result.tickers),
+            step="FETCH_CHUNK",
+            status=result.status,
+            message=result.error or (f"chunk {result.index}: {result.rows} rows, {result.attempts} attempts"
+                                     + (f", empty tickers {','.join(result.missing)}" if result.missing else "")),
+            duration_seconds=result.latency_seconds
+        )
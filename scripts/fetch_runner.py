@@ -0,0 +1,313 @@
+import argparse
+import logging
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from backfill_planner import plan_tiles, tile_cells
+from checkpoints import RunCheckpoint, window_bounds
+from data_files import load_tickers_from_file
+from db_log_writer import create_log_table
+from downloader import close_downloader, log_chunk_results, make_downloader
+from pg_load import MERGE_MODES, direct_load
+from settings import FETCH_CHECKPOINT_DIR
+from stock_frame import PRICE_DTYPES, concat_reshaped, iter_date_partitions, reshape_stock_data
+from trading_calendar import get_default_dates, get_trading_calendar
+from watermarks import load_high_water_marks, plan_incremental_ranges
+
+
+# 🏃 fetch_stock_data / fetch_stock_data_hdfs 공통 수집 흐름
+# fetch 인자는 수집기 모듈 (설정 / 로그 / 저장 함수는 모듈의 것을 그대로 씀, stock_pipeline 과 같은 방식)
+# 수집기마다 다른 것은 저장 단계뿐: fetch.persist_frame(df_final, valid_tickers, track) → 모두 저장했는지
+
+
+def load_direct(fetch, frame, from_date, to_date, tickers):
+    """🚚 수집기 설정(COPY_FORMAT / STOCK_DATA_*)으로 DataFrame 을 stock_data 에 바로 적재 → 성공 여부"""
+    return direct_load(fetch.DB_CONFIG, frame, fetch.log_to_db, from_date, to_date, tickers,
+                       copy_format=fetch.COPY_FORMAT, partition_by=fetch.STOCK_DATA_PARTITION_BY,
+                       merge_mode=fetch.STOCK_DATA_MERGE_MODE, compact=fetch.STOCK_DATA_COMPACT)
+
+
+def save_date_partitions(frame, valid_tickers, save, output_format):
+    """💾 날짜별 전체 파일 + 티커별 파일을 save(data, date_str, tickers, is_monthly) 로 저장 → (날짜, 그날 모두 저장했는지) 생성
+
+    Parquet 는 날짜별 파일에 타입/티커 사전이 모두 있으므로 티커별 파일은 만들지 않음
+    """
+    for date, df_date, ticker_slices in iter_date_partitions(frame):
+        date_str = date.strftime("%Y_%m_%d")  # '2025-03-05' → '2025_03_05'
+        saved = save(df_date, date_str, '_'.join(valid_tickers), True) is not None
+        if output_format != "parquet":
+            for tick, ticker_data in ticker_slices:
+                saved = save(ticker_data, date_str, tick, False) is not None and saved
+        yield date, saved
+
+
+# 주식 데이터 가져오기
+def fetch_stock_data(fetch, tickers, from_date, to_date, downloader=None, ranges=None, checkpoint=None):
+    """📈 주식 데이터를 받아 날짜별 / 티커별로 저장
+
+    ranges 를 주면 {(from_date, to_date): [tickers]} 구간마다 해당 티커만 받는다 (증분 수집).
+    checkpoint(RunCheckpoint) 를 주면 받은 청크 / 저장한 날짜를 기록하고, 이미 끝난 청크 / 날짜는 건너뛴다.
+    """
+    log_to_db = fetch.log_to_db
+    ticker_list = ','.join(tickers)
+
+    # ✅ 데이터 추출 시작 로그
+    log_to_db(
+        execution_time=datetime.now(),
+        from_date=from_date,
+        to_date=to_date,
+        tickers=ticker_list,
+        step="START",
+        status="START",
+        message="데이터 추출 시작" + (f" (run {checkpoint.run_id})" if checkpoint is not None else ""),
+        duration_seconds=0
+    )
+
+    start_time = datetime.now()
+    downloader = downloader or make_downloader()
+
+    try:
+        # ✅ 구간별 / 청크 단위로 Ticker 데이터를 가져옴 (실패한 청크만 재시도)
+        ranges = ranges or {(from_date, to_date): list(tickers)}
+        frames, valid_tickers, missing_tickers = [], [], []
+        failed_chunks = 0
+        for (range_from, range_to), range_tickers in ranges.items():
+            if checkpoint is not None:
+                stock_data, chunk_results = checkpoint.download(downloader, range_tickers, range_from, range_to)
+            else:
+                stock_data, chunk_results = downloader.download(range_tickers, range_from, range_to)
+            log_chunk_results(chunk_results, range_from, range_to, log_to_db)
+            failed_chunks += sum(1 for result in chunk_results if result.status != "SUCCESS")
+
+            if stock_data.empty:
+                missing_tickers.extend(range_tickers)
+                continue
+
+            # ✅ 결측 티커 판별 / long 포맷 변환 / 결측 행 제거를 한 번에 처리
+            df_range, range_valid, range_missing = reshape_stock_data(stock_data, range_tickers,
+                                                                      fetch.FETCH_PRICE_DTYPE)
+            frames.append(df_range)
+            valid_tickers.extend(range_valid)
+            missing_tickers.extend(range_missing)
+
+        # ✅ 체크포인트: 모든 청크를 받은 window 에서만 저장한 날짜를 기록
+        # (실패한 청크가 있으면 --resume 때 그 청크만 다시 받고 날짜별 파일은 전부 다시 저장)
+        track = checkpoint if failed_chunks == 0 else None
+        if checkpoint is not None and failed_chunks:
+            print(f"[WARN] 청크 {failed_chunks}개 실패: --resume {checkpoint.run_id} 로 실패한 청크만 다시 받을 수 있음")
+
+        # ✅ 모든 데이터가 비어 있는지 확인
+        if not frames:
+            print("[WARN] 모든 데이터가 없음")
+            log_to_db(
+                execution_time=start_time,
+                from_date=from_date,
+                to_date=to_date,
+                tickers=ticker_list,
+                step="FETCH_DATA",
+                status="FAIL",
+                message="모든 데이터 없음",
+                duration_seconds=(datetime.now() - start_time).total_seconds()
+            )
+            if track is not None:
+                track.mark_finished(from_date, to_date)
+            return
+
+        df_final = concat_reshaped(frames)
+
+        print(f"{missing_tickers} 를 제외합니다.")
+        if missing_tickers:
+            log_to_db(
+                execution_time=start_time,
+                from_date=from_date,
+                to_date=to_date,
+                tickers=','.join(missing_tickers),
+                step="FETCH_DATA",
+                status="FAIL",
+                message="데이터 없음",
+                duration_seconds=(datetime.now() - start_time).total_seconds()
+            )
+
+        if df_final.empty:
+            print("[WARN] 모든 티커의 데이터가 없음")
+            if track is not None:
+                track.mark_finished(from_date, to_date)
+            return
+
+        # ✅ --resume: 이미 저장 / 적재한 날짜는 건너뜀
+        if checkpoint is not None and checkpoint.persisted:
+            done = df_final["Date"].isin(pd.to_datetime(sorted(checkpoint.persisted)))
+            if done.any():
+                print(f"[INFO] 체크포인트: 이미 저장한 {df_final.loc[done, 'Date'].nunique()}일 건너뜀")
+                df_final = df_final[~done]
+
+        # ✅ DB 직접 적재 모드: COPY FROM STDIN 으로 바로 병합
+        if fetch.DIRECT_LOAD:
+            loaded = df_final.empty or load_direct(fetch, df_final, from_date, to_date, ','.join(valid_tickers))
+            if not loaded:
+                track = None  # 적재에 실패한 날짜는 파일을 저장해도 끝난 것으로 기록하지 않음
+            if not fetch.ARCHIVE:
+                if track is not None:
+                    track.mark_persisted(df_final["Date"].unique())
+                    track.mark_finished(from_date, to_date)
+                return
+
+        # ✅ 날짜별 / 티커별로 나눠 저장 (그날 파일이 모두 저장된 날짜만 체크포인트에 기록)
+        if fetch.persist_frame(df_final, valid_tickers, track) and track is not None:
+            track.mark_finished(from_date, to_date)
+
+    except Exception as e:
+        print(f"[ERROR] 데이터 수집 실패: {e}")
+        log_to_db(
+            execution_time=start_time,
+            from_date=from_date,
+            to_date=to_date,
+            tickers=ticker_list,
+            step="FETCH_DATA",
+            status="FAIL",
+            message=f"데이터 수집 실패: {e}",
+            duration_seconds=(datetime.now() - start_time).total_seconds()
+        )
+
+
+def make_parser(description="주식 데이터 수집기"):
+    """🆕 수집기 공통 커맨드라인 인자 (수집기마다 필요한 인자는 더 붙여서 씀)"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("from_date", type=str, nargs="?", default=None, help="시작 날짜 (YYYY-MM-DD)")
+    parser.add_argument("to_date", type=str, nargs="?", default=None, help="종료 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="한 번에 요청할 티커 수")
+    parser.add_argument("--workers", type=int, default=None, help="동시 다운로드 스레드 수")
+    parser.add_argument("--rate", type=float, default=None, help="초당 최대 요청 수")
+    parser.add_argument("--incremental", action="store_true",
+                        help="stock_data 의 티커별 마지막 날짜 이후 구간만 수집")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None,
+                        help="저장 형식 (기본값: OUTPUT_FORMAT 환경 변수 또는 csv)")
+    parser.add_argument("--direct-load", action="store_true",
+                        help="파일을 거치지 않고 stock_data 에 바로 적재")
+    parser.add_argument("--archive", action="store_true",
+                        help="--direct-load 와 함께 쓰면 파일도 저장 (적재 목록에는 남기지 않음)")
+    parser.add_argument("--copy-format", choices=["text", "binary"], default="text",
+                        help="--direct-load 의 COPY 형식")
+    parser.add_argument("--merge-mode", choices=MERGE_MODES, default=None,
+                        help="--direct-load 에서 upsert 면 이미 있는 행도 값이 바뀌었으면 고침 (최근 구간 재수집용, "
+                             "기본값: STOCK_DATA_MERGE_MODE 또는 insert)")
+    parser.add_argument("--window-sessions", type=int, default=None,
+                        help="긴 구간을 거래일 N개 이하 단위로 나눠서 수집 (메모리 예산과 함께 적용)")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help="한 번에 수집할 타일(거래일 window)의 메모리 예산 (기본값: FETCH_MEMORY_BUDGET_MB 또는 1024)")
+    parser.add_argument("--price-dtype", choices=PRICE_DTYPES, default=None,
+                        help="가격 컬럼 메모리 형식 (기본값: FETCH_PRICE_DTYPE 또는 float64)")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None,
+                        help="중단된 run 을 같은 계획으로 이어서 실행 (끝나지 않은 청크 / 날짜만 처리)")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="run 체크포인트를 남기지 않음")
+    return parser
+
+
+def plan_runs(fetch, tickers, args):
+    """날짜 / 증분 인자로 수집 구간을 정하고 메모리 예산에 맞는 타일로 나눔 → (from_date, to_date, 타일 목록)"""
+    # 날짜 설정
+    if args.from_date and args.to_date:
+        from_date = args.from_date
+        to_date = args.to_date
+    elif args.incremental:
+        # 증분 모드: 최대 INCREMENTAL_LOOKBACK_DAYS 일 전까지만 거슬러 올라가서 채움
+        lookback = int(os.getenv("INCREMENTAL_LOOKBACK_DAYS", "30"))
+        _, to_date = get_default_dates()
+        from_date = (datetime.strptime(to_date, "%Y-%m-%d") - timedelta(days=lookback)).strftime("%Y-%m-%d")
+    else:
+        from_date, to_date = get_default_dates()
+    logging.info(f"[INFO] {from_date} ~ {to_date}")
+    print(f"[INFO] {from_date} ~ {to_date}")
+
+    # ✅ 거래일 기준으로 수집 구간 결정 (주말 / 휴장일만 있는 구간은 요청하지 않음)
+    calendar = get_trading_calendar()
+    if args.incremental:
+        marks = load_high_water_marks(fetch.DB_CONFIG, tickers)
+        ranges = plan_incremental_ranges(tickers, marks, from_date, to_date, calendar=calendar)
+        for (range_from, range_to), range_tickers in ranges.items():
+            print(f"[INFO] 증분 구간 {range_from} ~ {range_to}: {len(range_tickers)} tickers")
+        if not ranges:
+            print("[INFO] 모든 티커가 최신 상태입니다.")
+    else:
+        window = calendar.trim_range(from_date, to_date)
+        ranges = {window: tickers} if window else {}
+        if not ranges:
+            print(f"[INFO] {from_date} ~ {to_date} 는 거래일이 없어 건너뜁니다.")
+
+    # ✅ 메모리 예산에 맞춰 거래일 window(타일)로 나눔 (구간이 길어져도 타일 하나의 크기는 일정)
+    budget_mb = fetch.FETCH_MEMORY_BUDGET_MB
+    runs = plan_tiles(ranges, budget_mb * 1024 ** 2, calendar, max_sessions=args.window_sessions)
+    if len(runs) > 1:
+        largest = max(tile_cells(run, calendar) for run in runs)
+        print(f"[INFO] 타일 {len(runs)}개로 나눠서 수집 (타일당 최대 {largest:,} 칸, 예산 {budget_mb:.0f}MB)")
+    return from_date, to_date, runs
+
+
+def main(fetch, args):
+    """수집기 실행: 인자를 fetch 모듈 설정에 반영하고 타일(또는 --resume 의 남은 window)마다 fetch_stock_data"""
+    if args.format:
+        fetch.OUTPUT_FORMAT = args.format
+    fetch.DIRECT_LOAD = args.direct_load
+    fetch.ARCHIVE = args.archive
+    fetch.COPY_FORMAT = args.copy_format
+    if args.merge_mode:
+        fetch.STOCK_DATA_MERGE_MODE = args.merge_mode
+    if args.memory_budget_mb:
+        fetch.FETCH_MEMORY_BUDGET_MB = args.memory_budget_mb
+    if args.price_dtype:
+        fetch.FETCH_PRICE_DTYPE = args.price_dtype
+
+    create_log_table(fetch.DB_CONFIG, fetch.LOG_TABLE_NAME)
+    tickers = load_tickers_from_file(fetch.TICKER_PATH)
+
+    checkpoint = None
+    chunk_size = args.chunk_size
+    if args.resume:
+        # ✅ 이전 run 의 계획(구간 / 티커 / 청크 크기 / 저장 형식)을 그대로 사용
+        checkpoint = RunCheckpoint.load(FETCH_CHECKPOINT_DIR, args.resume)
+        plan = checkpoint.plan
+        from_date, to_date = plan["from_date"], plan["to_date"]
+        fetch.OUTPUT_FORMAT = plan["output_format"]
+        fetch.DIRECT_LOAD = plan["direct_load"]
+        fetch.ARCHIVE = plan["archive"]
+        chunk_size = plan["chunk_size"]
+        runs = checkpoint.windows()
+        print(f"[INFO] run {checkpoint.run_id} 이어서 실행: {from_date} ~ {to_date}, "
+              f"window {len(runs)}개 중 {len(checkpoint.finished)}개 완료")
+    else:
+        from_date, to_date, runs = plan_runs(fetch, tickers, args)
+
+    downloader = make_downloader(chunk_size, args.workers, args.rate)
+    if checkpoint is None and runs and not args.no_checkpoint:
+        checkpoint = RunCheckpoint.create(FETCH_CHECKPOINT_DIR, {
+            "from_date": from_date,
+            "to_date": to_date,
+            "windows": [[[r_from, r_to, list(r_tickers)] for (r_from, r_to), r_tickers in run_ranges.items()]
+                        for run_ranges in runs],
+            "chunk_size": downloader.chunk_size,
+            "output_format": fetch.OUTPUT_FORMAT,
+            "direct_load": fetch.DIRECT_LOAD,
+            "archive": fetch.ARCHIVE,
+        })
+        print(f"[INFO] run_id: {checkpoint.run_id} (중단되면 --resume {checkpoint.run_id} 로 이어서 실행)")
+
+    try:
+        for run_ranges in runs:
+            run_from, run_to = window_bounds(run_ranges)
+            if checkpoint is not None and checkpoint.is_finished(run_from, run_to):
+                print(f"[INFO] {run_from} ~ {run_to} 는 이미 끝난 구간이라 건너뜁니다.")
+                continue
+            fetch_stock_data(fetch, tickers, run_from, run_to, downloader, run_ranges, checkpoint)
+
+        if checkpoint is not None:
+            if checkpoint.close():
+                print(f"[INFO] run {checkpoint.run_id} 완료")
+            else:
+                print(f"[WARN] run {checkpoint.run_id} 에 끝나지 않은 청크 / 날짜가 있습니다: "
+                      f"--resume {checkpoint.run_id}")
+    finally:
+        close_downloader(downloader)
+        fetch.close_resources()
@@ -1,145 +1,87 @@
-import argparse
-import logging
-import time
-import pandas as pd
-import yfinance as yf
 import os
-from datetime import datetime, timedelta
-import pandas_market_calendars as mcal
-from dotenv import load_dotenv
-import psycopg2
-from psycopg2 import sql
-
-
-# .env file load
-load_dotenv()
-
-# PostgreSQL 연결 정보 설정
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST"),
-    "port": os.getenv("DB_PORT"),
-    "dbname": os.getenv("DB_NAME"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASS")
-}
-
-CSV_DIR = os.getenv("CSV_DIR")
-TICKER_PATH = os.getenv("TICKER_FILE_PATH")
-CSV_LOG_DIR = os.getenv("CSV_LOG_DIR")
-
-# 로그 테이블명 지정
-LOG_TABLE_NAME = "stock_data_log"
-
-
-
-def create_log_table():
-    """ 📑 로그 저장을 위한 테이블 생성 함수 """
-    create_table_query = sql.SQL(f"""
-    CREATE TABLE IF NOT EXISTS {LOG_TABLE_NAME} (
-        id SERIAL PRIMARY KEY,
-        execution_time TIMESTAMP NOT NULL,
-        from_date DATE NOT NULL,
-        to_date DATE NOT NULL,
-        tickers TEXT NOT NULL,
-        step TEXT NOT NULL,
-        status TEXT NOT NULL,
-        message TEXT,
-        duration_seconds DOUBLE PRECISION
-    );
-    """)
-
-    conn = None
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        with conn.cursor() as cur:
-            cur.execute(create_table_query)
-            conn.commit()
-    except Exception as e:
-        print(f"[ERROR] 테이블 생성 실패: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-def is_market_closed(date):
-    nyse = mcal.get_calendar("NYSE")
-    holidays = nyse.holidays().holidays
-    is_weekend = date.weekday() in [5,6]
-
-    return date in holidays or is_weekend
-
-def load_tickers_from_file(file_path: str) -> list:
-    """📂 파일에서 Ticker 목록을 불러오는 함수"""
-    tickers = []
-    try:
-        with open(file_path, "r") as f:
-            tickers = [line.strip() for line in f if line.strip()]  # 빈 줄 제외
-        print(f"[INFO] Ticker {len(tickers)}개 로드 완료")
-    except FileNotFoundError:
-        print(f"[ERROR] 파일을 찾을 수 없습니다: {file_path}")
-    except Exception as e:
-        print(f"[ERROR] Ticker 파일 로드 실패: {e}")
-    return tickers
-
-def get_default_dates() -> tuple:
-    """🗓️ 기본 날짜를 전날로 설정"""
-    today = datetime.now().strftime("%Y-%m-%d")
-    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-
-    return yesterday, today
-
-
-# 로그 기록 함수
-def log_to_db(execution_time, from_date, to_date, tickers, step, status, message, duration_seconds):
-    conn = None
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO stock_data_log 
-                (execution_time, from_date, to_date, tickers, step, status, message, duration_seconds) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                (execution_time, from_date, to_date, tickers, step, status, message, duration_seconds)
-            )
-            conn.commit()
-            # print(f"[INFO] 로그 저장 완료: {step} - {status}")
-    except Exception as e:
-        print(f"[ERROR] 로그 저장 실패: {e}")
-    finally:
-        if conn:
-            conn.close()
+import sys
+import threading
+from datetime import datetime
+
+import fetch_runner
+from data_files import ROLE_AGGREGATE, ManifestEntry, data_file_path
+from db_log_writer import StockDataLogWriter
+from fetch_runner import make_parser, save_date_partitions
+from parquet_io import write_parquet
+from settings import (
+    ARCHIVE, COPY_FORMAT, CSV_DIR, DB_CONFIG, DIRECT_LOAD, FETCH_MEMORY_BUDGET_MB, FETCH_PRICE_DTYPE, LOG_TABLE_NAME,
+    OUTPUT_FORMAT, STOCK_DATA_COMPACT, STOCK_DATA_MERGE_MODE, STOCK_DATA_PARTITION_BY, TICKER_PATH, WORK_QUEUE_DB,
+)
+from work_queue import QUEUE_LOCAL, WorkQueue
+
+
+# 설정은 settings 에서 가져와 이 모듈 속성으로 둠 (fetch_runner.main 의 인자 / 벤치마크 / 파이프라인이 바꿈)
+# 저장한 파일은 작업 큐(QUEUE_LOCAL)로 로더(csv_to_db)에 넘김
+
+# 작업 큐 / 로그 기록기는 처음 쓸 때 만듦 (import 만으로 SQLite / spool 파일을 열지 않도록)
+# 벤치마크 / 파이프라인은 모듈 속성에 직접 넣어서 바꿀 수 있음
+work_queue = None
+log_writer = None
+_resource_lock = threading.Lock()
+
+
+def get_work_queue():
+    """저장한 파일을 로더에 넘기는 작업 큐 (처음 호출할 때 생성)"""
+    global work_queue
+    with _resource_lock:
+        if work_queue is None:
+            work_queue = WorkQueue(WORK_QUEUE_DB, QUEUE_LOCAL)
+        return work_queue
+
+
+def get_log_writer():
+    """로그 기록기 (연결 하나로 모아서 일괄 저장, 처음 호출할 때 생성)"""
+    global log_writer
+    with _resource_lock:
+        if log_writer is None:
+            log_writer = StockDataLogWriter.from_env(DB_CONFIG, LOG_TABLE_NAME)
+        return log_writer
+
+
+def close_resources():
+    """만들어 둔 로그 기록기 (남은 로그 저장) / 작업 큐 정리"""
+    global work_queue, log_writer
+    with _resource_lock:
+        if log_writer is not None:
+            log_writer.close()
+            log_writer = None
+        if work_queue is not None:
+            work_queue.close()
+            work_queue = None
+
+
+def log_to_db(**record):
+    """stock_data_log 에 한 건 기록 (execution_time / from_date / to_date / tickers / step / status / message /
+    duration_seconds)"""
+    get_log_writer().write(**record)
 
 
 def save_csv(data, extract_date, tickers, is_monthly=False):
     """ CSV 파일을 저장하고 로그를 남기는 함수 """
     start_time = datetime.now()  # 시작 시간 기록
     try:
-        # 📅 날짜 기반 폴더 구조 생성
-        date_folder_base = extract_date.replace("_", "/")[:7]  # "YYYY/MM"
-        full_date_folder = extract_date.replace("_", "/")  # "YYYY/MM/DD"
-
-        # ✅ 월별/티커별 저장
-        if is_monthly:
-            save_folder = os.path.join(CSV_DIR, date_folder_base, "date_data")
-            file_name = f"ALL_DATA_{extract_date}.csv"
-        else:
-            save_folder = os.path.join(CSV_DIR, full_date_folder)
-            file_name = f"TICKER_DATA_{tickers}_{extract_date}.csv"
+        # 📅 날짜 기반 폴더 구조 생성 (csv: YYYY/MM[/DD], parquet: year=YYYY/month=MM)
+        save_folder, file_name = data_file_path(CSV_DIR, extract_date, tickers, is_monthly, OUTPUT_FORMAT)
 
         os.makedirs(save_folder, exist_ok=True)  # 폴더 생성
 
         file_path = os.path.join(save_folder, file_name)
         message = f"Data: {file_path} 저장 완료"
 
-        # CSV 저장
-        data.to_csv(file_path, index=False)
+        # CSV / Parquet 저장
+        if OUTPUT_FORMAT == "parquet":
+            write_parquet(data, file_path)
+        else:
+            data.to_csv(file_path, index=False)
 
-        # 저장 경로를 로그 파일에 기록 (전체 하나만)
-        if is_monthly:
-            log_file_path = CSV_LOG_DIR
-            with open(log_file_path, "a") as log_file:
-                log_file.write(file_path + "\n")
+        # 저장 경로를 작업 큐에 등록 (전체 하나만, 직접 적재한 데이터는 제외)
+        if is_monthly and not DIRECT_LOAD:
+            get_work_queue().enqueue([ManifestEntry(file_path, ROLE_AGGREGATE, len(data))])
 
         duration_seconds = (datetime.now() - start_time).total_seconds()
         # 📝 로그 작성
@@ -172,140 +114,21 @@ def save_csv(data, extract_date, tickers, is_monthly=False):
         return None
 
 
-
-# 주식 데이터 가져오기
-def fetch_stock_data(tickers, from_date, to_date):
-    ticker_list = ','.join(tickers)
-
-    # ✅ 데이터 추출 시작 로그
-    log_to_db(
-        execution_time=datetime.now(),
-        from_date=from_date,
-        to_date=to_date,
-        tickers=ticker_list,
-        step="START",
-        status="START",
-        message="데이터 추출 시작",
-        duration_seconds=0
-    )
-
-    start_time = datetime.now()
-    retries = 3  # 최대 재시도 횟수
-
-    for attempt in range(retries):
-        try:
-            # ✅ Ticker 데이터를 가져옴 (MultiIndex DataFrame)
-            stock_data = yf.download(tickers, start=from_date, end=to_date, group_by='ticker', threads=True)
-
-
-            # print(stock_data.head(5))
-            # ✅ 모든 데이터가 비어 있는지 확인
-            if stock_data.empty:
-                print("[WARN] 모든 데이터가 없음")
-                log_to_db(
-                    execution_time=start_time,
-                    from_date=from_date,
-                    to_date=to_date,
-                    tickers=ticker_list,
-                    step="FETCH_DATA",
-                    status="FAIL",
-                    message="모든 데이터 없음",
-                    duration_seconds=(datetime.now() - start_time).total_seconds()
-                )
-                return
-
-            valid_tickers = set()  # ✅ 데이터가 있는 티커 리스트
-            data_list = []      # ✅ 유효한 데이터 저장
-
-            # ✅ 티커 목록 추출 (MultiIndex 구조에서 2번째 레벨 값 가져오기)
-            ticker_in_column = stock_data.stack(level=0, future_stack=True).reset_index()
-            # 받아오지 못한 티커 목록 제외
-            missing_tickers = [ticker for ticker in tickers if stock_data[ticker].isna().all().all()]
-
-            down_tickers = list(set(tickers) - set(missing_tickers))
-            print(f"{missing_tickers} 를 제외합니다.")
-            for ticker in down_tickers:
-                df_ticker = ticker_in_column[ticker_in_column["Ticker"] == ticker]
-                if df_ticker[["Open", "High", "Low", "Close", "Volume"]].isna().all().all():
-                    print(f"[WARN] {ticker} 데이터 없음")
-                    log_to_db(
-                        execution_time=start_time,
-                        from_date=from_date,
-                        to_date=to_date,
-                        tickers=ticker,
-                        step="FETCH_DATA",
-                        status="FAIL",
-                        message=str(e),
-                        duration_seconds=(datetime.now() - start_time).total_seconds()
-                    )
-                else:
-                    valid_tickers.add(ticker)  # ✅ 데이터 있는 티커만 추가
-                    df_ticker.reset_index(inplace=True)
-
-                    # ✅ 필요한 컬럼만 선택
-                    df_ticker = df_ticker[['Date', 'Ticker', 'Close', 'High', 'Low', 'Open', 'Volume']]
-                    data_list.append(df_ticker)
+def persist_frame(df_final, valid_tickers, track=None):
+    """💾 날짜별 / 티커별로 나눠 저장 → 모두 저장했는지 (그날 파일이 모두 저장된 날짜만 track 에 기록)"""
+    saved_all = True
+    for date, saved in save_date_partitions(df_final, valid_tickers, save_csv, OUTPUT_FORMAT):
+        if track is not None and saved:
+            track.mark_persisted([date])
+        saved_all = saved_all and saved
+    return saved_all
 
 
-            if not data_list:
-                print("[WARN] 모든 티커의 데이터가 없음")
-                return
-
-            # ✅ 모든 Ticker 데이터를 하나의 DataFrame으로 병합
-            df_final = pd.concat(data_list).reset_index(drop=True)
-
-            # ✅ 필요한 컬럼만 선택
-            df_final = df_final[['Date', 'Ticker', 'Close', 'High', 'Low', 'Open', 'Volume']]
-            df_final = df_final.dropna()  # 결측치가 있는 행 삭제
-            df_final['Volume'] = df_final['Volume'].astype(int)  # 정수형 변환 추가
-
-            # ✅ 날짜별로 나눠 저장
-            for date, df_date in df_final.groupby("Date"):
-                date_str = date.strftime("%Y_%m_%d")  # '2025-03-05' → '2025_03_05'
-                save_csv(df_date, date_str, '_'.join(valid_tickers), is_monthly=True)
-
-                for tick in valid_tickers:
-                    ticker_data = df_date[df_date['Ticker'] == tick]
-                    save_csv(ticker_data, date_str, tick, is_monthly=False)
-
-            break  # 정상적으로 완료되면 루프 종료
+# 주식 데이터 가져오기
+def fetch_stock_data(tickers, from_date, to_date, downloader=None, ranges=None, checkpoint=None):
+    """📈 주식 데이터를 받아 날짜별 / 티커별로 로컬에 저장 (fetch_runner.fetch_stock_data 참고)"""
+    fetch_runner.fetch_stock_data(sys.modules[__name__], tickers, from_date, to_date, downloader, ranges, checkpoint)
 
-        except Exception as e:
-            print(f"[ERROR] 데이터 수집 실패: {e}")
-            if attempt < retries - 1:
-                logging.info(f"[INFO] 데이터 수집 실패, 재시도 중... (Attempt {attempt + 1}/{retries})")
-                time.sleep(5)  # 재시도 간의 딜레이
-            else:
-                log_to_db(
-                    execution_time=start_time,
-                    from_date=from_date,
-                    to_date=to_date,
-                    tickers=ticker_list,
-                    step="FETCH_DATA",
-                    status="FAIL",
-                    message=f"데이터 수집 실패: {e}",
-                    duration_seconds=(datetime.now() - start_time).total_seconds()
-                )
 
 if __name__ == "__main__":
-    create_log_table()
-    tickers = load_tickers_from_file(TICKER_PATH)
-
-    # 🆕 커맨드라인 인자 처리
-    parser = argparse.ArgumentParser(description="주식 데이터 수집기")
-    parser.add_argument("from_date", type=str, nargs="?", default=None, help="시작 날짜 (YYYY-MM-DD)")
-    parser.add_argument("to_date", type=str, nargs="?", default=None, help="종료 날짜 (YYYY-MM-DD)")
-
-    args = parser.parse_args()
-
-    # 날짜 설정
-    if args.from_date and args.to_date:
-        from_date = args.from_date
-        to_date = args.to_date
-    else:
-        from_date, to_date = get_default_dates()
-    logging.info(f"[INFO] {from_date} ~ {to_date}")
-    print(f"[INFO] {from_date} ~ {to_date}")
-
-    fetch_stock_data(tickers, from_date, to_date)
-
+    fetch_runner.main(sys.modules[__name__], make_parser("주식 데이터 수집기").parse_args())
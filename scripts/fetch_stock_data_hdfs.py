@@ -1,172 +1,164 @@
-import argparse
-import logging
-import time
-import yfinance as yf
-import os
-from datetime import datetime, timedelta
-import pandas_market_calendars as mcal
-from dotenv import load_dotenv
-import psycopg2
-from psycopg2 import sql
-from hdfs import InsecureClient
-import pandas as pd
-from io import StringIO
 import os
+import sys
+import threading
+import uuid
 from datetime import datetime
 
-
-# .env file load
-load_dotenv()
-
-# PostgreSQL 연결 정보 설정
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST"),
-    "port": os.getenv("DB_PORT"),
-    "dbname": os.getenv("DB_NAME"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASS")
-}
-
-
-# HDFS 연결 정보 설정
-HDFS_URL = os.getenv("HDFS_URL")
-HDFS_USER = os.getenv("HDFS_USER")
-HDFS_DIR = os.getenv("HDFS_DIR")
-HDFS_CSV_LOG_DIR = os.getenv("HDFS_CSV_LOG_DIR")
-
-# CSV 및 TIcker 파일 경로
-CSV_DIR = os.getenv("CSV_DIR")
-TICKER_PATH = os.getenv("TICKER_FILE_PATH")
-CSV_LOG_DIR = os.getenv("CSV_LOG_DIR")
-
-# 로그 테이블명 지정
-LOG_TABLE_NAME = "stock_data_log"
-
-client = InsecureClient(HDFS_URL, user=HDFS_USER)
-
-
-
-def create_log_table():
-    """ 📑 로그 저장을 위한 테이블 생성 함수 """
-    create_table_query = sql.SQL(f"""
-    CREATE TABLE IF NOT EXISTS {LOG_TABLE_NAME} (
-        id SERIAL PRIMARY KEY,
-        execution_time TIMESTAMP NOT NULL,
-        from_date DATE NOT NULL,
-        to_date DATE NOT NULL,
-        tickers TEXT NOT NULL,
-        step TEXT NOT NULL,
-        status TEXT NOT NULL,
-        message TEXT,
-        duration_seconds DOUBLE PRECISION
-    );
-    """)
-
-    conn = None
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        with conn.cursor() as cur:
-            cur.execute(create_table_query)
-            conn.commit()
-    except Exception as e:
-        print(f"[ERROR] 테이블 생성 실패: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-def is_market_closed(date):
-    nyse = mcal.get_calendar("NYSE")
-    holidays = nyse.holidays().holidays
-    is_weekend = date.weekday() in [5,6]
-
-    return date in holidays or is_weekend
-
-def load_tickers_from_file(file_path: str) -> list:
-    """📂 파일에서 Ticker 목록을 불러오는 함수"""
-    tickers = []
+import fetch_runner
+from data_files import ROLE_AGGREGATE, ROLE_TICKER, ManifestEntry, data_file_path
+from db_log_writer import StockDataLogWriter
+from fetch_runner import make_parser, save_date_partitions
+from hdfs_stream import HdfsUploader, make_hdfs_client, write_hdfs_frame
+from settings import (
+    ARCHIVE, CHECKPOINT_FLUSH_DATES, COPY_FORMAT, DB_CONFIG, DIRECT_LOAD, FETCH_MEMORY_BUDGET_MB, FETCH_PRICE_DTYPE,
+    HDFS_DIR, HDFS_UPLOAD_WORKERS, HDFS_URL, HDFS_USER, LOG_TABLE_NAME, OUTPUT_FORMAT, STOCK_DATA_COMPACT,
+    STOCK_DATA_MERGE_MODE, STOCK_DATA_PARTITION_BY, TICKER_PATH, WORK_QUEUE_DB,
+)
+from work_queue import QUEUE_HDFS, WorkQueue
+
+
+# 설정은 settings 에서 가져와 이 모듈 속성으로 둠 (fetch_runner.main 의 인자 / 벤치마크 / 파이프라인이 바꿈)
+# 업로드한 파일은 작업 큐(QUEUE_HDFS)로 로더(csv_to_db_hdfs)에 넘김
+
+# 작업 큐 / 로그 기록기 / HDFS client 는 처음 쓸 때 만듦 (import 만으로 SQLite / spool 파일이나 HTTP 세션을 열지 않도록)
+# 벤치마크 / 파이프라인은 모듈 속성에 직접 넣어서 바꿀 수 있음
+work_queue = None
+log_writer = None
+client = None
+_resource_lock = threading.Lock()
+
+
+def get_work_queue():
+    """저장한 파일을 로더에 넘기는 작업 큐 (처음 호출할 때 생성)"""
+    global work_queue
+    with _resource_lock:
+        if work_queue is None:
+            work_queue = WorkQueue(WORK_QUEUE_DB, QUEUE_HDFS)
+        return work_queue
+
+
+def get_log_writer():
+    """로그 기록기 (연결 하나로 모아서 일괄 저장, 처음 호출할 때 생성)"""
+    global log_writer
+    with _resource_lock:
+        if log_writer is None:
+            log_writer = StockDataLogWriter.from_env(DB_CONFIG, LOG_TABLE_NAME)
+        return log_writer
+
+
+def get_client():
+    """HDFS client (HDFS_UPLOAD_WORKERS 크기의 연결 풀, 처음 호출할 때 생성)"""
+    global client
+    with _resource_lock:
+        if client is None:
+            client = make_hdfs_client(HDFS_URL, HDFS_USER, pool_size=HDFS_UPLOAD_WORKERS)
+        return client
+
+
+def close_resources():
+    """만들어 둔 로그 기록기 (남은 로그 저장) / 작업 큐 정리"""
+    global work_queue, log_writer
+    with _resource_lock:
+        if log_writer is not None:
+            log_writer.close()
+            log_writer = None
+        if work_queue is not None:
+            work_queue.close()
+            work_queue = None
+
+
+def log_to_db(**record):
+    """stock_data_log 에 한 건 기록 (execution_time / from_date / to_date / tickers / step / status / message /
+    duration_seconds)"""
+    get_log_writer().write(**record)
+
+
+def log_hdfs_csv_path(hdfs_path, role=None, rows=None):
+    """ HDFS에 저장된 CSV 경로를 작업 큐에 등록 """
+    log_hdfs_csv_paths([ManifestEntry(hdfs_path, role, rows)])
+
+
+def log_hdfs_csv_paths(entries):
+    """ 업로드가 끝난 HDFS 경로들을 (역할 / 행 수 / run_id 와 함께) 한 트랜잭션으로 작업 큐에 등록 """
+    if not entries:
+        return
     try:
-        with open(file_path, "r") as f:
-            tickers = [line.strip() for line in f if line.strip()]  # 빈 줄 제외
-        print(f"[INFO] Ticker {len(tickers)}개 로드 완료")
-    except FileNotFoundError:
-        print(f"[ERROR] 파일을 찾을 수 없습니다: {file_path}")
+        get_work_queue().enqueue(entries)
+        print(f"[INFO] HDFS 경로 작업 큐 등록 완료: {len(entries)}개")
     except Exception as e:
-        print(f"[ERROR] Ticker 파일 로드 실패: {e}")
-    return tickers
+        print(f"[ERROR] HDFS 경로 작업 큐 등록 실패: {e}")
 
-def get_default_dates() -> tuple:
-    """🗓️ 기본 날짜를 전날로 설정"""
-    today = datetime.now().strftime("%Y-%m-%d")
-    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
 
-    return yesterday, today
+def record_upload_results(results):
+    """📝 업로드 결과를 DB 로그에 남기고, 성공한 경로만 (업로드 순서대로) 작업 큐에 등록
 
+    한 번의 flush 에서 나온 파일은 같은 run_id 로 기록된다.
+    로더는 같은 run 의 ALL_DATA 가 있으면 그날의 TICKER_DATA 를 다시 적재하지 않음
+    """
+    for result in results:
+        if result.status == "SUCCESS":
+            message = f"Data: {result.hdfs_path} 저장 완료 ({result.attempts}회 시도)"
+        else:
+            message = f"HDFS 저장 실패 ({result.attempts}회 시도): {result.error}"
+            print(f"[ERROR] {result.hdfs_path}: {message}")
+        log_to_db(
+            execution_time=datetime.now(),
+            from_date=result.meta["extract_date"],
+            to_date=result.meta["extract_date"],
+            tickers=result.meta["tickers"],
+            step="SAVE_CSV_HDFS",
+            status=result.status,
+            message=message,
+            duration_seconds=result.seconds
+        )
 
-# 로그 기록 함수
-def log_to_db(execution_time, from_date, to_date, tickers, step, status, message, duration_seconds):
-    conn = None
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO stock_data_log 
-                (execution_time, from_date, to_date, tickers, step, status, message, duration_seconds) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                (execution_time, from_date, to_date, tickers, step, status, message, duration_seconds)
-            )
-            conn.commit()
-            # print(f"[INFO] 로그 저장 완료: {step} - {status}")
-    except Exception as e:
-        print(f"[ERROR] 로그 저장 실패: {e}")
-    finally:
-        if conn:
-            conn.close()
+    # ✅ 직접 적재한 데이터는 작업 큐에 등록하지 않음
+    if not DIRECT_LOAD:
+        run_id = uuid.uuid4().hex[:12]
+        log_hdfs_csv_paths([
+            ManifestEntry(r.hdfs_path, r.meta.get("role"), r.meta.get("rows"), run_id)
+            for r in results if r.status == "SUCCESS"
+        ])
 
+    failed = sum(1 for r in results if r.status != "SUCCESS")
+    print(f"[INFO] HDFS 업로드 {len(results) - failed}개 성공, {failed}개 실패")
 
 
-def log_hdfs_csv_path(hdfs_path):
-    """ HDFS에 저장된 CSV 경로를 로그 파일에 기록 """
-    try:
-        with open(HDFS_CSV_LOG_DIR, "a") as log_file:
-            log_file.write(f"{hdfs_path}\n")
-        print(f"[INFO] HDFS 경로 로그 기록 완료: {hdfs_path}")
-    except Exception as e:
-        print(f"[ERROR] HDFS 경로 로그 기록 실패: {e}")
+def finish_uploads(results, dates, checkpoint=None):
+    """record_upload_results + 파일이 모두 올라간 날짜를 체크포인트에 기록. 반환값: 모두 성공했는지"""
+    record_upload_results(results)
+    failed = {r.meta["extract_date"] for r in results if r.status != "SUCCESS"}
+    if checkpoint is not None:
+        checkpoint.mark_persisted([date for date in dates if date.strftime("%Y_%m_%d") not in failed])
+    return not failed
 
 
+def save_csv_to_hdfs(data, extract_date, tickers, is_monthly=False, uploader=None):
+    """ CSV 파일을 HDFS에 저장하고 로그를 남기는 함수
 
-def save_csv_to_hdfs(data, extract_date, tickers, is_monthly=False):
-    """ CSV 파일을 HDFS에 저장하고 로그를 남기는 함수 """
+    uploader(HdfsUploader) 를 주면 업로드를 예약만 하고 바로 반환한다.
+    결과 로그 / 작업 큐 등록은 uploader.flush() 뒤에 record_upload_results 로 처리.
+    """
     start_time = datetime.now()  # 시작 시간 기록
     try:
-        # 📅 날짜 기반 폴더 구조 생성
-        date_folder_base = extract_date.replace("_", "/")[:7]  # "YYYY/MM"
-        full_date_folder = extract_date.replace("_", "/")  # "YYYY/MM/DD"
-
-        # ✅ 월별/티커별 저장
-        if is_monthly:
-            save_folder = os.path.join(HDFS_DIR, date_folder_base, "date_data")
-            file_name = f"ALL_DATA_{extract_date}.csv"
-        else:
-            save_folder = os.path.join(HDFS_DIR, full_date_folder)
-            file_name = f"TICKER_DATA_{tickers}_{extract_date}.csv"
+        # 📅 날짜 기반 폴더 구조 생성 (csv: YYYY/MM[/DD], parquet: year=YYYY/month=MM)
+        save_folder, file_name = data_file_path(HDFS_DIR, extract_date, tickers, is_monthly, OUTPUT_FORMAT)
 
         # HDFS 경로
         hdfs_path = os.path.join(save_folder, file_name)
 
-        # 데이터프레임을 CSV로 변환
-        csv_buffer = StringIO()
-        data.to_csv(csv_buffer, index=False)
+        role = ROLE_AGGREGATE if is_monthly else ROLE_TICKER
+        if uploader is not None:
+            uploader.submit(hdfs_path, data, OUTPUT_FORMAT, extract_date=extract_date, tickers=tickers,
+                            role=role, rows=len(data))
+            return hdfs_path
 
-        # HDFS에 저장
-        with client.write(hdfs_path, encoding="utf-8", overwrite=True) as writer:
-            writer.write(csv_buffer.getvalue())
+        # 데이터프레임을 CSV / Parquet 로 조각씩 변환하면서 HDFS에 저장 (파일 전체를 메모리에 만들지 않음)
+        write_hdfs_frame(get_client(), hdfs_path, data, OUTPUT_FORMAT)
 
-
-        # ✅ HDFS 경로를 로그 파일에도 기록
-        log_hdfs_csv_path(hdfs_path)
+        # ✅ HDFS 경로를 로그 파일에도 기록 (직접 적재한 데이터는 제외)
+        if not DIRECT_LOAD:
+            log_hdfs_csv_path(hdfs_path, role, len(data))
 
         # 메시지
         message = f"Data: {hdfs_path} 저장 완료"
@@ -205,137 +197,42 @@ def save_csv_to_hdfs(data, extract_date, tickers, is_monthly=False):
         return None
 
 
-# 주식 데이터 가져오기
-def fetch_stock_data(tickers, from_date, to_date):
-    ticker_list = ','.join(tickers)
-
-    # ✅ 데이터 추출 시작 로그
-    log_to_db(
-        execution_time=datetime.now(),
-        from_date=from_date,
-        to_date=to_date,
-        tickers=ticker_list,
-        step="START",
-        status="START",
-        message="데이터 추출 시작",
-        duration_seconds=0
-    )
-
-    start_time = datetime.now()
-    retries = 3  # 최대 재시도 횟수
-
-    for attempt in range(retries):
-        try:
-            # ✅ Ticker 데이터를 가져옴 (MultiIndex DataFrame)
-            stock_data = yf.download(tickers, start=from_date, end=to_date, group_by='ticker', threads=True)
-
-            # ✅ 모든 데이터가 비어 있는지 확인
-            if stock_data.empty:
-                print("[WARN] 모든 데이터가 없음")
-                log_to_db(
-                    execution_time=start_time,
-                    from_date=from_date,
-                    to_date=to_date,
-                    tickers=ticker_list,
-                    step="FETCH_DATA",
-                    status="FAIL",
-                    message="모든 데이터 없음",
-                    duration_seconds=(datetime.now() - start_time).total_seconds()
-                )
-                return
-
-            valid_tickers = set()  # ✅ 데이터가 있는 티커 리스트
-            data_list = []      # ✅ 유효한 데이터 저장
-
-            # ✅ 티커 목록 추출 (MultiIndex 구조에서 2번째 레벨 값 가져오기)
-            ticker_in_column = stock_data.stack(level=0, future_stack=True).reset_index()
-            # 받아오지 못한 티커 목록 제외
-            missing_tickers = [ticker for ticker in tickers if stock_data[ticker].isna().all().all()]
-
-            down_tickers = list(set(tickers) - set(missing_tickers))
-            print(f"{missing_tickers} 를 제외합니다.")
-            for ticker in down_tickers:
-                df_ticker = ticker_in_column[ticker_in_column["Ticker"] == ticker]
-                if df_ticker[["Open", "High", "Low", "Close", "Volume"]].isna().all().all():
-                    print(f"[WARN] {ticker} 데이터 없음")
-                    log_to_db(
-                        execution_time=start_time,
-                        from_date=from_date,
-                        to_date=to_date,
-                        tickers=ticker,
-                        step="FETCH_DATA",
-                        status="FAIL",
-                        message=str(e),
-                        duration_seconds=(datetime.now() - start_time).total_seconds()
-                    )
-                else:
-                    valid_tickers.add(ticker)  # ✅ 데이터 있는 티커만 추가
-                    df_ticker.reset_index(inplace=True)
-
-                    # ✅ 필요한 컬럼만 선택
-                    df_ticker = df_ticker[['Date', 'Ticker', 'Close', 'High', 'Low', 'Open', 'Volume']]
-                    data_list.append(df_ticker)
-
-
-            if not data_list:
-                print("[WARN] 모든 티커의 데이터가 없음")
-                return
-
-            # ✅ 모든 Ticker 데이터를 하나의 DataFrame으로 병합
-            df_final = pd.concat(data_list).reset_index(drop=True)
-
-            # ✅ 필요한 컬럼만 선택
-            df_final = df_final[['Date', 'Ticker', 'Close', 'High', 'Low', 'Open', 'Volume']]
-            df_final = df_final.dropna()  # 결측치가 있는 행 삭제
-            df_final['Volume'] = df_final['Volume'].astype(int)  # 정수형 변환 추가
-
-            # ✅ 날짜별로 나눠 저장
-            for date, df_date in df_final.groupby("Date"):
-                date_str = date.strftime("%Y_%m_%d")  # '2025-03-05' → '2025_03_05'
-                save_csv_to_hdfs(df_date, date_str, '_'.join(valid_tickers), is_monthly=True)
-
-                for tick in valid_tickers:
-                    ticker_data = df_date[df_date['Ticker'] == tick]
-                    save_csv_to_hdfs(ticker_data, date_str, tick, is_monthly=False)
-
-            break  # 정상적으로 완료되면 루프 종료
-
-        except Exception as e:
-            print(f"[ERROR] 데이터 수집 실패: {e}")
-            if attempt < retries - 1:
-                logging.info(f"[INFO] 데이터 수집 실패, 재시도 중... (Attempt {attempt + 1}/{retries})")
-                time.sleep(5)  # 재시도 간의 딜레이
-            else:
-                log_to_db(
-                    execution_time=start_time,
-                    from_date=from_date,
-                    to_date=to_date,
-                    tickers=ticker_list,
-                    step="FETCH_DATA",
-                    status="FAIL",
-                    message=f"데이터 수집 실패: {e}",
-                    duration_seconds=(datetime.now() - start_time).total_seconds()
-                )
+def persist_frame(df_final, valid_tickers, track=None):
+    """💾 날짜별 / 티커별 파일을 HDFS 에 올림 → 모두 올렸는지
 
-if __name__ == "__main__":
-    create_log_table()
-    tickers = load_tickers_from_file(TICKER_PATH)
+    업로드는 스레드 풀에서 겹쳐서 진행하고, 모두 끝난 뒤(flush)에 결과 로그 / 작업 큐 등록
+    track(체크포인트)을 주면 CHECKPOINT_FLUSH_DATES 일마다 flush 해서 업로드가 끝난 날짜를 기록
+    """
+    uploader = HdfsUploader(get_client(), max_workers=HDFS_UPLOAD_WORKERS)
 
-    # 🆕 커맨드라인 인자 처리
-    parser = argparse.ArgumentParser(description="주식 데이터 수집기")
-    parser.add_argument("from_date", type=str, nargs="?", default=None, help="시작 날짜 (YYYY-MM-DD)")
-    parser.add_argument("to_date", type=str, nargs="?", default=None, help="종료 날짜 (YYYY-MM-DD)")
+    def save(data, date_str, tickers, is_monthly):
+        return save_csv_to_hdfs(data, date_str, tickers, is_monthly=is_monthly, uploader=uploader)
+
+    submitted, saved_all = [], True
+    try:
+        for date, saved in save_date_partitions(df_final, valid_tickers, save, OUTPUT_FORMAT):
+            if saved:
+                submitted.append(date)
+            saved_all = saved_all and saved
+            if track is not None and len(submitted) >= CHECKPOINT_FLUSH_DATES:
+                saved_all = finish_uploads(uploader.flush(), submitted, track) and saved_all
+                submitted = []
+    finally:
+        saved_all = finish_uploads(uploader.close(), submitted, track) and saved_all
+    return saved_all
 
-    args = parser.parse_args()
 
-    # 날짜 설정
-    if args.from_date and args.to_date:
-        from_date = args.from_date
-        to_date = args.to_date
-    else:
-        from_date, to_date = get_default_dates()
-    logging.info(f"[INFO] {from_date} ~ {to_date}")
-    print(f"[INFO] {from_date} ~ {to_date}")
+# 주식 데이터 가져오기
+def fetch_stock_data(tickers, from_date, to_date, downloader=None, ranges=None, checkpoint=None):
+    """📈 주식 데이터를 받아 날짜별 / 티커별로 HDFS 에 저장 (fetch_runner.fetch_stock_data 참고)"""
+    fetch_runner.fetch_stock_data(sys.modules[__name__], tickers, from_date, to_date, downloader, ranges, checkpoint)
 
-    fetch_stock_data(tickers, from_date, to_date)
 
+if __name__ == "__main__":
+    parser = make_parser("주식 데이터 수집기 (HDFS 저장)")
+    parser.add_argument("--upload-workers", type=int, default=None,
+                        help="동시 HDFS 업로드 스레드 수 (기본값: HDFS_UPLOAD_WORKERS 또는 8)")
+    args = parser.parse_args()
+    if args.upload_workers:
+        HDFS_UPLOAD_WORKERS = args.upload_workers  # client 는 처음 쓸 때 이 크기로 만듦
+    fetch_runner.main(sys.modules[__name__], args)
@@ -0,0 +1,176 @@
+import io
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from parquet_io import iter_parquet_bytes, parquet_to_csv_buffer
+from pg_load import IteratorReader, iter_frame_csv
+
+
+READ_CHUNK_SIZE = 1 << 20  # HDFS 에서 한 번에 받는 바이트 수
+RANGE_BUFFER_SIZE = 1 << 20  # seek 가능한 읽기의 최소 요청 크기
+WRITE_CHUNK_ROWS = 50_000  # 업로드할 때 CSV 로 한 번에 변환하는 행 수
+
+
+class HdfsStream(IteratorReader):
+    """🌊 HDFS 파일을 chunk_size 바이트씩 받아 읽는 파일 객체 (copy_expert 에 바로 넘길 수 있음)
+
+    close() 하면 WebHDFS 응답도 닫힌다. 메모리에는 조각 하나만 올라간다.
+    """
+
+    def __init__(self, client, hdfs_path, chunk_size=READ_CHUNK_SIZE):
+        self._context = client.read(hdfs_path, chunk_size=chunk_size)
+        super().__init__(self._context.__enter__())
+
+    def close(self):
+        if not self.closed:
+            self._context.__exit__(None, None, None)
+        super().close()
+
+
+class HdfsRangeFile(io.RawIOBase):
+    """🎯 WebHDFS OPEN(offset, length) 로 필요한 구간만 읽는 seek 가능한 파일 객체
+
+    Parquet 처럼 footer 를 먼저 읽어야 하는 형식을 파일 전체를 받지 않고 읽을 때 사용.
+    """
+
+    def __init__(self, client, hdfs_path):
+        self.client = client
+        self.hdfs_path = hdfs_path
+        self.size = client.status(hdfs_path)["length"]
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def readinto(self, buffer):
+        length = min(len(buffer), self.size - self._pos)
+        if length <= 0:
+            return 0
+        view = memoryview(buffer)
+        filled = 0
+        with self.client.read(self.hdfs_path, offset=self._pos, length=length) as reader:
+            while filled < length:
+                n = reader.readinto(view[filled:length])
+                if not n:
+                    break
+                filled += n
+        self._pos += filled
+        return filled
+
+
+def open_hdfs_range_file(client, hdfs_path):
+    """HdfsRangeFile 을 버퍼로 감싸서 작은 읽기(footer 등)가 요청 하나씩 나가지 않게 함"""
+    return io.BufferedReader(HdfsRangeFile(client, hdfs_path), buffer_size=RANGE_BUFFER_SIZE)
+
+
+def open_hdfs_copy_source(client, hdfs_path):
+    """📥 HDFS 파일 → COPY ... WITH CSV HEADER 용 스트리밍 파일 객체 (Parquet 는 row group 단위로 CSV 변환)"""
+    if hdfs_path.endswith(".parquet"):
+        return parquet_to_csv_buffer(open_hdfs_range_file(client, hdfs_path))
+    return HdfsStream(client, hdfs_path)
+
+
+def write_hdfs_frame(client, hdfs_path, data, fmt="csv", chunk_rows=WRITE_CHUNK_ROWS):
+    """📤 DataFrame 을 조각 단위로 직렬화하면서 HDFS 에 업로드 (전체 파일을 메모리에 만들지 않음)"""
+    if fmt == "parquet":
+        chunks = iter_parquet_bytes(data)
+    else:
+        chunks = iter_frame_csv(data, chunk_rows)
+    client.write(hdfs_path, data=chunks, overwrite=True)
+
+
+def make_hdfs_client(url, user, pool_size=10):
+    """🐘 InsecureClient 생성 (업로드 스레드 수만큼 HTTP 연결을 재사용할 수 있도록 풀 크기 지정)"""
+    import requests
+    from hdfs import InsecureClient
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return InsecureClient(url, user=user, session=session)
+
+
+@dataclass
+class UploadResult:
+    """파일 하나의 업로드 결과"""
+    index: int
+    hdfs_path: str
+    meta: dict
+    status: str = "PENDING"
+    attempts: int = 0
+    seconds: float = 0.0
+    error: str = None
+
+
+class HdfsUploader:
+    """📤 HDFS 업로드 스레드 풀
+
+    - client(HTTP 세션) 하나를 max_workers 개 스레드가 함께 사용
+    - 대기 중인 업로드는 max_pending 개까지만 (넘으면 submit 이 기다림)
+    - 실패한 파일만 지수 backoff + jitter 로 max_retries 번까지 재시도
+    - flush() 는 지금까지 넣은 업로드가 모두 끝날 때까지 기다린 뒤 결과를 넣은 순서대로 반환
+    """
+
+    def __init__(self, client, max_workers=8, max_pending=64, max_retries=3, base_delay=0.5, max_delay=30.0):
+        self.client = client
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hdfs-upload")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._futures = []
+
+    def _upload(self, result, data, fmt):
+        began = time.monotonic()
+        try:
+            for attempt in range(self.max_retries + 1):
+                result.attempts = attempt + 1
+                try:
+                    write_hdfs_frame(self.client, result.hdfs_path, data, fmt)
+                    result.status = "SUCCESS"
+                    result.error = None
+                    return result
+                except Exception as e:
+                    result.error = str(e)
+                    if attempt < self.max_retries:
+                        time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt))))
+            result.status = "FAIL"
+            return result
+        finally:
+            result.seconds = time.monotonic() - began
+            self._slots.release()
+
+    def submit(self, hdfs_path, data, fmt="csv", **meta):
+        """업로드 예약. data 는 업로드가 끝날 때까지 바뀌면 안 됨 (재시도 때 다시 직렬화)"""
+        self._slots.acquire()
+        result = UploadResult(len(self._futures), hdfs_path, meta)
+        self._futures.append(self._pool.submit(self._upload, result, data, fmt))
+        return result
+
+    def flush(self):
+        """🚧 지금까지 예약한 업로드가 모두 끝날 때까지 대기. 반환값: [UploadResult] (예약 순서)"""
+        futures, self._futures = self._futures, []
+        return [future.result() for future in futures]
+
+    def close(self):
+        results = self.flush()
+        self._pool.shutdown(wait=True)
+        return results
@@ -0,0 +1,133 @@
+import argparse
+import os
+import time
+from dotenv import load_dotenv
+import psycopg2
+from compact_schema import (
+    COMPACT_PRICE_TYPES, COMPACT_TICKERS_SQL, add_compact_constraints, create_compact_schema, create_compact_view,
+    encode_prices, load_compact_layout, merge_compact_stage, relation_sizes,
+)
+from partitions import iter_periods, period_end
+
+# .env 파일 로드
+load_dotenv()
+
+# PostgreSQL 연결 정보
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST"),
+    "port": os.getenv("DB_PORT"),
+    "dbname": os.getenv("DB_NAME"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASS"),
+}
+
+OLD_TABLE = "stock_data_old"
+
+COPY_YEAR_SQL = """
+    INSERT INTO stock_prices (ticker_id, date, open, high, low, close, volume)
+    SELECT t.ticker_id, s.date, {values}, s.volume
+    FROM stock_data s JOIN stock_tickers t ON t.ticker = s.ticker
+    WHERE s.date >= %s AND s.date < %s AND s.id <= %s
+    ORDER BY s.date, t.ticker_id;
+"""
+
+
+def _has_primary_key(cur, table):
+    cur.execute("SELECT 1 FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p';", (table,))
+    return cur.fetchone() is not None
+
+
+def _format_sizes(heap, indexes):
+    return f"테이블 {heap / 2**20:,.1f}MB + 인덱스 {indexes / 2**20:,.1f}MB = {(heap + indexes) / 2**20:,.1f}MB"
+
+
+def migrate(price_type="fixed", drop_old=False):
+    """🗜️ 기존 stock_data (NUMERIC / TEXT / BIGSERIAL) → compact 스키마
+
+    1. stock_tickers 에 티커 등록, stock_prices (제약 없음) 생성
+    2. 시작 시점의 max(id) 까지의 행을 해마다 date 순으로 복사 (해마다 commit, 다시 실행하면 그 해를 지우고 다시 채움)
+    3. PK (ticker_id, date) / BRIN (date) 를 복사가 끝난 뒤 한 번에 생성
+    4. 한 트랜잭션에서: stock_data 쓰기 잠금 → 그동안 새로 들어온 행(id > max(id)) 반영
+       → stock_data → stock_data_old 로 이름 변경 → 같은 컬럼의 stock_data 뷰 생성
+    2 ~ 3 단계 동안 조회 / INSERT 적재는 계속해도 된다 (upsert 모드 적재는 이미 복사한 행을 고칠 수 있으므로 멈출 것).
+    fixed 는 가격을 소수점 4자리로 반올림해서 저장한다. 그보다 정밀한 값이 있으면 float 을 쓸 것.
+    """
+    started = time.perf_counter()
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            if load_compact_layout(cur) is not None:
+                print("✅ stock_data 는 이미 compact 스키마입니다.")
+                return
+            cur.execute("SELECT to_regclass('stock_data') IS NULL;")
+            if cur.fetchone()[0]:
+                print("❌ stock_data 테이블이 없습니다.")
+                return
+
+            before = relation_sizes(cur, "stock_data")
+            cur.execute("SELECT min(date), max(date), max(id) FROM stock_data;")
+            first, last, max_id = cur.fetchone()
+            create_compact_schema(cur, price_type, constraints=False)
+            cur.execute(COMPACT_TICKERS_SQL.format(table="stock_data"))
+            cur.execute("SELECT count(*) FROM stock_tickers;")
+            tickers = cur.fetchone()[0]
+        conn.commit()
+        years = list(iter_periods(first, last, "year")) if first else []
+        print(f"📂 {first} ~ {last}, 티커 {tickers:,}개, max(id)={max_id}, 가격 형식 {price_type}")
+
+        # 해마다 복사 (다시 실행하면 그 해를 지우고 다시 채움)
+        for start in years:
+            end = period_end(start, "year")
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM stock_prices WHERE date >= %s AND date < %s;", (start, end))
+                cur.execute(COPY_YEAR_SQL.format(values=encode_prices(price_type)), (start, end, max_id))
+                rows = cur.rowcount
+            conn.commit()
+            print(f"  📥 {start.year}: {rows:,}행")
+
+        with conn.cursor() as cur:
+            if not _has_primary_key(cur, "stock_prices"):
+                add_compact_constraints(cur)
+        conn.commit()
+        print("🔑 PK / BRIN 인덱스 생성 완료")
+
+        # 교체: 적재(쓰기)만 막고 조회는 교체 직전까지 계속 가능
+        with conn.cursor() as cur:
+            cur.execute("LOCK TABLE stock_data IN SHARE ROW EXCLUSIVE MODE;")
+            caught_up, _, _ = merge_compact_stage(
+                cur, f"(SELECT * FROM stock_data WHERE id > {int(max_id or 0)})", price_type)
+            cur.execute(f"ALTER TABLE stock_data RENAME TO {OLD_TABLE};")
+            create_compact_view(cur, price_type)
+        conn.commit()
+        print(f"🔀 stock_data 뷰로 교체 완료 (복사 중 새로 들어온 행 {caught_up:,}개 반영)")
+
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE stock_tickers;")
+            cur.execute("ANALYZE stock_prices;")
+            after = [relation_sizes(cur, table) for table in ("stock_prices", "stock_tickers")]
+            if drop_old:
+                cur.execute(f"DROP TABLE {OLD_TABLE};")
+        conn.commit()
+        print(f"📏 이전: {_format_sizes(*before)}")
+        print(f"📏 이후: {_format_sizes(sum(s[0] for s in after), sum(s[1] for s in after))}")
+        if drop_old:
+            print(f"🗑️ {OLD_TABLE} 삭제")
+        else:
+            print(f"ℹ️ 기존 테이블은 {OLD_TABLE} 로 남겨둠 (확인 후 --drop-old 또는 DROP TABLE)")
+        print(f"✅ 마이그레이션 완료: {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ 마이그레이션 실패 (다시 실행하면 이어서 진행): {e}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="기존 stock_data 를 compact 스키마(stock_tickers + stock_prices + 뷰)로 옮기는 스크립트")
+    parser.add_argument("--price-type", choices=COMPACT_PRICE_TYPES,
+                        default=os.getenv("STOCK_DATA_COMPACT") or "fixed",
+                        help="fixed: 가격×10^4 BIGINT (소수점 4자리), float: DOUBLE PRECISION")
+    parser.add_argument("--drop-old", action="store_true", help="교체 후 stock_data_old 삭제")
+    args = parser.parse_args()
+
+    migrate(args.price_type, args.drop_old)
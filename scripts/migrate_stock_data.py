@@ -0,0 +1,145 @@
+import argparse
+import os
+import time
+from dotenv import load_dotenv
+import psycopg2
+from compact_schema import load_compact_layout
+from partitions import (
+    PARTITION_GRANULARITIES, add_partitioned_constraints, create_partitioned_table, create_partitions,
+    iter_periods, load_partitions, partition_name, period_end,
+)
+
+# .env 파일 로드
+load_dotenv()
+
+# PostgreSQL 연결 정보
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST"),
+    "port": os.getenv("DB_PORT"),
+    "dbname": os.getenv("DB_NAME"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASS"),
+}
+
+NEW_TABLE = "stock_data_new"
+OLD_TABLE = "stock_data_old"
+COLUMNS = "id, ticker, date, open, high, low, close, volume"
+
+
+def _rename_indexes(cur, table, old_prefix, new_prefix):
+    """table 의 인덱스(PK / UNIQUE 제약 포함) 이름 앞부분을 바꿈"""
+    cur.execute("SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid = %s::regclass;", (table,))
+    for name, in cur.fetchall():
+        if name.startswith(old_prefix):
+            cur.execute(f"ALTER INDEX {name} RENAME TO {new_prefix}{name[len(old_prefix):]};")
+
+
+def _has_primary_key(cur, table):
+    cur.execute("SELECT 1 FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p';", (table,))
+    return cur.fetchone() is not None
+
+
+def migrate(partition_by="month", drop_old=False):
+    """🔀 기존 단일 stock_data → date 범위 파티션 테이블
+
+    1. stock_data_new (파티션 부모, 제약 없음) + 데이터가 있는 기간의 파티션 생성
+    2. 시작 시점의 max(id) 까지의 행을 파티션마다 date 순으로 복사 (파티션마다 commit, 다시 실행하면 이어서 진행)
+    3. PK (id, date) / UNIQUE (ticker, date) / BRIN (date) 를 복사가 끝난 뒤 한 번에 생성
+    4. 한 트랜잭션에서: stock_data 쓰기 잠금 → 그동안 새로 들어온 행(id > max(id)) 복사
+       → stock_data → stock_data_old, stock_data_new → stock_data 로 이름 교체 → id 시퀀스 소유권 이전
+    적재는 INSERT 만 하므로 2 ~ 3 단계 동안 조회 / 적재를 멈출 필요는 없다. 잠금은 4 단계에서만 잡는다.
+    (upsert 모드 적재는 이미 복사한 행을 고칠 수 있으므로 마이그레이션 동안 멈출 것)
+    """
+    started = time.perf_counter()
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            if load_partitions(cur) is not None:
+                print("✅ stock_data 는 이미 파티션 테이블입니다.")
+                return
+            if load_compact_layout(cur) is not None:
+                print("❌ stock_data 가 compact 스키마의 뷰입니다. 파티션 마이그레이션은 기존 테이블에서만 가능합니다.")
+                return
+            cur.execute("SELECT to_regclass('stock_data') IS NULL;")
+            if cur.fetchone()[0]:
+                print("❌ stock_data 테이블이 없습니다.")
+                return
+
+            cur.execute("SELECT min(date), max(date), max(id) FROM stock_data;")
+            first, last, max_id = cur.fetchone()
+            cur.execute("SELECT pg_get_serial_sequence('stock_data', 'id');")
+            sequence = cur.fetchone()[0]
+
+            create_partitioned_table(cur, NEW_TABLE, sequence=sequence, constraints=False)
+            periods = list(iter_periods(first, last, partition_by)) if first else []
+            create_partitions(cur, periods, partition_by, NEW_TABLE, load_partitions(cur, NEW_TABLE),
+                              prefix="stock_data")
+        conn.commit()
+        print(f"📂 {first} ~ {last}, 파티션 {len(periods)}개 ({partition_by}), max(id)={max_id}")
+
+        # 파티션마다 복사 (다시 실행하면 비우고 다시 채움)
+        for start in periods:
+            partition = partition_name("stock_data", start, partition_by)
+            with conn.cursor() as cur:
+                cur.execute(f"TRUNCATE {partition};")
+                cur.execute(f"""
+                    INSERT INTO {partition} ({COLUMNS})
+                    SELECT {COLUMNS} FROM stock_data
+                    WHERE date >= %s AND date < %s AND id <= %s
+                    ORDER BY date, ticker;
+                """, (start, period_end(start, partition_by), max_id))
+                rows = cur.rowcount
+            conn.commit()
+            print(f"  📥 {partition}: {rows:,}행")
+
+        with conn.cursor() as cur:
+            if not _has_primary_key(cur, NEW_TABLE):
+                add_partitioned_constraints(cur, NEW_TABLE)
+        conn.commit()
+        print("🔑 PK / UNIQUE / BRIN 인덱스 생성 완료")
+
+        # 교체: 적재(쓰기)만 막고 조회는 교체 직전까지 계속 가능
+        with conn.cursor() as cur:
+            cur.execute("LOCK TABLE stock_data IN SHARE ROW EXCLUSIVE MODE;")
+            cur.execute("SELECT DISTINCT date_trunc(%s, date)::date FROM stock_data WHERE id > %s;",
+                        (partition_by, max_id or 0))
+            create_partitions(cur, [day for day, in cur.fetchall()], partition_by, NEW_TABLE,
+                              load_partitions(cur, NEW_TABLE), prefix="stock_data")
+            cur.execute(f"INSERT INTO {NEW_TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM stock_data WHERE id > %s;",
+                        (max_id or 0,))
+            caught_up = cur.rowcount
+
+            cur.execute(f"ALTER TABLE stock_data RENAME TO {OLD_TABLE};")
+            _rename_indexes(cur, OLD_TABLE, "stock_data_", f"{OLD_TABLE}_")
+            cur.execute(f"ALTER TABLE {NEW_TABLE} RENAME TO stock_data;")
+            _rename_indexes(cur, "stock_data", f"{NEW_TABLE}_", "stock_data_")
+            cur.execute(f"ALTER SEQUENCE {sequence} OWNED BY stock_data.id;")
+        conn.commit()
+        print(f"🔀 테이블 교체 완료 (복사 중 새로 들어온 행 {caught_up:,}개 반영)")
+
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE stock_data;")
+            if drop_old:
+                cur.execute(f"DROP TABLE {OLD_TABLE};")
+        conn.commit()
+        if drop_old:
+            print(f"🗑️ {OLD_TABLE} 삭제")
+        else:
+            print(f"ℹ️ 기존 테이블은 {OLD_TABLE} 로 남겨둠 (확인 후 --drop-old 또는 DROP TABLE)")
+        print(f"✅ 마이그레이션 완료: {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ 마이그레이션 실패 (다시 실행하면 이어서 진행): {e}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="기존 stock_data 를 date 범위 파티션 테이블로 옮기는 스크립트")
+    parser.add_argument("--partition-by", choices=PARTITION_GRANULARITIES,
+                        default=os.getenv("STOCK_DATA_PARTITION_BY") or "month")
+    parser.add_argument("--drop-old", action="store_true", help="교체 후 stock_data_old 삭제")
+    args = parser.parse_args()
+
+    migrate(args.partition_by, args.drop_old)
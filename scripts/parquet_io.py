@@ -0,0 +1,137 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pg_load import IteratorReader, iter_frame_csv
+from stock_frame import OUTPUT_COLUMNS, ticker_codes
+
+
+def _parquet_schema(price_type):
+    return pa.schema([
+        ("Date", pa.date32()),
+        ("Ticker", pa.dictionary(pa.int32(), pa.string())),
+        ("Close", price_type),
+        ("High", price_type),
+        ("Low", price_type),
+        ("Open", price_type),
+        ("Volume", pa.int64()),
+    ])
+
+
+# Parquet 컬럼 타입 (Ticker 는 dictionary 인코딩)
+PARQUET_SCHEMA = _parquet_schema(pa.float64())
+# reshape_stock_data(price_dtype="float32") 프레임은 가격을 float32 그대로 저장 (float64 로 넓히면 자릿수가 달라짐)
+PARQUET_SCHEMA_FLOAT32 = _parquet_schema(pa.float32())
+
+PARQUET_COMPRESSION = "zstd"
+PARQUET_ROW_GROUP_ROWS = 1_000_000
+
+
+def frame_schema(data):
+    """프레임 가격 컬럼 타입에 맞는 Parquet 스키마"""
+    return PARQUET_SCHEMA_FLOAT32 if data["Close"].dtype == "float32" else PARQUET_SCHEMA
+
+
+def _ticker_array(ticker):
+    """Ticker 컬럼 → dictionary 배열 (category 면 코드 / 티커 목록을 그대로 사용)"""
+    codes, names = ticker_codes(ticker)
+    if names is None:
+        return pa.array(ticker.astype(str).to_numpy(), type=pa.string()).dictionary_encode()
+    return pa.DictionaryArray.from_arrays(pa.array(codes.astype("int32")), pa.array(names, type=pa.string()))
+
+
+def frame_to_table(data):
+    """📦 저장용 DataFrame 을 타입이 고정된 Arrow 테이블로 변환"""
+    schema = frame_schema(data)
+    price_type = schema.field("Close").type
+    arrays = [
+        pa.array(pd.to_datetime(data["Date"]).to_numpy().astype("datetime64[D]"), type=pa.date32()),
+        _ticker_array(data["Ticker"]),
+        pa.array(data["Close"].to_numpy(), type=price_type),
+        pa.array(data["High"].to_numpy(), type=price_type),
+        pa.array(data["Low"].to_numpy(), type=price_type),
+        pa.array(data["Open"].to_numpy(), type=price_type),
+        pa.array(data["Volume"].to_numpy(), type=pa.int64()),
+    ]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def frame_to_parquet_bytes(data):
+    """DataFrame → 압축된 Parquet 바이트 (HDFS 업로드용)"""
+    sink = pa.BufferOutputStream()
+    pq.write_table(frame_to_table(data), sink, compression=PARQUET_COMPRESSION)
+    return sink.getvalue().to_pybytes()
+
+
+class _ChunkSink(io.RawIOBase):
+    """ParquetWriter 출력을 모아 두었다가 조각 단위로 꺼내는 sink"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_parquet_bytes(data, row_group_rows=PARQUET_ROW_GROUP_ROWS):
+    """📤 DataFrame → Parquet bytes 조각을 row group 단위로 생성 (업로드 스트리밍용)
+
+    전체 파일을 한 번에 만들지 않으므로 추가 메모리는 row group 하나 크기로 제한된다.
+    """
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, frame_schema(data), compression=PARQUET_COMPRESSION) as writer:
+        for start in range(0, max(len(data), 1), row_group_rows):
+            writer.write_table(frame_to_table(data.iloc[start:start + row_group_rows]))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+def write_parquet(data, file_path):
+    """DataFrame → 로컬 Parquet 파일"""
+    pq.write_table(frame_to_table(data), file_path, compression=PARQUET_COMPRESSION)
+
+
+def read_parquet_frame(source, columns=None):
+    """📖 Parquet(경로 / 파일 객체 / 바이트) → OUTPUT_COLUMNS 순서의 DataFrame"""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    table = pq.read_table(source, columns=columns)
+    frame = table.to_pandas(date_as_object=False)
+    return frame[[c for c in OUTPUT_COLUMNS if c in frame.columns]]
+
+
+def iter_parquet_csv(source, batch_rows=100_000):
+    """📤 Parquet → CSV(헤더 포함) bytes 조각을 batch_rows 행씩 생성
+
+    row group 을 차례로 읽으므로 파일 전체를 DataFrame 으로 만들지 않는다.
+    (source 가 seek 가능한 파일 객체면 필요한 구간만 읽음)
+    pre_buffer / use_threads 를 끄지 않으면 pyarrow 가 뒤쪽 row group 까지 미리 읽어서
+    메모리 사용량이 파일 크기에 비례하게 된다.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    yield (",".join(OUTPUT_COLUMNS) + "\n").encode("utf-8")
+    parquet_file = pq.ParquetFile(source, pre_buffer=False)
+    for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=OUTPUT_COLUMNS, use_threads=False):
+        frame = batch.to_pandas(date_as_object=False)
+        yield from iter_frame_csv(frame, chunk_rows=batch_rows, header=False)
+
+
+def parquet_to_csv_buffer(source):
+    """Parquet → COPY ... WITH CSV HEADER 로 넣을 수 있는 스트리밍 파일 객체"""
+    return io.BufferedReader(IteratorReader(iter_parquet_csv(source)), buffer_size=1 << 16)
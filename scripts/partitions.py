@@ -0,0 +1,195 @@
+import re
+
+import psycopg2
+
+
+PARTITION_GRANULARITIES = ("month", "year")
+
+# date 범위 파티션 stock_data
+# - 파티션 테이블의 PRIMARY KEY / UNIQUE 에는 파티션 키가 들어가야 하므로 PK 는 (id, date)
+# - UNIQUE (ticker, date) 는 파티션마다 로컬 인덱스로 만들어져 ON CONFLICT (ticker, date) 에 그대로 쓰임
+# - date 는 BRIN: 날짜 순서로 쌓이는 파티션 안에서 하루치(약 30 페이지)마다 min/max 만 저장
+PARTITIONED_STOCK_DATA_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id BIGINT NOT NULL DEFAULT nextval('{sequence}'),
+        ticker TEXT NOT NULL,
+        date DATE NOT NULL,
+        open NUMERIC,
+        high NUMERIC,
+        low NUMERIC,
+        close NUMERIC,
+        volume BIGINT
+    ) PARTITION BY RANGE (date);
+"""
+
+PARTITIONED_CONSTRAINTS_DDL = """
+    ALTER TABLE {table} ADD PRIMARY KEY (id, date);
+    ALTER TABLE {table} ADD UNIQUE (ticker, date);
+    CREATE INDEX IF NOT EXISTS {table}_date_brin ON {table} USING brin (date) WITH (pages_per_range = 32);
+"""
+
+# 새 파티션은 따로 만든 뒤 ATTACH 한다 (부모에는 SHARE UPDATE EXCLUSIVE 만 걸림 → 적재 / 조회 중에도 가능)
+CREATE_PARTITION_SQL = "CREATE TABLE IF NOT EXISTS {partition} (LIKE {table} INCLUDING DEFAULTS);"
+ATTACH_PARTITION_SQL = "ALTER TABLE {table} ATTACH PARTITION {partition} FOR VALUES FROM (%s) TO (%s);"
+
+# 여러 로더가 같은 파티션을 동시에 만들지 않도록 잡는 advisory lock 키
+PARTITION_LOCK_KEY = 0x5354_4B50  # "STKP"
+
+_PARTITION_NAME_RE = re.compile(r"_p(\d{4})(?:_(\d{2}))?$")
+
+
+def period_start(day, granularity):
+    """날짜가 속한 파티션의 시작일"""
+    return day.replace(month=1, day=1) if granularity == "year" else day.replace(day=1)
+
+
+def period_end(start, granularity):
+    """파티션의 끝(다음 파티션 시작일, 미포함)"""
+    if granularity == "year":
+        return start.replace(year=start.year + 1)
+    return start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+
+
+def partition_name(table, start, granularity):
+    """stock_data_p2024 (year) / stock_data_p2024_01 (month)"""
+    if granularity == "year":
+        return f"{table}_p{start.year}"
+    return f"{table}_p{start.year}_{start.month:02d}"
+
+
+def iter_periods(first, last, granularity):
+    """first ~ last 를 덮는 파티션 시작일들"""
+    start = period_start(first, granularity)
+    while start <= last:
+        yield start
+        start = period_end(start, granularity)
+
+
+def create_partitioned_table(cur, table="stock_data", sequence=None, constraints=True):
+    """📊 date 범위 파티션 테이블 생성
+
+    sequence 를 생략하면 {table}_id_seq 를 만들어 id 컬럼에 소유시킨다 (기존 시퀀스를 주면 그대로 사용).
+    constraints=False 면 PK / UNIQUE / BRIN 은 만들지 않음 (대량 복사 후에 add_partitioned_constraints)
+    """
+    owned = sequence is None
+    sequence = sequence or f"{table}_id_seq"
+    cur.execute(f"CREATE SEQUENCE IF NOT EXISTS {sequence};")
+    cur.execute(PARTITIONED_STOCK_DATA_DDL.format(table=table, sequence=sequence))
+    if owned:
+        cur.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id;")
+    if constraints:
+        add_partitioned_constraints(cur, table)
+
+
+def add_partitioned_constraints(cur, table="stock_data"):
+    """PK (id, date) / UNIQUE (ticker, date) / BRIN (date) 생성 (모든 파티션에 로컬 인덱스로 만들어짐)"""
+    cur.execute(PARTITIONED_CONSTRAINTS_DDL.format(table=table))
+
+
+def load_partitions(cur, table="stock_data"):
+    """파티션 테이블이면 {파티션 이름} 반환, 파티션 테이블이 아니면(또는 없으면) None"""
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL AND pg_get_partkeydef(to_regclass(%s)) IS NOT NULL;",
+                (table, table))
+    if not cur.fetchone()[0]:
+        return None
+    cur.execute("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass;
+    """, (table,))
+    return {name for name, in cur.fetchall()}
+
+
+def create_partitions(cur, periods, granularity, table="stock_data", existing=(), prefix=None):
+    """periods(파티션 시작일) 중 없는 파티션을 만들고 ATTACH. 반환값: 새로 만든 파티션 이름 목록
+
+    prefix: 파티션 이름 앞부분 (기본은 table. 마이그레이션처럼 나중에 이름을 바꿀 부모에 만들 때 사용)
+    """
+    created = []
+    for start in sorted(set(periods)):
+        name = partition_name(prefix or table, start, granularity)
+        if name in existing:
+            continue
+        cur.execute(CREATE_PARTITION_SQL.format(partition=name, table=table))
+        cur.execute(ATTACH_PARTITION_SQL.format(table=table, partition=name),
+                    (start, period_end(start, granularity)))
+        created.append(name)
+    return created
+
+
+class PartitionManager:
+    """🗂️ 적재 전에 stock_data 파티션을 준비하는 관리자
+
+    - stock_data 가 파티션 테이블이 아니면 아무 일도 하지 않음 (처음 한 번만 카탈로그 확인)
+    - 파티션 단위(month / year)는 기존 파티션 이름에서 알아내고, 아직 없으면 partition_by 를 사용
+    - 이미 있는 파티션은 프로세스 안에서 캐시하므로 새 달 / 새 해가 처음 나올 때만 연결을 연다
+    - 파티션은 적재 트랜잭션과 별도의 짧은 트랜잭션에서 만들고 ATTACH 한다
+      (적재 중인 트랜잭션이 부모에 잡은 잠금과 충돌하지 않음)
+    """
+
+    def __init__(self, db_config, partition_by=None, table="stock_data"):
+        self.db_config = db_config
+        self.partition_by = partition_by
+        self.table = table
+        self.granularity = None
+        self._known = None
+        self._checked = False
+
+    def _refresh(self, cur):
+        self._known = load_partitions(cur, self.table)
+        self._checked = True
+        if self._known is None:
+            return
+        self.granularity = self.partition_by or "month"
+        for name in self._known:
+            match = _PARTITION_NAME_RE.search(name)
+            if match:
+                self.granularity = "month" if match.group(2) else "year"
+                break
+
+    @property
+    def partitioned(self):
+        if not self._checked:
+            conn = psycopg2.connect(**self.db_config)
+            try:
+                with conn.cursor() as cur:
+                    self._refresh(cur)
+            finally:
+                conn.close()
+        return self._known is not None
+
+    def ensure(self, days):
+        """days(날짜 목록)가 들어갈 파티션을 준비. 반환값: 새로 만든 파티션 이름 목록"""
+        if not self.partitioned:
+            return []
+        periods = {period_start(day, self.granularity) for day in days if day is not None}
+        missing = {p for p in periods if partition_name(self.table, p, self.granularity) not in self._known}
+        if not missing:
+            return []
+
+        conn = psycopg2.connect(**self.db_config)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s);", (PARTITION_LOCK_KEY,))
+                self._refresh(cur)
+                created = create_partitions(cur, missing, self.granularity, self.table, self._known)
+            conn.commit()
+        finally:
+            conn.close()
+        self._known.update(created)
+        if created:
+            print(f"🗂️ 파티션 생성: {', '.join(created)}")
+        return created
+
+    def ensure_for_table(self, cur, table):
+        """staging 테이블에 들어 있는 날짜들의 파티션을 준비 (cur 는 staging 테이블이 보이는 연결)"""
+        if not self.partitioned:
+            return []
+        cur.execute(f"SELECT DISTINCT date_trunc(%s, date)::date FROM {table};", (self.granularity,))
+        return self.ensure([day for day, in cur.fetchall()])
+
+    def ensure_for_frame(self, frame):
+        """DataFrame 의 Date 컬럼에 있는 날짜들의 파티션을 준비"""
+        if not self.partitioned or frame.empty:
+            return []
+        days = frame["Date"].dt.to_period("M" if self.granularity == "month" else "Y").unique()
+        return self.ensure([period.start_time.date() for period in days])
@@ -0,0 +1,821 @@
+import io
+import os
+import queue
+import struct
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import psycopg2
+
+from compact_schema import COMPACT_PRICE_TYPES, create_compact_schema, load_compact_layout, merge_compact_stage
+from partitions import PARTITION_GRANULARITIES, PartitionManager, create_partitioned_table
+from stock_frame import OUTPUT_COLUMNS, ticker_codes
+
+
+# 여러 로더가 stock_data 를 동시에 만들지 않도록 잡는 advisory lock 키
+STOCK_DATA_LOCK_KEY = 0x5354_4B44  # "STKD"
+
+# 실행마다 만드는 (TEMP 가 아닌) staging 테이블 이름 접두사: 로더가 죽으면 남으므로 시작할 때 sweep_stage_tables 로 정리
+TEMP_STAGE_PREFIX = "stock_data_temp_"
+PARALLEL_STAGE_PREFIX = "stock_data_pstage_"
+
+# COPY 컬럼 순서 (저장 파일의 컬럼 순서와 같음)
+COPY_COLUMNS = "date, ticker, close, high, low, open, volume"
+
+STOCK_DATA_DDL = """
+    CREATE TABLE IF NOT EXISTS stock_data (
+        id BIGSERIAL PRIMARY KEY,
+        ticker TEXT NOT NULL,
+        date DATE NOT NULL,
+        open NUMERIC,
+        high NUMERIC,
+        low NUMERIC,
+        close NUMERIC,
+        volume BIGINT,
+        UNIQUE (ticker, date)
+    );
+"""
+
+STAGE_TABLE_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS {table} (
+        ticker TEXT,
+        date DATE,
+        open NUMERIC,
+        high NUMERIC,
+        low NUMERIC,
+        close NUMERIC,
+        volume BIGINT
+    ) ON COMMIT DELETE ROWS;
+"""
+
+# binary COPY 용 staging 테이블: 클라이언트에서 바로 인코딩할 수 있는 고정 폭 타입 사용
+BINARY_STAGE_TABLE_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS {table} (
+        ticker TEXT,
+        date DATE,
+        open DOUBLE PRECISION,
+        high DOUBLE PRECISION,
+        low DOUBLE PRECISION,
+        close DOUBLE PRECISION,
+        volume BIGINT
+    ) ON COMMIT DELETE ROWS;
+"""
+
+# 배치 로더용: 세션 동안 유지되는 TEMP staging 테이블 (배치마다 병합 후 TRUNCATE)
+SESSION_STAGE_COLUMNS = {
+    "text": "ticker TEXT, date DATE, open NUMERIC, high NUMERIC, low NUMERIC, close NUMERIC, volume BIGINT",
+    "binary": ("ticker TEXT, date DATE, open DOUBLE PRECISION, high DOUBLE PRECISION, "
+               "low DOUBLE PRECISION, close DOUBLE PRECISION, volume BIGINT"),
+}
+
+MERGE_SQL = """
+    INSERT INTO stock_data (ticker, date, open, high, low, close, volume)
+    SELECT ticker, date, open, high, low, close, volume
+    FROM {table}
+    ON CONFLICT (ticker, date) DO NOTHING;
+"""
+
+# float8 → NUMERIC 을 text 로 거쳐서 변환해야 CSV 경로와 같은 (최단 왕복) 자릿수가 저장됨
+BINARY_MERGE_SQL = """
+    INSERT INTO stock_data (ticker, date, open, high, low, close, volume)
+    SELECT ticker, date, open::text::numeric, high::text::numeric,
+           low::text::numeric, close::text::numeric, volume
+    FROM {table}
+    ON CONFLICT (ticker, date) DO NOTHING;
+"""
+
+# 병렬 로더용: 워커들이 함께 쓰는 staging 테이블 (ticker 해시 파티션 + 매니페스트 순번)
+# 파티션 부모는 저장 공간이 없으므로 파티션만 UNLOGGED 로 만듦 (PG 18 부터는 부모에 UNLOGGED 불가)
+PARALLEL_STAGE_DDL = """
+    CREATE TABLE {table} (
+        {columns},
+        file_seq INT NOT NULL DEFAULT current_setting('stock_loader.file_seq')::int
+    ) PARTITION BY HASH (ticker);
+"""
+
+PARALLEL_PARTITION_DDL = """
+    CREATE UNLOGGED TABLE {partition} PARTITION OF {table}
+    FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder});
+"""
+
+# 같은 (ticker, date) 가 여러 파일에 있으면 매니페스트에서 앞선 파일 값을 사용 (순차 적재와 같은 결과)
+PARALLEL_MERGE_SQL = """
+    INSERT INTO stock_data (ticker, date, open, high, low, close, volume)
+    SELECT DISTINCT ON (ticker, date) ticker, date, {values}
+    FROM {partition}
+    ORDER BY ticker, date, {order}
+    ON CONFLICT (ticker, date) DO NOTHING;
+"""
+
+PARALLEL_MERGE_VALUES = {
+    "text": "open, high, low, close, volume",
+    "binary": "open::text::numeric, high::text::numeric, low::text::numeric, close::text::numeric, volume",
+}
+
+MERGE_MODES = ("insert", "upsert")
+
+# upsert 병합: OHLCV 가 바뀐 행만 UPDATE, 없는 행은 INSERT, 값이 같은 행은 건드리지 않음
+# (같은 행을 다시 쓰지 않으므로 튜플 / 인덱스 / WAL 이 늘지 않음)
+# 파티션 테이블에서는 RETURNING xmax 로 신규 / 수정을 구분할 수 없어서 한 문장 안의 CTE 두 개로 나눈다.
+# 두 CTE 는 같은 스냅샷을 보므로 UPDATE 는 이미 있던 행, INSERT 는 없던 행만 다룬다.
+UPSERT_SQL = """
+    WITH source AS MATERIALIZED (
+        SELECT DISTINCT ON (ticker, date) ticker, date, {values}
+        FROM {table}
+        ORDER BY ticker, date{order}
+    ),
+    updated AS (
+        UPDATE stock_data s
+        SET open = src.open, high = src.high, low = src.low, close = src.close, volume = src.volume
+        FROM source src
+        WHERE s.ticker = src.ticker AND s.date = src.date
+          AND (s.open, s.high, s.low, s.close, s.volume)
+              IS DISTINCT FROM (src.open, src.high, src.low, src.close, src.volume)
+        RETURNING 1
+    ),
+    inserted AS (
+        INSERT INTO stock_data (ticker, date, open, high, low, close, volume)
+        SELECT ticker, date, open, high, low, close, volume FROM source
+        ON CONFLICT (ticker, date) DO NOTHING
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM inserted), (SELECT count(*) FROM updated), (SELECT count(*) FROM source);
+"""
+
+CSV_COPY_SQL = f"COPY {{table}} ({COPY_COLUMNS}) FROM STDIN WITH CSV HEADER DELIMITER ',' QUOTE '\"';"
+BINARY_COPY_SQL = f"COPY {{table}} ({COPY_COLUMNS}) FROM STDIN WITH (FORMAT binary);"
+
+COPY_FORMATS = {
+    "text": (STAGE_TABLE_DDL, CSV_COPY_SQL, MERGE_SQL),
+    "binary": (BINARY_STAGE_TABLE_DDL, BINARY_COPY_SQL, BINARY_MERGE_SQL),
+}
+
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+PG_EPOCH_DAYS = 10957  # 1970-01-01 → 2000-01-01
+
+
+class IteratorReader(io.RawIOBase):
+    """🔌 bytes 제너레이터를 copy_expert 가 읽을 수 있는 파일 객체로 감쌈
+
+    read(size) 요청이 올 때마다 필요한 만큼만 제너레이터를 진행하므로
+    전체 내용을 한 번에 메모리에 만들지 않는다.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            try:
+                self._pending = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+        # memoryview 슬라이스라서 조각이 커도 남은 부분을 매번 복사하지 않음
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def iter_frame_csv(frame, chunk_rows=50_000, header=True):
+    """📤 DataFrame → CSV bytes 조각을 chunk_rows 행씩 생성 (header=True 면 헤더 줄부터)"""
+    frame = frame[OUTPUT_COLUMNS]
+    if header:
+        yield (",".join(OUTPUT_COLUMNS) + "\n").encode("utf-8")
+    for start in range(0, len(frame), chunk_rows):
+        chunk = frame.iloc[start:start + chunk_rows]
+        yield chunk.to_csv(index=False, header=False, date_format="%Y-%m-%d").encode("utf-8")
+
+
+def widen_float32(values):
+    """float32 배열 → 각 값의 최단 10진 표현에 가장 가까운 float64 (str(np.float32) → float 와 같은 결과)
+
+    그냥 astype("float64") 하면 123.45 가 123.44999694824219 가 되어 NUMERIC 에 그 자릿수로 저장된다.
+    유효숫자 6~9자리로 반올림해 보면서 float32 로 되돌렸을 때 같은 값이 되는 가장 짧은 자릿수를 고른다.
+    (정수 가수 / 10^k 는 IEEE 나눗셈 한 번이라 그 10진수에 가장 가까운 float64 가 됨)
+    """
+    wide = values.astype("float64")
+    result = wide.copy()
+    pending = np.isfinite(wide) & (wide != 0)
+    exponent = np.floor(np.log10(np.abs(wide, where=pending, out=np.ones_like(wide)))).astype("int64")
+    for digits in range(6, 10):
+        if not pending.any():
+            break
+        idx = np.flatnonzero(pending)
+        scale = digits - 1 - exponent[idx]
+        up = scale >= 0
+        factor = 10.0 ** np.abs(scale)
+        mantissa = np.rint(np.where(up, wide[idx] * factor, wide[idx] / factor))
+        candidate = np.where(up, mantissa / factor, mantissa * factor)
+        ok = candidate.astype("float32") == values[idx]
+        result[idx[ok]] = candidate[ok]
+        pending[idx[ok]] = False
+    return result
+
+
+def _binary_price(values):
+    return widen_float32(values) if values.dtype == np.float32 else values
+
+
+def _binary_row_dtype(ticker_bytes):
+    """티커 길이가 ticker_bytes 인 행 하나의 binary COPY 레이아웃"""
+    return np.dtype([
+        ("n_fields", ">i2"),
+        ("date_len", ">i4"), ("date", ">i4"),
+        ("ticker_len", ">i4"), ("ticker", f"S{ticker_bytes}"),
+        ("close_len", ">i4"), ("close", ">f8"),
+        ("high_len", ">i4"), ("high", ">f8"),
+        ("low_len", ">i4"), ("low", ">f8"),
+        ("open_len", ">i4"), ("open", ">f8"),
+        ("volume_len", ">i4"), ("volume", ">i8"),
+    ])
+
+
+def iter_frame_binary(frame, chunk_rows=100_000):
+    """📤 DataFrame → PostgreSQL binary COPY bytes 조각 생성
+
+    행을 티커 바이트 길이별로 묶으면 각 묶음이 고정 폭 레코드가 되므로,
+    numpy 구조화 배열 하나에 컬럼 단위로 채워서 tobytes() 로 내보낸다.
+    (COPY 는 행 순서를 보장할 필요가 없음)
+    """
+    if frame[OUTPUT_COLUMNS].isna().any().any():
+        raise ValueError("binary COPY 는 결측값이 없는 프레임만 지원합니다")
+
+    codes, names = ticker_codes(frame["Ticker"])
+    if names is None:
+        encoded = frame["Ticker"].astype(str).str.encode("utf-8")
+        lengths = encoded.str.len().to_numpy()
+        encoded = encoded.to_numpy()
+    else:
+        # category 는 티커 목록만 인코딩하고 코드로 펼침
+        name_bytes = np.array([name.encode("utf-8") for name in names], dtype=object)
+        encoded = name_bytes[codes]
+        lengths = np.array([len(name) for name in name_bytes], dtype="int64")[codes]
+    columns = {
+        "date": frame["Date"].to_numpy().astype("datetime64[D]").astype("int64") - PG_EPOCH_DAYS,
+        "ticker": encoded,
+        "close": _binary_price(frame["Close"].to_numpy()),
+        "high": _binary_price(frame["High"].to_numpy()),
+        "low": _binary_price(frame["Low"].to_numpy()),
+        "open": _binary_price(frame["Open"].to_numpy()),
+        "volume": frame["Volume"].to_numpy(),
+    }
+
+    yield PGCOPY_HEADER
+    for ticker_bytes in np.unique(lengths).tolist():
+        positions = np.flatnonzero(lengths == ticker_bytes)
+        dtype = _binary_row_dtype(ticker_bytes)
+        for start in range(0, len(positions), chunk_rows):
+            idx = positions[start:start + chunk_rows]
+            rows = np.empty(len(idx), dtype=dtype)
+            rows["n_fields"] = 7
+            for name, values in columns.items():
+                rows[f"{name}_len"] = ticker_bytes if name == "ticker" else dtype[name].itemsize
+                rows[name] = values[idx]
+            yield rows.tobytes()
+    yield PGCOPY_TRAILER
+
+
+def create_stock_data(cur, partition_by=None, compact=None):
+    """stock_data 가 없으면 생성
+
+    partition_by: None=단일 테이블, month / year=date 범위 파티션 + BRIN
+    compact: fixed / float 면 stock_tickers + stock_prices + stock_data 뷰 (compact_schema 참고, 파티션과 함께 쓸 수 없음)
+    여러 로더가 동시에 호출해도 되도록 트랜잭션이 끝날 때까지 advisory lock 을 잡는다 (호출한 쪽에서 바로 commit 할 것).
+    """
+    # IF NOT EXISTS 만으로는 동시에 만들 때 pg_class 중복 키 오류가 날 수 있음
+    cur.execute("SELECT pg_advisory_xact_lock(%s);", (STOCK_DATA_LOCK_KEY,))
+    if compact is not None:
+        if compact not in COMPACT_PRICE_TYPES:
+            raise ValueError(f"compact 는 {COMPACT_PRICE_TYPES} 중 하나여야 함: {compact}")
+        if partition_by is not None:
+            raise ValueError("compact 스키마는 파티션 테이블로 만들 수 없음")
+        cur.execute("SELECT to_regclass('stock_data') IS NULL;")
+        if cur.fetchone()[0]:
+            create_compact_schema(cur, compact)
+        return
+    if partition_by is None:
+        cur.execute(STOCK_DATA_DDL)
+        return
+    if partition_by not in PARTITION_GRANULARITIES:
+        raise ValueError(f"partition_by 는 {PARTITION_GRANULARITIES} 중 하나여야 함: {partition_by}")
+    cur.execute("SELECT to_regclass('stock_data') IS NULL;")
+    if cur.fetchone()[0]:
+        create_partitioned_table(cur)
+
+
+def merge_stage(cur, table, copy_format="text", merge_mode="insert", order=None):
+    """📤 staging 테이블 → stock_data 병합
+
+    - insert: 이미 있는 (ticker, date) 는 그대로 둠 (ON CONFLICT DO NOTHING)
+    - upsert: OHLCV 가 바뀐 행만 고치고, 같은 행은 다시 쓰지 않음 (수정된 과거 가격 반영)
+    order: staging 에 같은 (ticker, date) 가 여러 번 있을 때 남길 행의 정렬 (예: "file_seq DESC")
+    stock_data 가 compact 스키마의 뷰면 stock_tickers / stock_prices 에 병합한다.
+    반환값: (신규, 수정, 동일) 행 수. insert 모드는 비교하지 않으므로 (신규, 0, None)
+    """
+    if merge_mode not in MERGE_MODES:
+        raise ValueError(f"merge_mode 는 {MERGE_MODES} 중 하나여야 함: {merge_mode}")
+    compact = load_compact_layout(cur)
+    if compact is not None:
+        return merge_compact_stage(cur, table, compact, merge_mode, order)
+    values = PARALLEL_MERGE_VALUES[copy_format]
+    if merge_mode == "upsert":
+        cur.execute(UPSERT_SQL.format(table=table, values=values, order=f", {order}" if order else ""))
+        inserted, updated, total = cur.fetchone()
+        return inserted, updated, total - inserted - updated
+    if order:
+        cur.execute(PARALLEL_MERGE_SQL.format(values=values, partition=table, order=order))
+    else:
+        cur.execute(COPY_FORMATS[copy_format][2].format(table=table))
+    return cur.rowcount, 0, None
+
+
+def format_merge_counts(inserted, updated, unchanged):
+    """병합 결과 요약 (insert 모드는 신규 행 수만)"""
+    if unchanged is None:
+        return f"{inserted:,}행 신규"
+    return f"{inserted:,}행 신규 / {updated:,}행 수정 / {unchanged:,}행 동일"
+
+
+def frame_reader(frame, chunk_rows=50_000, copy_format="text"):
+    """DataFrame 을 COPY 용 파일 객체로 변환 (스트리밍, text=CSV / binary=PGCOPY)"""
+    chunks = iter_frame_binary(frame) if copy_format == "binary" else iter_frame_csv(frame, chunk_rows)
+    return io.BufferedReader(IteratorReader(chunks), buffer_size=1 << 16)
+
+
+def copy_frame(cur, frame, table, copy_format="text"):
+    """DataFrame 을 COPY ... FROM STDIN 으로 table 에 적재"""
+    copy_sql = COPY_FORMATS[copy_format][1]
+    cur.copy_expert(sql=copy_sql.format(table=table), file=frame_reader(frame, copy_format=copy_format))
+
+
+def load_frame(db_config, frame, stage_table="stock_data_stage", copy_format="text", partition_by=None,
+               merge_mode="insert", compact=None):
+    """🚚 DataFrame 을 파일 없이 stock_data 에 바로 적재
+
+    연결 하나에서 세션 전용 TEMP staging 테이블로 COPY 한 뒤 한 번에 병합한다.
+    copy_format="binary" 면 클라이언트에서 PGCOPY 형식으로 인코딩해서 서버의 텍스트 파싱을 줄인다.
+    stock_data 가 파티션 테이블이면 병합 전에 필요한 파티션을 만든다.
+    merge_mode 는 merge_stage, compact 는 create_stock_data 참고. 반환값: (신규, 수정, 동일) 행 수
+    """
+    stage_ddl = COPY_FORMATS[copy_format][0]
+    if copy_format == "binary":
+        stage_table = f"{stage_table}_bin"
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cur:
+            create_stock_data(cur, partition_by, compact)
+        conn.commit()
+        PartitionManager(db_config, partition_by).ensure_for_frame(frame)
+        with conn.cursor() as cur:
+            cur.execute(stage_ddl.format(table=stage_table))
+            copy_frame(cur, frame, stage_table, copy_format)
+            counts = merge_stage(cur, stage_table, copy_format, merge_mode)
+        conn.commit()
+        return counts
+    finally:
+        conn.close()
+
+
+def direct_load(db_config, frame, log, from_date, to_date, tickers, copy_format="text", partition_by=None,
+                merge_mode="insert", compact=None):
+    """🚚 수집한 DataFrame 을 파일을 거치지 않고 stock_data 에 적재 → 성공 여부
+
+    load_frame 으로 적재하고 결과를 log(수집기의 log_to_db) 에 DIRECT_LOAD 단계로 남긴다.
+    """
+    start_time = datetime.now()
+    try:
+        counts = load_frame(db_config, frame, copy_format=copy_format, partition_by=partition_by,
+                            merge_mode=merge_mode, compact=compact)
+        status, message = "SUCCESS", f"{len(frame)}행 중 {format_merge_counts(*counts)}"
+        print(f"[INFO] DB 직접 적재 완료: {message}")
+    except Exception as e:
+        status, message = "FAIL", f"DB 직접 적재 실패: {e}"
+        print(f"[ERROR] {message}")
+
+    log(
+        execution_time=datetime.now(),
+        from_date=from_date,
+        to_date=to_date,
+        tickers=tickers,
+        step="DIRECT_LOAD",
+        status=status,
+        message=message,
+        duration_seconds=(datetime.now() - start_time).total_seconds()
+    )
+    return status == "SUCCESS"
+
+
+def stage_table_name(prefix):
+    """실행마다 다른 staging 테이블 이름 (pid 는 호스트 / 컨테이너끼리 겹칠 수 있으므로 uuid 를 붙임)"""
+    return f"{prefix}{os.getpid()}_{uuid.uuid4().hex[:8]}"
+
+
+class StageTableGuard:
+    """🔐 staging 테이블을 쓰는 동안 그 이름의 session advisory lock 을 잡고 있는 연결
+
+    테이블을 만들기 전에 잡고, 테이블을 지운 뒤 close 한다. 프로세스가 죽으면 연결이 끊기면서 lock 이 풀리므로
+    sweep_stage_tables 는 lock 을 잡을 수 있는 테이블만 남은 것으로 보고 지운다 (다른 호스트의 로더도 구분됨).
+    """
+
+    def __init__(self, db_config, table):
+        self.table = table
+        self.conn = psycopg2.connect(**db_config)
+        self.conn.autocommit = True
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(hashtext(%s));", (table,))
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def sweep_stage_tables(db_config, prefixes=(TEMP_STAGE_PREFIX, PARALLEL_STAGE_PREFIX)):
+    """🧹 죽은 로더가 남긴 staging 테이블 삭제 → 삭제한 테이블 이름 목록
+
+    쓰는 중인 테이블은 StageTableGuard 가 lock 을 잡고 있으므로 건너뜀
+    """
+    conn = psycopg2.connect(**db_config)
+    conn.autocommit = True
+    dropped = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT relname FROM pg_class
+                WHERE relkind IN ('r', 'p') AND NOT relispartition AND pg_table_is_visible(oid)
+                  AND EXISTS (SELECT 1 FROM unnest(%s::text[]) AS p(prefix) WHERE starts_with(relname::text, prefix))
+                ORDER BY relname;
+            """, (list(prefixes),))
+            for (table,) in cur.fetchall():
+                cur.execute("SELECT pg_try_advisory_lock(hashtext(%s));", (table,))
+                if not cur.fetchone()[0]:
+                    continue
+                try:
+                    cur.execute(f'DROP TABLE IF EXISTS "{table}";')
+                    dropped.append(table)
+                finally:
+                    cur.execute("SELECT pg_advisory_unlock(hashtext(%s));", (table,))
+    finally:
+        conn.close()
+    if dropped:
+        print(f"🧹 남아 있던 staging 테이블 {len(dropped)}개 삭제: {', '.join(dropped)}")
+    return dropped
+
+
+class BatchLoader:
+    """📦 연결 하나로 여러 파일을 적재하는 배치 로더
+
+    - 세션 전용 TEMP staging 테이블 하나를 만들어 재사용 (CREATE / DROP 은 세션당 한 번)
+    - 파일마다 SAVEPOINT 안에서 COPY 하므로 실패한 파일만 되돌림
+    - batch_size 개 파일마다 staging → stock_data 를 한 번에 병합 후 TRUNCATE
+    - commit_every 배치마다 commit
+    - stock_data 가 파티션 테이블이면 병합 전에 staging 에 있는 날짜의 파티션을 만든다
+    - merge_mode="upsert" 면 바뀐 행만 고치고 배치마다 신규 / 수정 / 동일 행 수를 출력
+    - 한 배치에 같은 (ticker, date) 가 여러 번 있으면 파일 순번으로 골라서 파일을 하나씩 적재한 것과 같은 결과
+      (insert 는 먼저 COPY 한 파일, upsert 는 나중 파일 값 사용)
+    """
+
+    def __init__(self, db_config, batch_size=50, commit_every=1, copy_format="text",
+                 stage_table="stock_data_batch_stage", partition_by=None, merge_mode="insert", compact=None):
+        self.db_config = db_config
+        self.compact = compact
+        self.merge_mode = merge_mode
+        self.partition_by = partition_by
+        self.partitions = PartitionManager(db_config, partition_by)
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.copy_format = copy_format
+        self.stage_table = stage_table
+        self.conn = None
+        self.stats = {"files": 0, "failed": 0, "rows": 0, "inserted": 0, "updated": 0, "unchanged": None,
+                      "batches": 0, "seconds": 0.0}
+        self._pending_files = 0
+        self._pending_batches = 0
+        self._started = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.flush(commit=True)
+            elif self.conn is not None:
+                self.conn.rollback()
+        finally:
+            self.close()
+
+    def open(self):
+        self._started = time.perf_counter()
+        self.conn = psycopg2.connect(**self.db_config)
+        with self.conn.cursor() as cur:
+            create_stock_data(cur, self.partition_by, self.compact)
+            cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {self.stage_table} "
+                        f"({SESSION_STAGE_COLUMNS[self.copy_format]}, "
+                        f"file_seq INT DEFAULT current_setting('stock_loader.file_seq', true)::int);")
+        self.conn.commit()
+
+    def copy(self, source):
+        """파일 하나를 staging 테이블에 COPY (source: text 는 파일 객체, binary 는 DataFrame)
+
+        반환값: 성공 여부
+        """
+        copy_sql = COPY_FORMATS[self.copy_format][1].format(table=self.stage_table)
+        if self.copy_format == "binary":
+            source = frame_reader(source, copy_format="binary")
+
+        with self.conn.cursor() as cur:
+            cur.execute("SAVEPOINT batch_file;")
+            try:
+                cur.execute("SELECT set_config('stock_loader.file_seq', %s, false);",
+                            (str(self.stats["files"] + self.stats["failed"]),))
+                cur.copy_expert(sql=copy_sql, file=source)
+                self.stats["rows"] += max(cur.rowcount, 0)
+            except Exception as e:
+                cur.execute("ROLLBACK TO SAVEPOINT batch_file;")
+                self.stats["failed"] += 1
+                print(f"❌ COPY 실패: {e}")
+                return False
+            cur.execute("RELEASE SAVEPOINT batch_file;")
+
+        self.stats["files"] += 1
+        self._pending_files += 1
+        if self._pending_files >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self, commit=False):
+        """staging 테이블을 stock_data 에 병합하고 비움"""
+        if self.conn is None:
+            return
+        if self._pending_files:
+            order = "file_seq DESC" if self.merge_mode == "upsert" else "file_seq"
+            with self.conn.cursor() as cur:
+                self.partitions.ensure_for_table(cur, self.stage_table)
+                inserted, updated, unchanged = merge_stage(cur, self.stage_table, self.copy_format,
+                                                           self.merge_mode, order)
+                cur.execute(f"TRUNCATE {self.stage_table};")
+            self.stats["inserted"] += inserted
+            self.stats["updated"] += updated
+            if unchanged is not None:
+                self.stats["unchanged"] = (self.stats["unchanged"] or 0) + unchanged
+                print(f"🔁 배치 {self.stats['batches'] + 1}: {format_merge_counts(inserted, updated, unchanged)}")
+            self.stats["batches"] += 1
+            self._pending_batches += 1
+            self._pending_files = 0
+
+        if commit or self._pending_batches >= self.commit_every:
+            self.conn.commit()
+            self._pending_batches = 0
+
+    def close(self):
+        if self._started is not None:
+            self.stats["seconds"] = time.perf_counter() - self._started
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def report(self):
+        """처리량 요약 문자열"""
+        seconds = self.stats["seconds"] or 1e-9
+        return (f"📊 파일 {self.stats['files']}개 (실패 {self.stats['failed']}), "
+                f"{self.stats['rows']:,}행 COPY / "
+                f"{format_merge_counts(self.stats['inserted'], self.stats['updated'], self.stats['unchanged'])}, "
+                f"배치 {self.stats['batches']}회, {seconds:.2f}s "
+                f"({self.stats['files'] / seconds:.1f} files/s, {self.stats['rows'] / seconds:,.0f} rows/s)")
+
+
+class ParallelLoader:
+    """🚀 여러 연결로 파일을 동시에 적재하는 병렬 로더
+
+    1. COPY 단계: workers 개의 스레드가 각자 연결을 열고 매니페스트의 파일을 나눠 받아
+       이번 실행 전용 UNLOGGED staging 테이블에 COPY (파일마다 commit, 행마다 매니페스트 순번 기록)
+    2. 병합 단계: staging 테이블은 ticker 해시로 workers 개 파티션으로 나뉘어 있으므로
+       워커마다 파티션 하나씩 stock_data 에 병합 → 워커끼리 같은 키를 건드리지 않아 충돌 / 교착이 없음
+       (stock_data 가 date 파티션 테이블이면 병합 전에 staging 에 있는 날짜의 파티션을 먼저 만듦)
+    3. staging 테이블 삭제
+
+    merge_mode="upsert" 면 같은 (ticker, date) 는 매니페스트에서 나중 파일 값을 쓰고, 바뀐 행만 고친다.
+    """
+
+    def __init__(self, db_config, workers=4, copy_format="text", partition_by=None, merge_mode="insert",
+                 compact=None):
+        self.db_config = db_config
+        self.compact = compact
+        self.merge_mode = merge_mode
+        self.workers = workers
+        self.copy_format = copy_format
+        self.partition_by = partition_by
+        self.partitions = PartitionManager(db_config, partition_by)
+        self.stage_table = stage_table_name(PARALLEL_STAGE_PREFIX)
+        self._guard = None
+        self.stats = {"files": 0, "failed": 0, "rows": 0, "inserted": 0, "updated": 0, "unchanged": None,
+                      "copy_seconds": 0.0, "merge_seconds": 0.0}
+
+    def _partition(self, remainder):
+        return f"{self.stage_table}_p{remainder}"
+
+    def _create_stage(self):
+        self._guard = StageTableGuard(self.db_config, self.stage_table)
+        conn = psycopg2.connect(**self.db_config)
+        try:
+            with conn.cursor() as cur:
+                create_stock_data(cur, self.partition_by, self.compact)
+                cur.execute(PARALLEL_STAGE_DDL.format(table=self.stage_table,
+                                                      columns=SESSION_STAGE_COLUMNS[self.copy_format]))
+                for remainder in range(self.workers):
+                    cur.execute(PARALLEL_PARTITION_DDL.format(
+                        partition=self._partition(remainder), table=self.stage_table,
+                        modulus=self.workers, remainder=remainder))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _drop_stage(self):
+        conn = psycopg2.connect(**self.db_config)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {self.stage_table};")
+            conn.commit()
+        finally:
+            conn.close()
+            if self._guard is not None:
+                self._guard.close()
+                self._guard = None
+
+    def _copy_worker(self, tasks, open_source):
+        """큐에서 (순번, 파일) 을 꺼내 COPY. 반환값: (성공한 순번 목록, COPY 행 수)"""
+        copy_sql = COPY_FORMATS[self.copy_format][1].format(table=self.stage_table)
+        loaded, rows = [], 0
+        conn = psycopg2.connect(**self.db_config)
+        try:
+            while True:
+                try:
+                    seq, item = tasks.get_nowait()
+                except queue.Empty:
+                    return loaded, rows
+                try:
+                    source = open_source(item)
+                    if self.copy_format == "binary":
+                        source = frame_reader(source, copy_format="binary")
+                    try:
+                        with conn.cursor() as cur:
+                            cur.execute("SELECT set_config('stock_loader.file_seq', %s, false);", (str(seq),))
+                            cur.copy_expert(sql=copy_sql, file=source)
+                            rows += max(cur.rowcount, 0)
+                    finally:
+                        if hasattr(source, "close"):
+                            source.close()
+                    conn.commit()
+                    loaded.append(seq)
+                except Exception as e:
+                    conn.rollback()
+                    print(f"❌ COPY 실패: {item}: {e}")
+        finally:
+            conn.close()
+
+    def _prepare_partitions(self):
+        conn = psycopg2.connect(**self.db_config)
+        try:
+            with conn.cursor() as cur:
+                self.partitions.ensure_for_table(cur, self.stage_table)
+        finally:
+            conn.close()
+
+    def _merge_worker(self, remainder):
+        """staging 파티션 하나를 병합. 반환값: (신규, 수정, 동일) 행 수"""
+        order = "file_seq DESC" if self.merge_mode == "upsert" else "file_seq"
+        conn = psycopg2.connect(**self.db_config)
+        try:
+            with conn.cursor() as cur:
+                counts = merge_stage(cur, self._partition(remainder), self.copy_format, self.merge_mode, order)
+            conn.commit()
+            return counts
+        finally:
+            conn.close()
+
+    def load(self, items, open_source, sizes=None):
+        """items 를 병렬로 적재
+
+        open_source(item) 은 text 면 CSV 파일 객체, binary 면 DataFrame 을 반환해야 한다.
+        sizes({item: 바이트}) 를 주면 큰 파일부터 나눠줘서 마지막에 큰 파일 하나만 남는 일을 줄인다.
+        (병합 우선순위는 크기와 상관없이 매니페스트 순서)
+        반환값: 적재에 성공한 item 목록 (매니페스트 순서). 병합이 실패하면 예외를 그대로 올린다.
+        """
+        items = list(items)
+        order = range(len(items))
+        if sizes:
+            order = sorted(order, key=lambda seq: -sizes.get(items[seq], 0))
+        tasks = queue.Queue()
+        for seq in order:
+            tasks.put((seq, items[seq]))
+
+        try:
+            # 만드는 도중 실패해도 finally 에서 지우고 guard 를 닫음
+            self._create_stage()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(lambda _: self._copy_worker(tasks, open_source), range(self.workers)))
+            self.stats["copy_seconds"] = time.perf_counter() - started
+
+            loaded = sorted(seq for seqs, _ in results for seq in seqs)
+            self.stats["files"] = len(loaded)
+            self.stats["failed"] = len(items) - len(loaded)
+            self.stats["rows"] = sum(rows for _, rows in results)
+
+            started = time.perf_counter()
+            self._prepare_partitions()
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                merged = list(pool.map(self._merge_worker, range(self.workers)))
+            self.stats["inserted"] = sum(inserted for inserted, _, _ in merged)
+            self.stats["updated"] = sum(updated for _, updated, _ in merged)
+            if self.merge_mode == "upsert":
+                self.stats["unchanged"] = sum(unchanged for _, _, unchanged in merged)
+            self.stats["merge_seconds"] = time.perf_counter() - started
+        finally:
+            self._drop_stage()
+
+        return [items[seq] for seq in loaded]
+
+    def report(self):
+        """처리량 요약 문자열"""
+        seconds = (self.stats["copy_seconds"] + self.stats["merge_seconds"]) or 1e-9
+        return (f"📊 워커 {self.workers}개, 파일 {self.stats['files']}개 (실패 {self.stats['failed']}), "
+                f"{self.stats['rows']:,}행 COPY / "
+                f"{format_merge_counts(self.stats['inserted'], self.stats['updated'], self.stats['unchanged'])}, "
+                f"COPY {self.stats['copy_seconds']:.2f}s + 병합 {self.stats['merge_seconds']:.2f}s "
+                f"({self.stats['files'] / seconds:.1f} files/s, {self.stats['rows'] / seconds:,.0f} rows/s)")
+
+
+def load_targets(db_config, targets, open_source, load_file, size_of=None, hwm=None, copy_format="text",
+                 batch_size=None, commit_every=1, workers=1, partition_by=None, merge_mode="insert", compact=None):
+    """📥 (파일, 배치 키) 들을 stock_data 에 적재 → 적재에 성공한 파일 목록 (csv_to_db / csv_to_db_hdfs 공통)
+
+    - workers > 1: ParallelLoader 로 여러 연결에서 동시에 적재 (size_of(파일) 로 큰 파일부터 나눔, 실패하면 빈 목록)
+    - batch_size : BatchLoader 로 연결 하나 / batch_size 개 파일마다 한 번씩 병합
+    - 그 외      : load_file(파일, copy_format) 으로 파일마다 따로 적재
+    open_source(파일) 은 BatchLoader / ParallelLoader 에 넘길 입력 (text: CSV 파일 객체, binary: DataFrame)
+    hwm(HighWaterMarkIndex) 을 주면 적재한 파일의 배치 키를 기록한다.
+    """
+    options = {"partition_by": partition_by, "merge_mode": merge_mode, "compact": compact}
+
+    if workers > 1:
+        targets = dict(targets)
+        sizes = {f: size_of(f) for f in targets} if size_of else None
+        parallel = ParallelLoader(db_config, workers, copy_format, **options)
+        try:
+            loaded = parallel.load(targets, open_source, sizes)
+        except Exception as e:
+            print(f"❌ 병렬 적재 실패 (작업 큐에서 다시 시도): {e}")
+            return []
+        for csv_file in loaded:
+            if targets[csv_file]:
+                hwm.advance(*targets[csv_file])
+        print(parallel.report())
+        return loaded
+
+    loader = BatchLoader(db_config, batch_size, commit_every, copy_format, **options) if batch_size else None
+    started = time.perf_counter()
+    loaded = []
+
+    if loader:
+        loader.open()
+    try:
+        for csv_file, batch in targets:
+            if loader:
+                source = open_source(csv_file)
+                try:
+                    success = loader.copy(source)
+                finally:
+                    if hasattr(source, "close"):
+                        source.close()
+            else:
+                success = load_file(csv_file, copy_format)
+
+            if success:
+                loaded.append(csv_file)
+                if batch:
+                    hwm.advance(*batch)
+
+        if loader:
+            loader.flush(commit=True)
+    finally:
+        if loader:
+            loader.close()
+
+    if loader:
+        print(loader.report())
+    else:
+        elapsed = time.perf_counter() - started
+        print(f"📊 파일 {len(loaded)}개, {elapsed:.2f}s ({len(loaded) / max(elapsed, 1e-9):.1f} files/s)")
+    return loaded
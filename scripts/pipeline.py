@@ -0,0 +1,173 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+
+# 단계 사이 큐에 넣는 종료 표시 (워커마다 하나씩)
+_STOP = object()
+
+
+@dataclass
+class _Envelope:
+    """단계 사이를 오가는 항목 (started: 소스에 들어온 시각, 끝까지 걸린 시간 계산용)"""
+    payload: object
+    started: float
+
+
+@dataclass
+class StageStats:
+    items_in: int = 0
+    items_out: int = 0
+    errors: int = 0
+    rows: int = 0
+    busy_seconds: float = 0.0     # 워커들이 func 를 실행한 시간 합계
+    wait_in_seconds: float = 0.0  # 입력이 없어서 기다린 시간 합계 (앞 단계가 느림)
+    wait_out_seconds: float = 0.0  # 다음 큐가 가득 차서 기다린 시간 합계 (backpressure, 뒤 단계가 느림)
+    latencies: list = field(default_factory=list)  # 항목 하나 처리 시간
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+class Stage:
+    """파이프라인 단계 하나
+
+    func(payload) 는 다음 단계로 넘길 payload 들의 iterable 을 반환 (0개 이상, 제너레이터 가능)
+    rows(payload) 를 주면 입력 payload 의 행 수를 세서 rows/s 를 보고
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=2, rows=None):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue_size = queue_size
+        self.rows = rows
+        self.stats = StageStats()
+
+
+class Pipeline:
+    """🧵 단계마다 워커 스레드 + 크기 제한 큐로 이어진 파이프라인
+
+    - 단계 i 의 입력 큐는 queue_size 개까지만 쌓이므로, 뒤 단계가 느리면 앞 단계가 put 에서 멈춘다 (backpressure)
+    - submit 도 첫 단계 큐가 가득 차면 기다린다
+    - close() 는 새 입력을 받지 않고 이미 들어온 항목을 끝까지 처리한 뒤(drain) 모든 워커를 정리한다
+    - 단계 func 에서 난 예외는 그 항목만 버리고 errors 에 집계 (파이프라인은 계속 동작)
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+        self.end_to_end = []  # 마지막 단계에서 끝난 항목마다 소스부터 걸린 시간
+        self._lock = threading.Lock()
+        self._exited = [0] * len(stages)
+        self._threads = []
+        self._started = None
+        self._finished = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        for index, stage in enumerate(self.stages):
+            for worker in range(stage.workers):
+                thread = threading.Thread(target=self._worker, args=(index,), name=f"{stage.name}-{worker}",
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def submit(self, payload):
+        """첫 단계에 항목 추가 (큐가 가득 차면 대기)"""
+        self.queues[0].put(_Envelope(payload, time.perf_counter()))
+
+    def close(self):
+        """입력을 닫고 남은 항목을 모두 처리할 때까지 대기"""
+        for _ in range(self.stages[0].workers):
+            self.queues[0].put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._finished = time.perf_counter()
+
+    def _emit(self, index, envelope):
+        stats = self.stages[index].stats
+        if index + 1 == len(self.stages):
+            with self._lock:
+                self.end_to_end.append(time.perf_counter() - envelope.started)
+            return
+        began = time.perf_counter()
+        self.queues[index + 1].put(envelope)
+        waited = time.perf_counter() - began
+        with self._lock:
+            stats.wait_out_seconds += waited
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        stats = stage.stats
+        inbox = self.queues[index]
+        while True:
+            began = time.perf_counter()
+            envelope = inbox.get()
+            waited = time.perf_counter() - began
+            with self._lock:
+                stats.wait_in_seconds += waited
+            if envelope is _STOP:
+                break
+
+            began = time.perf_counter()
+            outputs, busy = 0, 0.0
+            try:
+                rows = stage.rows(envelope.payload) if stage.rows else 0
+                # 출력을 하나씩 넘기면서 처리 (다음 큐에서 기다린 시간은 busy 에서 뺌)
+                for payload in stage.func(envelope.payload):
+                    busy += time.perf_counter() - began
+                    self._emit(index, _Envelope(payload, envelope.started))
+                    outputs += 1
+                    began = time.perf_counter()
+                busy += time.perf_counter() - began
+                with self._lock:
+                    stats.items_in += 1
+                    stats.items_out += outputs
+                    stats.rows += rows
+                    stats.busy_seconds += busy
+                    stats.latencies.append(busy)
+            except Exception as e:
+                busy += time.perf_counter() - began
+                with self._lock:
+                    stats.items_in += 1
+                    stats.items_out += outputs
+                    stats.errors += 1
+                    stats.busy_seconds += busy
+                print(f"[ERROR] {stage.name} 단계 실패: {e}")
+
+        # 이 단계의 마지막 워커가 끝나면 다음 단계에 종료 표시 전달
+        with self._lock:
+            self._exited[index] += 1
+            last = self._exited[index] == stage.workers
+        if last and index + 1 < len(self.stages):
+            for _ in range(self.stages[index + 1].workers):
+                self.queues[index + 1].put(_STOP)
+
+    def report(self):
+        """단계별 처리량 / 지연 시간 + 전체(end-to-end) 지연 요약 문자열"""
+        elapsed = ((self._finished or time.perf_counter()) - (self._started or time.perf_counter())) or 1e-9
+        lines = [f"{'stage':10} {'workers':>7} {'in':>6} {'out':>6} {'err':>4} {'items/s':>8} {'rows/s':>10} "
+                 f"{'p50 s':>7} {'p95 s':>7} {'busy %':>7} {'wait in s':>10} {'wait out s':>11}"]
+        for stage in self.stages:
+            stats = stage.stats
+            with self._lock:
+                latencies = list(stats.latencies)
+            lines.append(
+                f"{stage.name:10} {stage.workers:7} {stats.items_in:6} {stats.items_out:6} {stats.errors:4} "
+                f"{stats.items_in / elapsed:8.2f} {stats.rows / elapsed:10,.0f} "
+                f"{_percentile(latencies, 0.5):7.2f} {_percentile(latencies, 0.95):7.2f} "
+                f"{100 * stats.busy_seconds / (elapsed * stage.workers):7.1f} "
+                f"{stats.wait_in_seconds:10.2f} {stats.wait_out_seconds:11.2f}")
+        with self._lock:
+            end_to_end = list(self.end_to_end)
+        lines.append(f"end-to-end: {len(end_to_end)}개, p50 {_percentile(end_to_end, 0.5):.2f}s, "
+                     f"p95 {_percentile(end_to_end, 0.95):.2f}s, max {max(end_to_end, default=0):.2f}s, "
+                     f"전체 {elapsed:.2f}s")
+        return "\n".join(lines)
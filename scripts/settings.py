@@ -0,0 +1,74 @@
+import os
+
+from dotenv import load_dotenv
+
+from work_queue import DEFAULT_WORK_QUEUE_DB
+
+
+# ⚙️ fetcher / loader 가 같이 쓰는 환경 변수 설정
+# 스크립트는 필요한 이름을 import 해서 자기 모듈 속성으로 씀 (인자 / 벤치마크 / 파이프라인이 모듈마다 바꿀 수 있도록)
+
+# .env file load
+load_dotenv()
+
+# PostgreSQL 연결 정보 설정
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST"),
+    "port": os.getenv("DB_PORT"),
+    "dbname": os.getenv("DB_NAME"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASS")
+}
+
+# HDFS 연결 정보 설정
+HDFS_URL = os.getenv("HDFS_URL")
+HDFS_USER = os.getenv("HDFS_USER")
+HDFS_DIR = os.getenv("HDFS_DIR")
+
+# CSV 및 Ticker 파일 경로
+CSV_DIR = os.getenv("CSV_DIR")
+TICKER_PATH = os.getenv("TICKER_FILE_PATH")
+
+# 예전 텍스트 매니페스트 (로더가 시작할 때 남아 있으면 작업 큐로 옮김)
+CSV_LOG_DIR = os.getenv("CSV_LOG_DIR")
+HDFS_CSV_LOG_DIR = os.getenv("HDFS_CSV_LOG_DIR")
+
+# fetcher → loader 작업 큐 (SQLite WAL). 여러 로더가 동시에 돌아도 파일마다 한 로더만 가져감
+WORK_QUEUE_DB = os.getenv("WORK_QUEUE_DB") or DEFAULT_WORK_QUEUE_DB
+WORK_QUEUE_CLAIM_SIZE = int(os.getenv("WORK_QUEUE_CLAIM_SIZE", "500"))
+WORK_QUEUE_LEASE_SECONDS = int(os.getenv("WORK_QUEUE_LEASE_SECONDS", "1800"))
+
+# 로그 테이블명 지정
+LOG_TABLE_NAME = "stock_data_log"
+
+# 저장 형식 (csv / parquet)
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "csv")
+
+# --direct-load: DataFrame 을 파일 없이 stock_data 에 바로 적재 (--archive 면 파일도 저장, 수집기 인자로 바뀜)
+DIRECT_LOAD = False
+ARCHIVE = False
+COPY_FORMAT = "text"
+
+# stock_data 를 새로 만들 때 date 범위 파티션 단위 (month / year, 비우면 단일 테이블)
+STOCK_DATA_PARTITION_BY = os.getenv("STOCK_DATA_PARTITION_BY") or None
+
+# stock_data 를 새로 만들 때 compact 스키마 가격 형식 (fixed / float, 비우면 기존 NUMERIC 테이블)
+STOCK_DATA_COMPACT = os.getenv("STOCK_DATA_COMPACT") or None
+
+# 이미 있는 (ticker, date) 처리: insert=그대로 둠, upsert=값이 바뀐 행만 고침 (수정된 과거 가격 반영)
+STOCK_DATA_MERGE_MODE = os.getenv("STOCK_DATA_MERGE_MODE") or "insert"
+
+# run 체크포인트 저장 위치 (--resume RUN_ID 로 중단된 run 의 끝나지 않은 청크 / 날짜만 다시 처리)
+FETCH_CHECKPOINT_DIR = os.getenv("FETCH_CHECKPOINT_DIR") or os.path.expanduser("~/.stock_fetch/checkpoints")
+
+# 긴 구간은 (티커 수 × 거래일 수) 가 이 예산에 맞는 거래일 window(타일)로 나눠서 하나씩 수집 / 저장 / 적재
+FETCH_MEMORY_BUDGET_MB = float(os.getenv("FETCH_MEMORY_BUDGET_MB", "1024"))
+
+# 수집한 프레임의 가격 컬럼 형식 (float32: 메모리 절반, 유효숫자 약 7자리로 저장 / 적재)
+FETCH_PRICE_DTYPE = os.getenv("FETCH_PRICE_DTYPE") or "float64"
+
+# HDFS 업로드 스레드 수 (client 의 HTTP 연결 풀도 같은 크기로 만듦)
+HDFS_UPLOAD_WORKERS = int(os.getenv("HDFS_UPLOAD_WORKERS", "8"))
+
+# 체크포인트를 쓸 때 업로드를 기다려서 끝난 날짜를 기록하는 간격 (날짜 수)
+CHECKPOINT_FLUSH_DATES = int(os.getenv("CHECKPOINT_FLUSH_DATES", "20"))
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+
+# 저장/적재 시 사용하는 컬럼 순서 (COPY 컬럼 순서와 동일해야 함)
+OUTPUT_COLUMNS = ["Date", "Ticker", "Close", "High", "Low", "Open", "Volume"]
+PRICE_FIELDS = ["Close", "High", "Low", "Open", "Volume"]
+
+# 가격 컬럼(Close / High / Low / Open) 메모리 형식. float32 는 유효숫자 약 7자리
+PRICE_DTYPES = ("float64", "float32")
+
+# pandas 가 지원하는 가장 큰 datetime 단위 (datetime64[D] 는 pandas 컬럼으로 둘 수 없음)
+DATE_DTYPE = "datetime64[s]"
+
+
+def reshape_stock_data(stock_data, tickers, price_dtype="float64"):
+    """🔄 yf.download MultiIndex 프레임을 한 번에 long 포맷으로 변환
+
+    (Ticker, Price) 컬럼을 (날짜, 티커, 필드) 3차원 배열로 재배치한 뒤
+    결측 티커 판별과 결측 행 제거를 같은 배열 위에서 처리한다.
+    결과 컬럼 타입 (저장 / 적재 함수까지 그대로 유지):
+    - Date: datetime64[s] (날짜 단위로 잘라서 저장)
+    - Ticker: 요청 티커 순서의 category (행마다 문자열 객체를 만들지 않고 int 코드만 가짐)
+    - 가격: price_dtype (float64 / float32), Volume: int64 (결측 행을 걸러낸 배열에서 한 번만 변환)
+    반환값: (df_final, valid_tickers, missing_tickers)
+    """
+    if price_dtype not in PRICE_DTYPES:
+        raise ValueError(f"price_dtype 는 {PRICE_DTYPES} 중 하나여야 함: {price_dtype}")
+    tickers = list(dict.fromkeys(tickers))  # 중복 제거 (순서 유지)
+    columns = pd.MultiIndex.from_product([tickers, PRICE_FIELDS])
+
+    # 요청했지만 응답에 없는 티커는 NaN 컬럼으로 채워짐
+    values = stock_data.reindex(columns=columns).to_numpy(dtype="float64", copy=False)
+    n_dates, n_tickers, n_fields = len(stock_data.index), len(tickers), len(PRICE_FIELDS)
+    cube = values.reshape(n_dates, n_tickers, n_fields)
+
+    nan_mask = np.isnan(cube)
+    missing = nan_mask.all(axis=(0, 2))
+    missing_tickers = [t for t, m in zip(tickers, missing) if m]
+    valid_tickers = [t for t, m in zip(tickers, missing) if not m]
+
+    # 하나라도 결측인 행은 제외 (기존 dropna 와 동일)
+    row_mask = ~nan_mask.any(axis=2).ravel()
+    rows = cube.reshape(n_dates * n_tickers, n_fields)[row_mask]
+
+    days = pd.DatetimeIndex(stock_data.index).to_numpy().astype("datetime64[D]")
+    dates = np.repeat(days, n_tickers)[row_mask].astype(DATE_DTYPE)
+    codes = np.tile(np.arange(n_tickers, dtype=_code_dtype(n_tickers)), n_dates)[row_mask]
+
+    df_final = pd.DataFrame({
+        "Date": dates,
+        "Ticker": pd.Categorical.from_codes(codes, categories=pd.Index(tickers, dtype=object)),
+        "Close": rows[:, 0].astype(price_dtype),
+        "High": rows[:, 1].astype(price_dtype),
+        "Low": rows[:, 2].astype(price_dtype),
+        "Open": rows[:, 3].astype(price_dtype),
+        "Volume": rows[:, 4].astype("int64"),
+    })
+
+    return df_final, valid_tickers, missing_tickers
+
+
+def _code_dtype(n_categories):
+    """category 코드에 쓸 가장 작은 정수 타입"""
+    for dtype in ("int8", "int16", "int32"):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return "int64"
+
+
+def ticker_codes(ticker):
+    """Ticker 컬럼 → (정수 코드 배열, 코드 → 티커 배열). category 가 아니면 (값 배열, None)"""
+    if isinstance(ticker.dtype, pd.CategoricalDtype):
+        return ticker.cat.codes.to_numpy(), ticker.cat.categories.to_numpy(dtype=object)
+    return ticker.to_numpy(), None
+
+
+def _run_starts(*keys):
+    """연속 구간(run)이 시작되는 위치 배열 (마지막에 전체 길이 포함)"""
+    n = len(keys[0])
+    if n == 0:
+        return np.array([0])
+    changed = np.zeros(n - 1, dtype=bool)
+    for key in keys:
+        changed |= key[1:] != key[:-1]
+    return np.concatenate(([0], np.flatnonzero(changed) + 1, [n]))
+
+
+def iter_date_partitions(df_final):
+    """📅 날짜별 프레임과 (티커, 프레임) 목록을 슬라이스로 반환
+
+    df_final 은 reshape_stock_data 결과처럼 날짜 → 티커 순으로 정렬되어 있어야 하며,
+    각 조각은 iloc 슬라이스이므로 행 데이터를 다시 복사하지 않는다.
+    티커별 조각은 순회할 때 만들어지므로 사용하지 않으면 비용이 들지 않는다.
+    """
+    dates = df_final["Date"].to_numpy()
+    # category 면 정수 코드로 구간을 찾고 티커 이름은 조각마다 하나만 꺼냄
+    ticks, names = ticker_codes(df_final["Ticker"])
+
+    date_bounds = _run_starts(dates)
+    key_bounds = _run_starts(dates, ticks)
+
+    def ticker_slices(d_start, d_end):
+        lo, hi = np.searchsorted(key_bounds, [d_start, d_end]).tolist()
+        for t_start, t_end in zip(key_bounds[lo:hi].tolist(), key_bounds[lo + 1:hi + 1].tolist()):
+            yield ticks[t_start] if names is None else names[ticks[t_start]], df_final.iloc[t_start:t_end]
+
+    for d_start, d_end in zip(date_bounds[:-1].tolist(), date_bounds[1:].tolist()):
+        yield pd.Timestamp(dates[d_start]), df_final.iloc[d_start:d_end], ticker_slices(d_start, d_end)
+
+
+def concat_reshaped(frames):
+    """여러 reshape_stock_data 결과를 iter_date_partitions 가 요구하는 날짜 순서로 합침
+
+    Ticker category 가 서로 다르면 pd.concat 이 object 로 바꾸므로, 티커 합집합(정렬)으로 맞춘 뒤 합친다.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    if all(isinstance(frame["Ticker"].dtype, pd.CategoricalDtype) for frame in frames):
+        categories = pd.Index(sorted(set().union(*(frame["Ticker"].cat.categories for frame in frames))),
+                              dtype=object)
+        frames = [frame.assign(Ticker=frame["Ticker"].cat.set_categories(categories)) for frame in frames]
+    return pd.concat(frames, ignore_index=True).sort_values(["Date", "Ticker"], kind="stable",
+                                                            ignore_index=True)
@@ -0,0 +1,206 @@
+import argparse
+import importlib
+import os
+import signal
+import threading
+from datetime import datetime, timedelta
+
+from backfill_planner import plan_tiles
+from checkpoints import window_bounds
+from data_files import load_tickers_from_file
+from db_log_writer import create_log_table
+from downloader import close_downloader, log_chunk_results, make_downloader
+from fetch_runner import load_direct, save_date_partitions
+from pg_load import MERGE_MODES
+from pipeline import Pipeline, Stage
+from stock_frame import PRICE_DTYPES, reshape_stock_data
+from trading_calendar import get_default_dates, get_trading_calendar
+from watermarks import load_high_water_marks, plan_incremental_ranges
+
+
+def plan_units(fetch, tickers, from_date, to_date, window_sessions, incremental):
+    """수집 단위 목록 [{(from_date, to_date): [tickers]}] (window_sessions 거래일 이하, 메모리 예산 이하)
+
+    incremental 이면 stock_data 의 티커별 마지막 날짜 이후 구간만
+    예산은 단위 하나 기준 (동시에 처리 중인 단위는 단계별 워커 수 + 큐 크기만큼)
+    """
+    calendar = get_trading_calendar()
+    if incremental:
+        marks = load_high_water_marks(fetch.DB_CONFIG, tickers)
+        ranges = plan_incremental_ranges(tickers, marks, from_date, to_date, calendar=calendar)
+    else:
+        window = calendar.trim_range(from_date, to_date)
+        ranges = {window: tickers} if window else {}
+    return plan_tiles(ranges, fetch.FETCH_MEMORY_BUDGET_MB * 1024 ** 2, calendar, max_sessions=window_sessions)
+
+
+def build_pipeline(fetch, downloader, storage, workers, queue_size):
+    """다운로드 → reshape → 파일 저장 → DB 적재 파이프라인 (storage=none 이면 저장 단계 없음)
+
+    fetch 는 fetch_stock_data / fetch_stock_data_hdfs 모듈 (설정 / 저장 / 로그 함수를 그대로 사용)
+    """
+
+    def download(unit):
+        for (range_from, range_to), range_tickers in unit.items():
+            stock_data, chunk_results = downloader.download(range_tickers, range_from, range_to)
+            log_chunk_results(chunk_results, range_from, range_to, fetch.log_to_db)
+            if stock_data.empty:
+                print(f"[WARN] {range_from} ~ {range_to}: 모든 데이터가 없음")
+                continue
+            yield range_from, range_to, range_tickers, stock_data
+
+    def reshape(item):
+        range_from, range_to, range_tickers, stock_data = item
+        frame, valid, missing = reshape_stock_data(stock_data, range_tickers, fetch.FETCH_PRICE_DTYPE)
+        if missing:
+            print(f"[WARN] {range_from} ~ {range_to}: {len(missing)}개 티커 데이터 없음")
+            fetch.log_to_db(
+                execution_time=datetime.now(),
+                from_date=range_from,
+                to_date=range_to,
+                tickers=','.join(missing),
+                step="FETCH_DATA",
+                status="FAIL",
+                message="데이터 없음",
+                duration_seconds=0
+            )
+        if not frame.empty:
+            yield range_from, range_to, valid, frame
+
+    def persist(item):
+        _, _, valid, frame = item
+        # HDFS 는 구간 하나의 파일을 업로더 스레드 풀로 올리고 끝날 때까지 기다림
+        uploader = (fetch.HdfsUploader(fetch.get_client(), max_workers=fetch.HDFS_UPLOAD_WORKERS)
+                    if storage == "hdfs" else None)
+
+        def save(data, date_str, tickers, is_monthly):
+            if uploader is not None:
+                return fetch.save_csv_to_hdfs(data, date_str, tickers, is_monthly=is_monthly, uploader=uploader)
+            return fetch.save_csv(data, date_str, tickers, is_monthly=is_monthly)
+
+        try:
+            for _ in save_date_partitions(frame, valid, save, fetch.OUTPUT_FORMAT):
+                pass
+        finally:
+            if uploader is not None:
+                fetch.record_upload_results(uploader.close())
+        yield item
+
+    def load(item):
+        range_from, range_to, valid, frame = item
+        if not load_direct(fetch, frame, range_from, range_to, ','.join(valid)):
+            raise RuntimeError(f"{range_from} ~ {range_to} 적재 실패")
+        yield range_from, range_to
+
+    def frame_rows(item):
+        return len(item[3])
+
+    stages = [
+        Stage("download", download, workers["download"], queue_size),
+        Stage("reshape", reshape, workers["reshape"], queue_size),
+    ]
+    if storage != "none":
+        stages.append(Stage("persist", persist, workers["persist"], queue_size, rows=frame_rows))
+    stages.append(Stage("load", load, workers["load"], queue_size, rows=frame_rows))
+    return Pipeline(stages)
+
+
+def run_cycle(fetch, downloader, units, args, workers, stop):
+    """수집 단위들을 파이프라인으로 처리하고 drain 후 단계별 보고 출력 → 처리를 마친 단위 수"""
+    pipeline = build_pipeline(fetch, downloader, args.storage, workers, args.queue_size).start()
+    submitted = 0
+    try:
+        for unit in units:
+            if stop.is_set():
+                print(f"[INFO] 종료 요청: 남은 {len(units) - submitted}개 구간은 건너뛰고 들어온 작업만 마무리")
+                break
+            range_from, range_to = window_bounds(unit)
+            print(f"[INFO] 구간 추가 {range_from} ~ {range_to}")
+            pipeline.submit(unit)
+            submitted += 1
+    finally:
+        pipeline.close()
+    print(pipeline.report())
+    return submitted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="다운로드 → reshape → 파일 저장 → DB 적재를 단계별로 동시에 실행하는 수집 데몬")
+    parser.add_argument("from_date", type=str, nargs="?", default=None, help="시작 날짜 (YYYY-MM-DD)")
+    parser.add_argument("to_date", type=str, nargs="?", default=None, help="종료 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--storage", choices=["local", "hdfs", "none"], default="local",
+                        help="파일 저장 위치 (none: 파일 없이 DB 에만 적재)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None,
+                        help="저장 형식 (기본값: OUTPUT_FORMAT 환경 변수 또는 csv)")
+    parser.add_argument("--window-sessions", type=int, default=5,
+                        help="파이프라인에 넣는 단위: 거래일 N개 이하")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help="단위 하나의 메모리 예산 (기본값: FETCH_MEMORY_BUDGET_MB 또는 1024)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="한 번에 요청할 티커 수")
+    parser.add_argument("--workers", type=int, default=None, help="구간 하나를 받을 때 동시 다운로드 스레드 수")
+    parser.add_argument("--rate", type=float, default=None, help="초당 최대 요청 수 (모든 다운로드 워커 공유)")
+    for stage, default in [("download", 1), ("reshape", 1), ("persist", 2), ("load", 2)]:
+        parser.add_argument(f"--{stage}-workers", type=int, default=default, help=f"{stage} 단계 워커 수")
+    parser.add_argument("--queue-size", type=int, default=2,
+                        help="단계 사이 큐에 쌓아둘 구간 수 (가득 차면 앞 단계가 기다림)")
+    parser.add_argument("--copy-format", choices=["text", "binary"], default="text", help="DB 적재 COPY 형식")
+    parser.add_argument("--price-dtype", choices=PRICE_DTYPES, default=None,
+                        help="가격 컬럼 메모리 형식 (기본값: FETCH_PRICE_DTYPE 또는 float64)")
+    parser.add_argument("--merge-mode", choices=MERGE_MODES, default=None,
+                        help="이미 있는 (ticker, date) 처리 (기본값: STOCK_DATA_MERGE_MODE 또는 insert)")
+    parser.add_argument("--follow", action="store_true",
+                        help="구간을 다 처리한 뒤에도 --interval 초마다 새 거래일을 증분 수집 (종료: SIGINT / SIGTERM)")
+    parser.add_argument("--interval", type=int, default=3600, help="--follow 의 확인 간격 (초)")
+    args = parser.parse_args()
+
+    # 파일 저장 / 적재 / 로그는 기존 수집기 모듈의 함수를 그대로 사용
+    fetch = importlib.import_module("fetch_stock_data_hdfs" if args.storage == "hdfs" else "fetch_stock_data")
+    fetch.DIRECT_LOAD = True  # DB 에 바로 적재하므로 파일은 작업 큐에 등록하지 않음
+    fetch.ARCHIVE = args.storage != "none"
+    fetch.COPY_FORMAT = args.copy_format
+    if args.format:
+        fetch.OUTPUT_FORMAT = args.format
+    if args.merge_mode:
+        fetch.STOCK_DATA_MERGE_MODE = args.merge_mode
+    if args.memory_budget_mb:
+        fetch.FETCH_MEMORY_BUDGET_MB = args.memory_budget_mb
+    if args.price_dtype:
+        fetch.FETCH_PRICE_DTYPE = args.price_dtype
+    workers = {stage: getattr(args, f"{stage}_workers") for stage in ["download", "reshape", "persist", "load"]}
+
+    # SIGINT / SIGTERM: 새 구간은 넣지 않고 이미 들어온 구간을 끝까지 처리한 뒤 종료
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        if not stop.is_set():
+            print(f"[INFO] 신호 {signum} 수신: 파이프라인을 비우고 종료합니다.")
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    create_log_table(fetch.DB_CONFIG, fetch.LOG_TABLE_NAME)
+    tickers = load_tickers_from_file(fetch.TICKER_PATH)
+    downloader = make_downloader(args.chunk_size, args.workers, args.rate)
+    lookback = int(os.getenv("INCREMENTAL_LOOKBACK_DAYS", "30"))
+
+    try:
+        if args.from_date and args.to_date:
+            units = plan_units(fetch, tickers, args.from_date, args.to_date, args.window_sessions, incremental=False)
+            run_cycle(fetch, downloader, units, args, workers, stop)
+        while (args.follow or not (args.from_date and args.to_date)) and not stop.is_set():
+            # 증분: 티커별 마지막 날짜 이후 ~ 직전 거래일 (최대 INCREMENTAL_LOOKBACK_DAYS 일 전까지)
+            _, to_date = get_default_dates()
+            from_date = (datetime.strptime(to_date, "%Y-%m-%d") - timedelta(days=lookback)).strftime("%Y-%m-%d")
+            units = plan_units(fetch, tickers, from_date, to_date, args.window_sessions, incremental=True)
+            if units:
+                run_cycle(fetch, downloader, units, args, workers, stop)
+            else:
+                print("[INFO] 모든 티커가 최신 상태입니다.")
+            if not args.follow:
+                break
+            stop.wait(args.interval)
+    finally:
+        close_downloader(downloader)
+        fetch.close_resources()
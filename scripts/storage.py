@@ -0,0 +1,144 @@
+import os
+import posixpath
+import shutil
+
+
+class LocalStorage:
+    """💾 로컬 파일 시스템 (CSV_DIR)"""
+
+    join = staticmethod(os.path.join)
+
+    def list(self, path):
+        """디렉터리 항목 → [(이름, {'type', 'length', 'modificationTime'})] (WebHDFS 와 같은 모양)"""
+        entries = []
+        with os.scandir(path) as it:
+            for entry in it:
+                stat = entry.stat()
+                entries.append((entry.name, {
+                    "type": "DIRECTORY" if entry.is_dir() else "FILE",
+                    "length": stat.st_size,
+                    "modificationTime": int(stat.st_mtime * 1000),
+                }))
+        return sorted(entries)
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def open_read(self, path, encoding=None):
+        return open(path, "r" if encoding else "rb", encoding=encoding)
+
+    def read_bytes(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def write_bytes(self, path, data):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def write_chunks(self, path, chunks):
+        """bytes 조각 제너레이터를 차례로 기록 (파일 전체를 메모리에 만들지 않음)"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+
+    def makedirs(self, path):
+        os.makedirs(path, exist_ok=True)
+
+    def rename(self, src, dst):
+        os.rename(src, dst)
+
+    def delete(self, path, recursive=False):
+        if os.path.isdir(path):
+            if recursive:
+                shutil.rmtree(path)
+            else:
+                os.rmdir(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+class HdfsStorage:
+    """🐘 HDFS (WebHDFS, hdfs.InsecureClient)"""
+
+    join = staticmethod(posixpath.join)
+
+    def __init__(self, client):
+        self.client = client
+
+    def list(self, path):
+        return sorted(self.client.list(path, status=True))
+
+    def exists(self, path):
+        return self.client.status(path, strict=False) is not None
+
+    def open_read(self, path, encoding=None):
+        return self.client.read(path, encoding=encoding)
+
+    def read_bytes(self, path):
+        with self.client.read(path) as reader:
+            return reader.read()
+
+    def write_bytes(self, path, data):
+        self.client.write(path, data=data, overwrite=True)
+
+    def write_chunks(self, path, chunks):
+        self.client.write(path, data=chunks, overwrite=True)
+
+    def makedirs(self, path):
+        self.client.makedirs(path)
+
+    def rename(self, src, dst):
+        self.client.rename(src, dst)
+
+    def delete(self, path, recursive=False):
+        self.client.delete(path, recursive=recursive)
+
+
+class PathIndex:
+    """📇 디렉터리마다 list 한 번으로 파일 존재 여부 / 크기 / 수정 시각을 조회하는 인덱스
+
+    파일마다 status 를 부르면 (WebHDFS 에서는) 파일 수만큼 왕복이 생기므로,
+    매니페스트에 나온 디렉터리만 한 번씩 나열해서 메모리에 들고 있는다.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._dirs = {}
+
+    def _split(self, path):
+        parent, _, name = path.rstrip("/").rpartition("/")
+        return parent or "/", name
+
+    def _entries(self, directory):
+        if directory not in self._dirs:
+            try:
+                entries = dict(self.storage.list(directory))
+            except Exception:
+                # 디렉터리가 없으면 빈 목록, 그 밖의 오류(네트워크 등)는 그대로 올림
+                if self.storage.exists(directory):
+                    raise
+                entries = {}
+            self._dirs[directory] = entries
+        return self._dirs[directory]
+
+    def preload(self, paths):
+        """paths 가 들어 있는 디렉터리를 한 번씩 나열. 반환값: 나열한 디렉터리 수"""
+        directories = {self._split(path)[0] for path in paths}
+        for directory in sorted(directories):
+            self._entries(directory)
+        return len(directories)
+
+    def status(self, path):
+        """{'type', 'length', 'modificationTime', ...} 또는 None"""
+        directory, name = self._split(path)
+        return self._entries(directory).get(name)
+
+    def exists(self, path):
+        status = self.status(path)
+        return status is not None and status["type"] == "FILE"
+
+    def size(self, path):
+        status = self.status(path)
+        return status["length"] if status else 0
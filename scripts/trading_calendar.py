@@ -0,0 +1,171 @@
+import os
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+
+DEFAULT_START = "1990-01-01"
+DEFAULT_END = "2045-12-31"
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "stock_project", "nyse_sessions.npz")
+
+
+def _to_day(value):
+    """날짜 값을 datetime64[D] 정수(1970-01-01 기준 일수)로 변환"""
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return int(np.datetime64(value, "D").astype("int64"))
+    if isinstance(value, np.datetime64):
+        return int(value.astype("datetime64[D]").astype("int64"))
+    return int(np.datetime64(str(value).replace("_", "-")[:10], "D").astype("int64"))
+
+
+def _to_date(day):
+    return np.datetime64(int(day), "D").astype(date)
+
+
+class TradingCalendar:
+    """📆 거래일(세션) 인덱스
+
+    - sessions: 정렬된 세션 날짜 배열 (datetime64[D])
+    - 달력 전체 구간에 대한 세션 bitmap 과 누적 순번(rank) 배열을 만들어
+      is_session / next / previous / 구간 조회를 모두 O(1) 로 처리
+    """
+
+    def __init__(self, sessions, start, end):
+        self.sessions = np.asarray(sessions, dtype="datetime64[D]")
+        self.start = _to_day(start)
+        self.end = _to_day(end)
+
+        offsets = self.sessions.astype("int64") - self.start
+        self._bitmap = np.zeros(self.end - self.start + 1, dtype=bool)
+        self._bitmap[offsets] = True
+        # rank[i]: i 일 이전(포함) 마지막 세션의 sessions 인덱스 (없으면 -1)
+        self._rank = np.cumsum(self._bitmap) - 1
+
+    @classmethod
+    def build(cls, start=DEFAULT_START, end=DEFAULT_END, exchange="NYSE"):
+        """pandas_market_calendars 로 세션 목록 생성"""
+        import pandas_market_calendars as mcal
+
+        days = mcal.get_calendar(exchange).valid_days(start, end)
+        sessions = days.tz_localize(None).values.astype("datetime64[D]")
+        return cls(sessions, start, end)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, sessions=self.sessions, bounds=np.array([self.start, self.end]))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            start, end = data["bounds"].tolist()
+            return cls(data["sessions"], _to_date(start), _to_date(end))
+
+    def covers(self, start, end):
+        return self.start <= _to_day(start) and _to_day(end) <= self.end
+
+    def _offset(self, value):
+        offset = _to_day(value) - self.start
+        if not 0 <= offset < len(self._bitmap):
+            raise ValueError(f"거래일 달력 범위 밖의 날짜: {value}")
+        return offset
+
+    def is_session(self, value):
+        return bool(self._bitmap[self._offset(value)])
+
+    def previous_session(self, value, inclusive=False):
+        """value 이전(inclusive 면 포함) 마지막 세션"""
+        offset = self._offset(value)
+        idx = self._rank[offset]
+        if self._bitmap[offset] and not inclusive:
+            idx -= 1
+        if idx < 0:
+            raise ValueError(f"이전 거래일이 달력에 없음: {value}")
+        return self.sessions[idx].astype(date)
+
+    def next_session(self, value, inclusive=False):
+        """value 이후(inclusive 면 포함) 첫 세션"""
+        offset = self._offset(value)
+        idx = self._rank[offset] + 1
+        if self._bitmap[offset] and inclusive:
+            idx -= 1
+        if idx >= len(self.sessions):
+            raise ValueError(f"다음 거래일이 달력에 없음: {value}")
+        return self.sessions[idx].astype(date)
+
+    def _session_slice(self, start, end):
+        """[start, end) 에 포함되는 세션의 sessions 인덱스 구간"""
+        lo = self._rank[self._offset(start) - 1] + 1 if self._offset(start) > 0 else 0
+        hi = self._rank[self._offset(end) - 1] + 1 if self._offset(end) > 0 else 0
+        return lo, max(lo, hi)
+
+    def sessions_in_range(self, start, end):
+        """[start, end) 구간의 세션 날짜 배열 (end 는 yf.download 처럼 제외)"""
+        lo, hi = self._session_slice(start, end)
+        return self.sessions[lo:hi]
+
+    def count_sessions(self, start, end):
+        lo, hi = self._session_slice(start, end)
+        return hi - lo
+
+    def trim_range(self, start, end):
+        """[start, end) 를 실제 세션 구간으로 좁힘. 세션이 없으면 None
+
+        반환값: (첫 세션, 마지막 세션 다음 날) 'YYYY-MM-DD' 문자열
+        """
+        sessions = self.sessions_in_range(start, end)
+        if len(sessions) == 0:
+            return None
+        first, last = sessions[0].astype(date), sessions[-1].astype(date)
+        return first.strftime("%Y-%m-%d"), (last + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    def split_range(self, start, end, max_sessions):
+        """[start, end) 를 세션 max_sessions 개 단위의 구간 목록으로 나눔 (세션 경계 기준)"""
+        sessions = self.sessions_in_range(start, end)
+        windows = []
+        for i in range(0, len(sessions), max_sessions):
+            chunk = sessions[i:i + max_sessions]
+            first, last = chunk[0].astype(date), chunk[-1].astype(date)
+            windows.append((first.strftime("%Y-%m-%d"), (last + timedelta(days=1)).strftime("%Y-%m-%d")))
+        return windows
+
+
+_calendar = None
+
+
+def get_trading_calendar(path=None, start=DEFAULT_START, end=DEFAULT_END):
+    """📆 디스크에 저장된 거래일 인덱스를 불러옴 (없거나 범위가 모자라면 새로 만들어 저장)"""
+    global _calendar
+    if _calendar is not None and _calendar.covers(start, end):
+        return _calendar
+
+    path = path or os.getenv("TRADING_CALENDAR_PATH") or DEFAULT_CACHE_PATH
+    calendar = None
+    if os.path.exists(path):
+        try:
+            calendar = TradingCalendar.load(path)
+        except Exception as e:
+            print(f"[WARN] 거래일 인덱스 로드 실패, 다시 생성합니다: {e}")
+    if calendar is None or not calendar.covers(start, end):
+        calendar = TradingCalendar.build(start, end)
+        try:
+            calendar.save(path)
+        except OSError as e:
+            print(f"[WARN] 거래일 인덱스 저장 실패: {e}")
+
+    _calendar = calendar
+    return calendar
+
+
+def is_market_closed(date):
+    """📆 주말 / NYSE 휴장일 여부 (디스크에 저장된 거래일 인덱스 사용)"""
+    return not get_trading_calendar().is_session(date)
+
+
+def get_default_dates() -> tuple:
+    """🗓️ 기본 날짜를 직전 거래일로 설정 (주말 / 휴장일 건너뜀)"""
+    last_session = get_trading_calendar().previous_session(datetime.now().date())
+    return last_session.strftime("%Y-%m-%d"), (last_session + timedelta(days=1)).strftime("%Y-%m-%d")
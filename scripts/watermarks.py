@@ -0,0 +1,117 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import psycopg2
+
+
+def _to_date(value):
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def load_high_water_marks(db_config, tickers=None):
+    """🔖 stock_data 에서 티커별 마지막 적재 날짜(max(date))를 한 번의 쿼리로 조회
+
+    tickers 를 주면 (ticker, date) 인덱스를 티커마다 역방향으로 한 번씩만 탐색하고,
+    생략하면 전체 테이블을 GROUP BY 한다. 반환값: {ticker: date}
+    """
+    with psycopg2.connect(**db_config) as conn, conn.cursor() as cur:
+        if tickers is None:
+            cur.execute("SELECT ticker, MAX(date) FROM stock_data GROUP BY ticker;")
+        else:
+            cur.execute("""
+                SELECT t.ticker,
+                       (SELECT MAX(s.date) FROM stock_data s WHERE s.ticker = t.ticker)
+                FROM unnest(%s::text[]) AS t(ticker);
+            """, (list(tickers),))
+        marks = {ticker: last_date for ticker, last_date in cur.fetchall() if last_date is not None}
+    conn.close()
+    return marks
+
+
+def count_loaded_tickers(db_config, tickers, batch_date):
+    """🔎 stock_data 에 batch_date 행이 있는 티커 수 ((ticker, date) 인덱스로 티커마다 한 번씩 탐색)"""
+    with psycopg2.connect(**db_config) as conn, conn.cursor() as cur:
+        cur.execute("SELECT count(DISTINCT ticker) FROM stock_data WHERE date = %s AND ticker = ANY(%s);",
+                    (batch_date, list(tickers)))
+        count = cur.fetchone()[0]
+    conn.close()
+    return count
+
+
+class HighWaterMarkIndex:
+    """📚 티커별 high-water mark 캐시
+
+    - 처음 보는 티커만 모아서 한 번에 조회
+    - 적재가 끝난 배치는 advance() 로 반영해서 같은 실행 안에서도 재사용
+    - high-water mark 는 "아직 없다" 판단에만 쓰고, 있다고 볼 때는 그 날짜의 행을 직접 확인
+      (더 최근 행이 있어도 예전 날짜를 백필 / 다시 받은 파일은 적재해야 하므로)
+    """
+
+    def __init__(self, db_config, marks=None):
+        self.db_config = db_config
+        self.marks = dict(marks or {})
+        self._known = set(self.marks)
+        self._loaded = set()  # 이번 실행에서 적재했거나 있다고 확인한 (ticker, date)
+
+    def get(self, tickers):
+        unknown = [t for t in set(tickers) if t not in self._known]
+        if unknown:
+            self.marks.update(load_high_water_marks(self.db_config, unknown))
+            self._known.update(unknown)
+        return {t: self.marks.get(t) for t in tickers}
+
+    def is_loaded(self, tickers, batch_date):
+        """배치의 모든 티커에 batch_date 행이 이미 있으면 True
+
+        high-water mark 가 batch_date 보다 앞선 티커가 있으면 바로 False, 아니면 stock_data 에서 그 날짜 행을 확인
+        """
+        if not tickers:
+            return False
+        batch_date = _to_date(batch_date)
+        marks = self.get(tickers)
+        if not all(marks[t] is not None and marks[t] >= batch_date for t in tickers):
+            return False
+        unchecked = sorted({t for t in tickers if (t, batch_date) not in self._loaded})
+        if unchecked and count_loaded_tickers(self.db_config, unchecked, batch_date) < len(unchecked):
+            return False
+        self._loaded.update((t, batch_date) for t in unchecked)
+        return True
+
+    def advance(self, tickers, batch_date):
+        batch_date = _to_date(batch_date)
+        for t in tickers:
+            if self.marks.get(t) is None or self.marks[t] < batch_date:
+                self.marks[t] = batch_date
+            self._known.add(t)
+            self._loaded.add((t, batch_date))
+
+
+def plan_incremental_ranges(tickers, marks, from_date, to_date, calendar=None):
+    """🧩 티커별로 아직 없는 구간을 계산해서 같은 구간끼리 묶음
+
+    - 이미 적재된 티커: max(mark + 1일, from_date) ~ to_date
+    - 적재 이력이 없는 티커: from_date ~ to_date
+    - to_date 는 yf.download 처럼 포함하지 않음 (end exclusive)
+    - calendar(TradingCalendar) 를 주면 각 구간을 실제 세션 구간으로 좁히고,
+      세션이 없는 구간(주말/휴장일뿐인 경우)은 요청하지 않음
+    반환값: {(start, end): [tickers]} (날짜는 'YYYY-MM-DD' 문자열)
+    """
+    from_date, to_date = _to_date(from_date), _to_date(to_date)
+    groups = defaultdict(list)
+    for ticker in dict.fromkeys(tickers):
+        mark = _to_date(marks.get(ticker))
+        start = from_date if mark is None else max(from_date, mark + timedelta(days=1))
+        if start >= to_date:
+            continue
+        if calendar is not None:
+            window = calendar.trim_range(start, to_date)
+            if window is None:
+                continue
+        else:
+            window = (start.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d"))
+        groups[window].append(ticker)
+    return dict(sorted(groups.items()))
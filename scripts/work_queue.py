@@ -0,0 +1,430 @@
+import argparse
+import glob
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+from data_files import ManifestEntry, parse_manifest_line
+from db_log_writer import _pid_alive
+
+
+# 큐 이름: 로컬 파일(fetch_stock_data → csv_to_db) / HDFS 파일(fetch_stock_data_hdfs → csv_to_db_hdfs)
+QUEUE_LOCAL = "local"
+QUEUE_HDFS = "hdfs"
+
+# 상태
+PENDING = "pending"  # 적재 대기 (available_at 이후에 가져갈 수 있음)
+CLAIMED = "claimed"  # 로더 하나가 lease_until 까지 가져감 (만료되면 다시 가져갈 수 있음)
+DONE = "done"        # 적재 완료 (ack)
+DEAD = "dead"        # max_attempts 번 실패 (retry-dead 로 다시 대기열에 넣을 수 있음)
+SUPERSEDED = "superseded"  # 실패했지만 그사이 같은 파일이 다시 등록되어 새 항목이 대신 적재함
+
+DEFAULT_WORK_QUEUE_DB = os.path.expanduser("~/.stock_fetch/work_queue.db")
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS work_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        queue TEXT NOT NULL,
+        path TEXT NOT NULL,
+        role TEXT,
+        rows INTEGER,
+        run_id TEXT,
+        state TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        available_at REAL NOT NULL,
+        lease_owner TEXT,
+        lease_until REAL,
+        enqueued_at REAL NOT NULL,
+        done_at REAL,
+        last_error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS work_items_claim ON work_items (queue, state, available_at, id);
+    -- 같은 경로는 대기 중인 항목 하나만 (적재 전에 다시 저장된 파일은 역할 / 행 수 / run_id 만 갱신)
+    CREATE UNIQUE INDEX IF NOT EXISTS work_items_pending_path ON work_items (queue, path) WHERE state = 'pending';
+"""
+
+ENQUEUE_SQL = """
+    INSERT INTO work_items (queue, path, role, rows, run_id, available_at, enqueued_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (queue, path) WHERE state = 'pending'
+    DO UPDATE SET role = excluded.role, rows = excluded.rows, run_id = excluded.run_id
+"""
+
+
+@dataclass
+class WorkItem:
+    """큐에서 가져온 파일 하나 (entry 는 매니페스트 한 줄과 같은 정보)"""
+    id: int
+    entry: ManifestEntry
+    attempts: int
+
+    @property
+    def path(self):
+        return self.entry.path
+
+
+def default_owner():
+    """lease 주인 이름 (호스트:pid)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseKeeper:
+    """⏳ with 블록 동안 가져간 items 의 lease 를 interval 초마다 연장하는 스레드
+
+    적재가 lease_seconds 보다 오래 걸려도 다른 로더가 같은 항목을 다시 가져가지 않게 한다.
+    (로더가 죽으면 연장도 멈추므로 lease 가 만료된 뒤 다른 로더가 가져감)
+    """
+
+    def __init__(self, work_queue, owner, items, interval=None):
+        self.work_queue = work_queue
+        self.owner = owner
+        self.ids = [item.id for item in items]
+        self.interval = interval or max(1.0, work_queue.lease_seconds / 3)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name="lease-keeper", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                renewed = self.work_queue.renew(self.ids, self.owner)
+            except sqlite3.Error as e:
+                print(f"⚠️ lease 연장 실패 (다음 주기에 다시 시도): {e}")
+                continue
+            if renewed < len(self.ids):
+                print(f"⚠️ lease 를 잃은 항목 {len(self.ids) - renewed}개 (다른 로더가 가져갔을 수 있음)")
+
+
+class WorkQueue:
+    """📬 fetcher → loader 작업 큐 (SQLite WAL, 여러 프로세스가 같은 파일을 동시에 사용)
+
+    - enqueue: fetcher 가 저장 / 업로드를 마친 파일을 등록 (한 트랜잭션)
+    - claim  : 로더가 limit 개를 lease_seconds 동안 가져감 (BEGIN IMMEDIATE 라서 두 로더가 같은 항목을 못 가져감)
+    - ack    : 적재 완료. 지금도 lease 를 가진 로더의 ack 만 반영 (lease 가 만료되어 다른 로더가 가져간 항목은 무시)
+    - release: 적재 실패. retry_delay × 2^(시도-1) 뒤에 다시 가져갈 수 있고, max_attempts 번 실패하면 dead
+    - defer  : 적재를 시도하지 않은 항목을 시도 횟수를 쓰지 않고 바로 대기열로 되돌림
+    로더가 죽으면 lease 가 만료된 뒤 다른 로더가 다시 가져간다. 적재(병합)는 같은 파일을 두 번 넣어도
+    결과가 같으므로, 항목마다 done 이 정확히 한 번 기록되는 것으로 적재 건수를 센다.
+    """
+
+    def __init__(self, path, queue=QUEUE_LOCAL, lease_seconds=1800, max_attempts=5, retry_delay=60):
+        self.path = path
+        self.queue = queue
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        # autocommit 모드에서 트랜잭션을 직접 BEGIN / COMMIT (busy_timeout 동안 다른 프로세스의 쓰기를 기다림)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA synchronous=FULL;")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _transaction(self, work):
+        """BEGIN IMMEDIATE (쓰기 잠금을 먼저 잡음) → work(conn) → COMMIT"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE;")
+            try:
+                result = work(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK;")
+                raise
+            self.conn.execute("COMMIT;")
+            return result
+
+    def enqueue(self, entries):
+        """📥 ManifestEntry 목록 등록 → 등록한 개수"""
+        now = time.time()
+        rows = [(self.queue, e.path, e.role, e.rows, e.run_id, now, now) for e in entries]
+        if not rows:
+            return 0
+        self._transaction(lambda conn: conn.executemany(ENQUEUE_SQL, rows))
+        return len(rows)
+
+    def claim(self, owner, limit=500):
+        """🎫 가져갈 수 있는 항목(대기 중 / lease 만료)을 등록 순서대로 limit 개 가져감 → [WorkItem]"""
+        def work(conn):
+            now = time.time()
+            # lease 가 만료된 항목 중 시도 횟수를 다 쓴 것은 dead
+            conn.execute("""
+                UPDATE work_items SET state = 'dead', lease_owner = NULL, last_error = 'lease 만료'
+                WHERE queue = ? AND state = 'claimed' AND lease_until < ? AND attempts >= ?
+            """, (self.queue, now, self.max_attempts))
+            rows = conn.execute("""
+                SELECT id, path, role, rows, run_id, attempts FROM work_items
+                WHERE queue = ? AND ((state = 'pending' AND available_at <= ?)
+                                     OR (state = 'claimed' AND lease_until < ?))
+                ORDER BY id LIMIT ?
+            """, (self.queue, now, now, limit)).fetchall()
+            conn.executemany("""
+                UPDATE work_items SET state = 'claimed', lease_owner = ?, lease_until = ?, attempts = attempts + 1
+                WHERE id = ?
+            """, [(owner, now + self.lease_seconds, row[0]) for row in rows])
+            return [WorkItem(row[0], ManifestEntry(row[1], row[2], row[3], row[4]), row[5] + 1) for row in rows]
+        return self._transaction(work)
+
+    def renew(self, ids, owner):
+        """⏳ 아직 적재 중인 항목의 lease 연장 → 연장한 개수"""
+        until = time.time() + self.lease_seconds
+        return self._transaction(lambda conn: sum(
+            conn.execute("UPDATE work_items SET lease_until = ? WHERE id = ? AND state = 'claimed' "
+                         "AND lease_owner = ?", (until, item_id, owner)).rowcount
+            for item_id in ids))
+
+    def ack(self, ids, owner):
+        """✅ 적재 완료 기록 → 반영한 개수 (lease 를 잃은 항목은 빠짐)"""
+        now = time.time()
+        return self._transaction(lambda conn: sum(
+            conn.execute("UPDATE work_items SET state = 'done', done_at = ?, lease_owner = NULL, lease_until = NULL "
+                         "WHERE id = ? AND state = 'claimed' AND lease_owner = ?", (now, item_id, owner)).rowcount
+            for item_id in ids))
+
+    def release(self, ids, owner, error=None):
+        """🔁 적재 실패: 나중에 다시 시도 (max_attempts 번째 실패면 dead) → 반영한 개수"""
+        now = time.time()
+
+        def work(conn):
+            released = 0
+            for item_id in ids:
+                row = conn.execute("SELECT attempts FROM work_items WHERE id = ? AND state = 'claimed' "
+                                   "AND lease_owner = ?", (item_id, owner)).fetchone()
+                if row is None:
+                    continue
+                attempts = row[0]
+                state = DEAD if attempts >= self.max_attempts else PENDING
+                if state == PENDING and conn.execute(
+                        "SELECT 1 FROM work_items WHERE queue = ? AND state = 'pending' "
+                        "AND path = (SELECT path FROM work_items WHERE id = ?)", (self.queue, item_id)).fetchone():
+                    state = SUPERSEDED
+                conn.execute("""
+                    UPDATE work_items SET state = ?, available_at = ?, lease_owner = NULL, lease_until = NULL,
+                                          last_error = ?
+                    WHERE id = ?
+                """, (state, now + self.retry_delay * 2 ** (attempts - 1), error, item_id))
+                released += 1
+            return released
+        return self._transaction(work)
+
+    def defer(self, ids, owner):
+        """⏪ 시도하지 않은 항목을 바로 대기열로 (claim 에서 늘린 시도 횟수를 되돌림) → 반영한 개수
+
+        같은 경로가 그사이 다시 등록되어 대기 중이면 superseded 로 둠
+        """
+        now = time.time()
+        return self._transaction(lambda conn: sum(
+            conn.execute("""
+                UPDATE work_items
+                SET state = CASE WHEN EXISTS (SELECT 1 FROM work_items p WHERE p.queue = work_items.queue
+                                              AND p.path = work_items.path AND p.state = 'pending')
+                                 THEN 'superseded' ELSE 'pending' END,
+                    attempts = attempts - 1, available_at = ?, lease_owner = NULL, lease_until = NULL
+                WHERE id = ? AND state = 'claimed' AND lease_owner = ?
+            """, (now, item_id, owner)).rowcount
+            for item_id in ids))
+
+    def finish(self, owner, items, done_paths, error="적재 실패 또는 파일 없음", deferred_paths=()):
+        """가져간 items 중 done_paths 에 있는 것은 ack, deferred_paths 는 defer, 나머지는 release
+        → (ack 개수, release 개수)"""
+        acked = self.ack([item.id for item in items if item.path in done_paths], owner)
+        deferred = self.defer([item.id for item in items
+                               if item.path not in done_paths and item.path in deferred_paths], owner)
+        released = self.release([item.id for item in items
+                                 if item.path not in done_paths and item.path not in deferred_paths], owner, error)
+        lost = len(items) - acked - deferred - released
+        if lost:
+            print(f"⚠️ lease 가 만료되어 다른 로더가 가져간 항목 {lost}개는 기록하지 않음")
+        return acked, released
+
+    def stats(self):
+        """상태별 항목 수 {state: count}"""
+        with self._lock:
+            rows = self.conn.execute("SELECT state, count(*) FROM work_items WHERE queue = ? GROUP BY state",
+                                     (self.queue,)).fetchall()
+        counts = {PENDING: 0, CLAIMED: 0, DONE: 0, DEAD: 0, SUPERSEDED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def report(self):
+        counts = self.stats()
+        return (f"📬 큐 {self.queue}: 대기 {counts[PENDING]:,}, 적재 중 {counts[CLAIMED]:,}, "
+                f"완료 {counts[DONE]:,}, 실패(dead) {counts[DEAD]:,}"
+                + (f", 재등록으로 대체 {counts[SUPERSEDED]:,}" if counts[SUPERSEDED] else ""))
+
+    def retry_dead(self):
+        """dead 항목을 다시 대기열로 → 옮긴 개수
+
+        경로마다 가장 최근 dead 항목 하나만 옮기고 (대기 중인 항목은 경로마다 하나뿐이어야 함),
+        나머지 dead 항목과 같은 경로가 이미 대기 중인 dead 항목은 superseded 로 둔다.
+        """
+        def work(conn):
+            promoted = conn.execute("""
+                UPDATE work_items SET state = 'pending', attempts = 0, available_at = ?
+                WHERE queue = ? AND state = 'dead'
+                  AND id IN (SELECT max(id) FROM work_items WHERE queue = ? AND state = 'dead' GROUP BY path)
+                  AND NOT EXISTS (SELECT 1 FROM work_items p WHERE p.queue = work_items.queue
+                                  AND p.path = work_items.path AND p.state = 'pending')
+            """, (time.time(), self.queue, self.queue)).rowcount
+            conn.execute("""
+                UPDATE work_items SET state = 'superseded'
+                WHERE queue = ? AND state = 'dead'
+                  AND EXISTS (SELECT 1 FROM work_items p WHERE p.queue = work_items.queue
+                              AND p.path = work_items.path AND p.state = 'pending')
+            """, (self.queue,))
+            return promoted
+        return self._transaction(work)
+
+    def _latest_states(self, conn, paths):
+        """경로마다 가장 최근 항목의 (id, 상태) {path: (id, state)} (큐에 없는 경로는 빠짐)"""
+        paths = list(dict.fromkeys(paths))
+        latest = {}
+        for offset in range(0, len(paths), 500):
+            chunk = paths[offset:offset + 500]
+            rows = conn.execute(f"""
+                SELECT path, id, state FROM work_items
+                WHERE queue = ? AND id IN (SELECT max(id) FROM work_items WHERE queue = ?
+                                           AND path IN ({','.join('?' * len(chunk))}) GROUP BY path)
+            """, (self.queue, self.queue, *chunk)).fetchall()
+            latest.update({path: (item_id, state) for path, item_id, state in rows})
+        return latest
+
+    def path_states(self, paths):
+        """경로마다 가장 최근 항목의 상태 {path: state} (큐에 없는 경로는 빠짐)"""
+        with self._lock:
+            return {path: state for path, (_, state) in self._latest_states(self.conn, paths).items()}
+
+    def retire_paths(self, paths):
+        """🗜️ 다른 파일로 합쳐서 지울 경로 정리 (한 트랜잭션) → (지우면 안 되는 경로, dead 였던 경로)
+
+        - 대기 중 / 적재 중인 경로는 로더가 곧 읽으므로 지우면 안 됨
+        - dead 항목은 superseded 로 바꿈 (합친 파일을 대신 등록해서 적재해야 함)
+        """
+        def work(conn):
+            latest = self._latest_states(conn, paths)
+            busy = {path for path, (_, state) in latest.items() if state in (PENDING, CLAIMED)}
+            dead = {path for path, (_, state) in latest.items() if state == DEAD}
+            conn.executemany("UPDATE work_items SET state = 'superseded' WHERE queue = ? AND path = ? "
+                             "AND state = 'dead'", [(self.queue, path) for path in dead])
+            return busy, dead
+        return self._transaction(work)
+
+    def purge_done(self, older_than_days=30):
+        """완료된 지 older_than_days 일이 지난 항목 삭제 → 삭제한 개수"""
+        cutoff = time.time() - older_than_days * 86400
+        return self._transaction(lambda conn: conn.execute(
+            "DELETE FROM work_items WHERE queue = ? AND state = 'done' AND done_at < ?",
+            (self.queue, cutoff)).rowcount)
+
+    def import_manifest(self, manifest_path):
+        """📜 예전 텍스트 매니페스트(CSV_LOG_DIR / HDFS_CSV_LOG_DIR)를 큐로 옮기고 파일 삭제 → 등록한 개수
+
+        먼저 이름을 바꿔서 읽으므로 옮기는 동안 예전 fetcher 가 새로 쓴 줄은 다음 번에 옮겨진다.
+        (여러 로더가 동시에 시작해도 이름 바꾸기에 성공한 한 곳만 옮김)
+        옮기던 프로세스가 등록 전에 죽어 남은 <manifest>.<pid>-<uuid>.importing 도 넘겨받아 함께 옮긴다.
+        """
+        if not manifest_path:
+            return 0
+        count = 0
+        for path in sorted(glob.glob(glob.escape(manifest_path) + ".*.importing")):
+            try:
+                pid = int(path[len(manifest_path) + 1:].split(".")[0].split("-")[0])
+            except ValueError:
+                pid = None
+            if pid is not None and _pid_alive(pid):
+                continue
+            # rename 으로 소유권을 먼저 가져와서 다른 로더와 중복 등록을 막음
+            claimed = self._claim_manifest(path, manifest_path)
+            if claimed:
+                count += self._import_file(claimed)
+                print(f"[INFO] 옮기다 남은 매니페스트 복구: {path}")
+
+        claimed = self._claim_manifest(manifest_path, manifest_path)
+        if claimed:
+            count += self._import_file(claimed)
+        return count
+
+    @staticmethod
+    def _claim_manifest(path, manifest_path):
+        """path 를 이 프로세스 몫의 .importing 이름으로 바꿈 → 바뀐 경로 (다른 곳이 먼저 가져갔으면 None)"""
+        claimed = f"{manifest_path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.importing"
+        try:
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+
+    def _import_file(self, path):
+        with open(path) as f:
+            entries = [entry for entry in map(parse_manifest_line, f) if entry]
+        count = self.enqueue(entries)
+        os.remove(path)
+        return count
+
+def process_queue(work_queue, load, claim_size, manifest_path=None):
+    """🔁 작업 큐가 빌 때까지 claim_size 개씩 가져와 적재 → 가져온 항목 수 (csv_to_db / csv_to_db_hdfs 공통)
+
+    load(items) 는 (끝난 경로 집합, 되돌릴 경로 집합) 을 반환. 끝난 항목은 ack, 나머지는 release 한다.
+    manifest_path 를 주면 먼저 예전 텍스트 매니페스트를 큐로 옮김
+    """
+    imported = work_queue.import_manifest(manifest_path)
+    if imported:
+        print(f"📜 예전 매니페스트의 파일 {imported}개를 작업 큐로 옮김")
+
+    owner = default_owner()
+    claimed = 0
+    while True:
+        items = work_queue.claim(owner, claim_size)
+        if not items:
+            break
+        claimed += len(items)
+        done, deferred = set(), set()
+        try:
+            # 적재가 lease 보다 오래 걸려도 다른 로더가 다시 가져가지 않도록 연장
+            with LeaseKeeper(work_queue, owner, items):
+                done, deferred = load(items)
+        finally:
+            work_queue.finish(owner, items, done, deferred_paths=deferred)
+
+    if claimed:
+        print("✅ 모든 CSV 파일 처리 완료")
+    else:
+        print("📂 적재할 CSV 파일이 없습니다.")
+    print(work_queue.report())
+    return claimed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="fetcher → loader 작업 큐 관리")
+    parser.add_argument("command", choices=["stats", "retry-dead", "purge", "import"])
+    parser.add_argument("--db", default=os.getenv("WORK_QUEUE_DB") or DEFAULT_WORK_QUEUE_DB,
+                        help="큐 SQLite 파일 (기본값: WORK_QUEUE_DB 환경 변수)")
+    parser.add_argument("--queue", choices=[QUEUE_LOCAL, QUEUE_HDFS], default=QUEUE_LOCAL)
+    parser.add_argument("--days", type=int, default=30, help="purge: 완료된 지 N일 지난 항목 삭제")
+    parser.add_argument("--manifest", default=None, help="import: 옮길 예전 텍스트 매니페스트")
+    args = parser.parse_args()
+
+    work_queue = WorkQueue(args.db, args.queue)
+    if args.command == "retry-dead":
+        print(f"🔁 dead 항목 {work_queue.retry_dead():,}개를 다시 대기열에 넣었습니다.")
+    elif args.command == "purge":
+        print(f"🗑️ 완료 항목 {work_queue.purge_done(args.days):,}개 삭제")
+    elif args.command == "import":
+        print(f"📜 {args.manifest}: {work_queue.import_manifest(args.manifest):,}개 등록")
+    print(work_queue.report())
+    work_queue.close()